@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Profile
+from .models import BackgroundJob, Profile, UpstreamBudget, WorkerHeartbeat
 
 
 @admin.register(Profile)
@@ -7,3 +7,20 @@ class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'role')
     list_filter = ('role',)
     search_fields = ('user__username',)
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'key', 'status', 'progress_done', 'progress_total', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('key', 'message')
+
+
+@admin.register(WorkerHeartbeat)
+class WorkerHeartbeatAdmin(admin.ModelAdmin):
+    list_display = ('name', 'seen_at')
+
+
+@admin.register(UpstreamBudget)
+class UpstreamBudgetAdmin(admin.ModelAdmin):
+    list_display = ('name', 'tokens', 'refilled_at')
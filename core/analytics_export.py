@@ -0,0 +1,239 @@
+"""
+Columnar analytics snapshots of time entries, work items and projects.
+Each run writes one part file per table (Parquet when pyarrow is installed, otherwise NumPy .npz)
+with typed columns; low-cardinality text columns are dictionary-encoded (codes + categories).
+A manifest.json in the output directory records each table's watermark so the next run only
+appends rows created/changed since the last snapshot. Readers de-duplicate on id, keeping the last part.
+"""
+import json
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import numpy as np
+from django.utils import timezone
+
+from projects.models import Project
+from time_tracking.models import TimeEntry
+from work.models import WorkItem
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_PARQUET = 'parquet'
+FORMAT_NPZ = 'npz'
+
+# table name -> (queryset factory, incremental key, [(column, lookup, kind)])
+# kind: int (nullable FK -> -1 in npz), float, date, datetime, text, category (dictionary-encoded)
+TABLES = {
+    'time_entries': (
+        lambda: TimeEntry.objects.all(),
+        'updated_at',
+        [
+            ('id', 'id', 'int'),
+            ('user_id', 'user_id', 'int'),
+            ('username', 'user__username', 'category'),
+            ('project_id', 'project_id', 'int'),
+            ('project_number', 'project__project_number', 'category'),
+            ('work_item_id', 'work_item_id', 'int'),
+            ('work_code', 'work_code', 'category'),
+            ('date', 'date', 'date'),
+            ('hours', 'hours', 'float'),
+            ('overtime_hours', 'overtime_hours', 'float'),
+            ('status', 'status', 'category'),
+            ('updated_at', 'updated_at', 'datetime'),
+        ],
+    ),
+    'work_items': (
+        lambda: WorkItem.all_objects.all(),
+        'updated_at',
+        [
+            ('id', 'id', 'int'),
+            ('project_id', 'project_id', 'int'),
+            ('project_number', 'project__project_number', 'category'),
+            ('title', 'title', 'text'),
+            ('work_type', 'work_type', 'category'),
+            ('priority', 'priority', 'category'),
+            ('status', 'status', 'category'),
+            ('assigned_to', 'assigned_to__username', 'category'),
+            ('due_date', 'due_date', 'date'),
+            ('logged_hours', 'logged_hours', 'float'),
+            ('created_at', 'created_at', 'datetime'),
+            ('updated_at', 'updated_at', 'datetime'),
+            ('deleted_at', 'deleted_at', 'datetime'),
+        ],
+    ),
+    'projects': (
+        lambda: Project.objects.all(),
+        'updated_at',
+        [
+            ('id', 'id', 'int'),
+            ('project_number', 'project_number', 'text'),
+            ('name', 'name', 'text'),
+            ('client', 'client', 'category'),
+            ('pm', 'pm', 'category'),
+            ('project_manager', 'project_manager__username', 'category'),
+            ('status', 'status', 'category'),
+            ('city', 'city', 'category'),
+            ('state', 'state', 'category'),
+            ('updated_at', 'updated_at', 'datetime'),
+        ],
+    ),
+}
+
+
+def default_format():
+    return FORMAT_PARQUET if pa is not None else FORMAT_NPZ
+
+
+def encode_categories(values):
+    """Dictionary-encode strings: (int32 codes, sorted unicode categories). None maps to ''."""
+    categories, codes = np.unique(np.array(['' if v is None else str(v) for v in values], dtype=str), return_inverse=True)
+    return codes.astype(np.int32), categories
+
+
+def _to_utc_naive(value):
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def build_columns(rows, columns):
+    """
+    Turn values_list rows into {name: (kind, array[, categories])}.
+    Nulls: int -> -1 with a mask, float -> NaN, date/datetime -> NaT, text -> ''.
+    """
+    raw = list(zip(*rows)) if rows else [() for _ in columns]
+    out = {}
+    for (name, _lookup, kind), values in zip(columns, raw):
+        if kind == 'int':
+            mask = np.array([v is None for v in values], dtype=bool)
+            out[name] = (kind, np.array([-1 if v is None else v for v in values], dtype=np.int64), mask)
+        elif kind == 'float':
+            out[name] = (kind, np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64))
+        elif kind == 'date':
+            out[name] = (kind, np.array(['NaT' if v is None else v.isoformat() for v in values], dtype='datetime64[D]'))
+        elif kind == 'datetime':
+            out[name] = (kind, np.array([_to_utc_naive(v) or 'NaT' for v in values], dtype='datetime64[us]'))
+        elif kind == 'category':
+            out[name] = (kind, *encode_categories(values))
+        else:
+            out[name] = (kind, np.array(['' if v is None else str(v) for v in values], dtype=str))
+    return out
+
+
+def write_npz(path, data):
+    arrays = {}
+    for name, (kind, *parts) in data.items():
+        if kind == 'category':
+            arrays[f'{name}.codes'], arrays[f'{name}.categories'] = parts
+        elif kind == 'int':
+            arrays[name], arrays[f'{name}.null'] = parts
+        else:
+            arrays[name] = parts[0]
+    np.savez_compressed(path, **arrays)
+
+
+def write_parquet(path, data):
+    fields = {}
+    for name, (kind, *parts) in data.items():
+        if kind == 'category':
+            codes, categories = parts
+            fields[name] = pa.DictionaryArray.from_arrays(
+                pa.array(codes, type=pa.int32()), pa.array(categories.tolist(), type=pa.string())
+            )
+        elif kind == 'int':
+            fields[name] = pa.array(parts[0], mask=parts[1], type=pa.int64())
+        elif kind == 'text':
+            fields[name] = pa.array(parts[0].tolist(), type=pa.string())
+        else:
+            # from_pandas: NaN / NaT become nulls
+            fields[name] = pa.array(parts[0], from_pandas=True)
+    pq.write_table(pa.table(fields), path)
+
+
+def read_manifest(output_dir):
+    path = Path(output_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _watermark(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def export_table(name, output_dir, fmt, since=None, stamp=None):
+    """
+    Write rows of one table changed after since (the stored watermark) to a new part file.
+    Returns (row_count, new_watermark, filename or None when nothing changed).
+    """
+    queryset_factory, key, columns = TABLES[name]
+    qs = queryset_factory()
+    if since is not None:
+        since_value = datetime.fromisoformat(since) if key == 'updated_at' else since
+        qs = qs.filter(**{f'{key}__gt': since_value})
+    qs = qs.order_by(key, 'id')
+    rows = list(qs.values_list(*[lookup for _name, lookup, _kind in columns]))
+    if not rows:
+        return 0, since, None
+    key_index = [c[1] for c in columns].index(key)
+    watermark = _watermark(rows[-1][key_index])
+    table_dir = Path(output_dir) / name
+    table_dir.mkdir(parents=True, exist_ok=True)
+    stamp = stamp or timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    filename = f'part-{stamp}.{fmt}'
+    data = build_columns(rows, columns)
+    if fmt == FORMAT_PARQUET:
+        write_parquet(table_dir / filename, data)
+    else:
+        write_npz(table_dir / filename, data)
+    return len(rows), watermark, f'{name}/{filename}'
+
+
+def export_snapshot(output_dir, fmt=None, full=False, tables=None):
+    """
+    Export each table (default: all) and update the manifest.
+    full=True ignores stored watermarks and starts a fresh set of parts.
+    Returns {table: row_count}.
+    """
+    fmt = fmt or default_format()
+    if fmt == FORMAT_PARQUET and pa is None:
+        raise ImportError('pyarrow is required for Parquet output; install it or use the npz format.')
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {} if full else read_manifest(output_dir)
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    counts = {}
+    for name in tables or TABLES:
+        entry = manifest.get(name, {'key': TABLES[name][1], 'watermark': None, 'parts': []})
+        if entry.get('format', fmt) != fmt or entry['key'] != TABLES[name][1]:
+            # Never mix formats or incremental keys within one table's parts; start that table over
+            entry = {'key': TABLES[name][1], 'watermark': None, 'parts': []}
+        count, watermark, filename = export_table(name, output_dir, fmt, since=entry['watermark'], stamp=stamp)
+        if filename:
+            entry['parts'].append(filename)
+        entry.update(watermark=watermark, format=fmt)
+        manifest[name] = entry
+        counts[name] = count
+    (output_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    return counts
+
+
+def load_npz(path):
+    """Read an .npz part back into {column: array}, decoding dictionary columns to strings."""
+    with np.load(path, allow_pickle=False) as data:
+        out = {}
+        for key in data.files:
+            if key.endswith('.codes'):
+                name = key[:-len('.codes')]
+                out[name] = data[f'{name}.categories'][data[key]]
+            elif not key.endswith('.categories'):
+                out[key] = data[key]
+        return out
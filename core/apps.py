@@ -7,3 +7,4 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         import core.signals  # noqa: F401
+        import core.weather_jobs  # noqa: F401  (registers the refresh_weather handler)
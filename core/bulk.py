@@ -0,0 +1,24 @@
+"""
+Per-row follow-up in signal handlers (rollups, analytics invalidation, health refresh, data version
+bumps) is wasted work inside jobs that delete thousands of rows. Handlers return early while
+signals_muted() is true; the job mutes them around its writes and does the follow-up once at the end.
+"""
+import threading
+from contextlib import contextmanager
+
+_state = threading.local()
+
+
+@contextmanager
+def mute_signals():
+    """Mute per-row follow-up in this thread until the block exits (nests)."""
+    depth = getattr(_state, 'depth', 0)
+    _state.depth = depth + 1
+    try:
+        yield
+    finally:
+        _state.depth = depth
+
+
+def signals_muted():
+    return getattr(_state, 'depth', 0) > 0
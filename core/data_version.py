@@ -0,0 +1,27 @@
+"""
+Data version counters for cache keys. Writers bump a named counter; readers put the current value in
+their cache key, so stale entries are simply never read again. Counters live in the default cache.
+"""
+from django.core.cache import cache
+
+_KEY = 'data_version:{}'
+
+
+def get_version(name):
+    """Current version number for name (starts at 1)."""
+    key = _KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(*names):
+    """Invalidate everything cached under these names."""
+    for name in names:
+        key = _KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, None)
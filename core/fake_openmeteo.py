@@ -0,0 +1,144 @@
+"""
+Local stand-in for the Open-Meteo geocoding and forecast APIs, for tests and refresh benchmarks.
+Payloads are deterministic (coordinates derive from the city name), responses honour keep-alive and
+gzip like the real service, and latency and error rate are configurable.
+Point the app at it with WEATHER_GEOCODE_BASE_URL / WEATHER_FORECAST_BASE_URL = server.url.
+Standalone: python -m core.fake_openmeteo --port 8765 --latency 0.05 --error-rate 0.1
+"""
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+GEOCODE_PATH = '/v1/search'
+FORECAST_PATH = '/v1/forecast'
+
+
+def geocode_payload(name):
+    """Coordinates for a 'City, State' query, spread over the western US by a hash of the city."""
+    seed = zlib.crc32(name.split(',')[0].encode())
+    return {'results': [{'latitude': 32 + seed % 900 / 100, 'longitude': -122 + seed % 800 / 100}]}
+
+
+def forecast_payload(latitudes):
+    """One location object per comma-separated latitude; a bare object when there is only one."""
+    sites = [
+        {'latitude': float(lat), 'daily': {
+            'time': ['2026-01-01', '2026-01-02'], 'precipitation_probability_max': [40, 10],
+            'temperature_2m_max': [18.0, 19.0]}}
+        for lat in latitudes.split(',')
+    ]
+    return sites[0] if len(sites) == 1 else sites
+
+
+class FakeOpenMeteo:
+    """
+    Threaded HTTP server on 127.0.0.1. latency: seconds slept per request. error_rate: fraction of
+    requests answered with error_status (seeded, so runs are repeatable). calls and connections record
+    the request paths and accepted connections.
+    """
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, error_status=503, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls = []
+        self.connections = []
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.connections.clear()
+            self.errors = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _fail(self):
+        with self._lock:
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            self.errors += failed
+            return failed
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                fake.connections.append(self.client_address)
+
+            def do_GET(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                url = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                fake.calls.append(url.path)
+                if url.path == GEOCODE_PATH:
+                    body = geocode_payload(params.get('name', ''))
+                elif url.path == FORECAST_PATH:
+                    body = forecast_payload(params.get('latitude', '0'))
+                else:
+                    self.send_error(404)
+                    return
+                if fake._fail():
+                    self.send_error(fake.error_status)
+                    return
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    payload = gzip.compress(payload)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve fake Open-Meteo geocode and forecast APIs.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds per request.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail.')
+    args = parser.parse_args()
+    server = FakeOpenMeteo(args.port, args.latency, args.error_rate).start()
+    print(f'Fake Open-Meteo on {server.url} (Ctrl+C to stop)')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,131 @@
+"""
+Forecast history for accuracy and weather-delay (claim) analysis. Every refresh's daily series is kept
+per project in ForecastHistory as packed array('f') BLOBs, 4 bytes per day. A refresh that returns the
+same series as the last one stored for that issue day adds no row, and compact() thins days older than
+WEATHER_HISTORY_HOURLY_DAYS to the last forecast issued that day, so long-term a site costs one row
+(~100 bytes) per day however often it is refreshed.
+"""
+import math
+from array import array
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+def get_hourly_days():
+    """Days of full-resolution history kept before compact() keeps only each day's last forecast."""
+    return getattr(settings, 'WEATHER_HISTORY_HOURLY_DAYS', 14)
+
+
+def pack(values):
+    """bytes of array('f'); None becomes NaN."""
+    return array('f', (math.nan if v is None else v for v in values)).tobytes()
+
+
+def unpack(blob):
+    values = array('f')
+    values.frombytes(bytes(blob))
+    return values
+
+
+def _value(values, i):
+    if i < 0 or i >= len(values) or math.isnan(values[i]):
+        return None
+    return values[i]
+
+
+def _row(project_id, forecast, fetched_at):
+    """Unsaved ForecastHistory for a weather_utils.Forecast, or None if it has no dates."""
+    from core.models import ForecastHistory
+    try:
+        first_date = date.fromisoformat(forecast.dates[0])
+    except (IndexError, TypeError, ValueError):
+        return None
+    return ForecastHistory(
+        project_id=project_id,
+        fetched_at=fetched_at,
+        first_date=first_date,
+        precip_prob=pack(forecast.daily_precip_prob(i) for i in range(len(forecast.dates))),
+        temp_max=pack(forecast.temp_max),
+        temp_min=pack(forecast.temp_min),
+    )
+
+
+def _series(row):
+    return bytes(row.precip_prob), bytes(row.temp_max), bytes(row.temp_min)
+
+
+def record(forecasts, fetched_at):
+    """
+    Store {project_id: Forecast} fetched at fetched_at in bulk, skipping series identical to the latest
+    stored for the same project and issue day. Returns the number of rows written.
+    """
+    from core.models import ForecastHistory
+    rows = {pk: row for pk, forecast in forecasts.items() if (row := _row(pk, forecast, fetched_at))}
+    if not rows:
+        return 0
+    latest = {}
+    previous = ForecastHistory.objects.filter(
+        project_id__in=list(rows), first_date__in={row.first_date for row in rows.values()}
+    ).order_by('fetched_at')
+    for row in previous:
+        latest[(row.project_id, row.first_date)] = _series(row)
+    new = [row for row in rows.values() if latest.get((row.project_id, row.first_date)) != _series(row)]
+    ForecastHistory.objects.bulk_create(new, batch_size=500)
+    return len(new)
+
+
+def _project_id(project):
+    return getattr(project, 'pk', project)
+
+
+def precip_prob(project, target_date, lead_days):
+    """
+    Precipitation probability (0-100) for target_date as forecast lead_days before it (the last forecast
+    issued that day), or None if no such forecast was stored. project is a Project or its id.
+    """
+    from core.models import ForecastHistory
+    row = (
+        ForecastHistory.objects.filter(project_id=_project_id(project), first_date=target_date - timedelta(days=lead_days))
+        .order_by('-fetched_at')
+        .only('precip_prob')
+        .first()
+    )
+    value = _value(unpack(row.precip_prob), lead_days) if row else None
+    return None if value is None else int(value)
+
+
+def precip_prob_by_lead(project, target_date, max_lead_days=7):
+    """{lead_days: probability} for every stored issue day that covered target_date, in one query."""
+    from core.models import ForecastHistory
+    rows = (
+        ForecastHistory.objects.filter(
+            project_id=_project_id(project),
+            first_date__gte=target_date - timedelta(days=max_lead_days),
+            first_date__lte=target_date,
+        )
+        .order_by('fetched_at')
+        .values_list('first_date', 'precip_prob')
+    )
+    by_lead = {}
+    for first_date, blob in rows:
+        lead = (target_date - first_date).days
+        value = _value(unpack(blob), lead)
+        if value is not None:
+            by_lead[lead] = int(value)  # later fetches the same day overwrite earlier ones
+    return dict(sorted(by_lead.items()))
+
+
+def compact(now=None):
+    """Keep only the last forecast per project and issue day for days older than get_hourly_days(). Returns rows deleted."""
+    from core.models import ForecastHistory
+    cutoff = timezone.localdate(now) - timedelta(days=get_hourly_days())
+    last = (
+        ForecastHistory.objects.filter(project_id=OuterRef('project_id'), first_date=OuterRef('first_date'))
+        .order_by('-fetched_at', '-pk')
+        .values('pk')[:1]
+    )
+    deleted, _by_model = ForecastHistory.objects.filter(first_date__lt=cutoff).exclude(pk=Subquery(last)).delete()
+    return deleted
@@ -0,0 +1,170 @@
+"""
+Geohash grid over ProjectWeatherLocation. Each location stores a GEOHASH_PRECISION geohash (indexed);
+every prefix of it is a grid cell, so "locations in cell X" is an index range scan on geohash.
+Radius and nearest-neighbour queries scan the 3x3 block of cells around the point at a precision
+whose cells are at least as large as the search radius, then filter by haversine distance.
+Weather refresh shares one forecast per WEATHER_CELL_PRECISION cell (about 5 km square).
+"""
+import math
+
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import Substr
+
+GEOHASH_PRECISION = 9
+WEATHER_CELL_PRECISION = 5
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_MILE = 1.609344
+KM_PER_DEGREE = 111.32
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def encode(lat, lon, precision=GEOHASH_PRECISION):
+    """Geohash of (lat, lon) with precision characters."""
+    lat, lon = float(lat), float(lon)
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            bit = lon >= mid
+            lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            bit = lat >= mid
+            lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+        value = (value << 1) | bit
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def bounds(geohash):
+    """(lat_lo, lat_hi, lon_lo, lon_hi) of a geohash cell."""
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+def decode(geohash):
+    """Center (lat, lon) of a geohash cell."""
+    lat_lo, lat_hi, lon_lo, lon_hi = bounds(geohash)
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+def cell_size_degrees(precision):
+    """(lat degrees, lon degrees) spanned by a cell of this precision."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def neighbours(geohash):
+    """The cell and its 8 neighbours at the same precision (fewer at the poles)."""
+    lat, lon = decode(geohash)
+    dlat, dlon = cell_size_degrees(len(geohash))
+    cells = []
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            nlat = lat + i * dlat
+            if not -90 < nlat < 90:
+                continue
+            nlon = (lon + j * dlon + 180) % 360 - 180
+            cell = encode(nlat, nlon, len(geohash))
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _coverage_km(precision, lat):
+    """Radius guaranteed to be covered by the 3x3 block around a point: the smaller cell side."""
+    dlat, dlon = cell_size_degrees(precision)
+    return min(dlat * KM_PER_DEGREE, dlon * KM_PER_DEGREE * math.cos(math.radians(min(abs(float(lat)), 89.9))))
+
+
+def precision_for_radius(radius_km, lat):
+    """Finest precision whose 3x3 block still covers radius_km around a point at lat (0 = whole world)."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if _coverage_km(precision, lat) >= radius_km:
+            return precision
+    return 0
+
+
+def _locations_in_cells(cells, queryset=None):
+    """Locations whose geohash starts with any of cells, as index range scans."""
+    from core.models import ProjectWeatherLocation
+    qs = queryset if queryset is not None else ProjectWeatherLocation.objects.all()
+    if not cells:
+        return qs
+    cond = Q()
+    for cell in cells:
+        # '~' sorts after every base32 character, so [cell, cell~) is exactly the cell's prefix range
+        cond |= Q(geohash__gte=cell, geohash__lt=cell + '~')
+    return qs.filter(cond)
+
+
+def _ranked(lat, lon, locations):
+    return sorted(
+        ((haversine_km(lat, lon, loc.lat, loc.lon), loc) for loc in locations),
+        key=lambda item: (item[0], item[1].project_id),
+    )
+
+
+def locations_within(lat, lon, radius_km, queryset=None):
+    """[(distance_km, ProjectWeatherLocation)] within radius_km of (lat, lon), nearest first."""
+    precision = precision_for_radius(radius_km, lat)
+    cells = neighbours(encode(lat, lon, precision)) if precision else []
+    locations = _locations_in_cells(cells, queryset).select_related('project')
+    return [item for item in _ranked(lat, lon, locations) if item[0] <= radius_km]
+
+
+def nearest_locations(lat, lon, k=5, queryset=None):
+    """
+    The k locations nearest (lat, lon) as [(distance_km, location)]. Widens the 3x3 block one
+    precision at a time until it holds k candidates that are provably nearer than anything outside it.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cells = neighbours(encode(lat, lon, precision))
+        ranked = _ranked(lat, lon, _locations_in_cells(cells, queryset).select_related('project'))
+        if len(ranked) >= k and ranked[k - 1][0] <= _coverage_km(precision, lat):
+            return ranked[:k]
+    return _ranked(lat, lon, _locations_in_cells([], queryset).select_related('project'))[:k]
+
+
+def clusters(precision=WEATHER_CELL_PRECISION, queryset=None):
+    """Sites grouped by grid cell for map clustering: [{'cell', 'count', 'lat', 'lon'}] in one grouped query."""
+    from core.models import ProjectWeatherLocation
+    qs = queryset if queryset is not None else ProjectWeatherLocation.objects.all()
+    return list(
+        qs.exclude(geohash='')
+        .annotate(cell=Substr('geohash', 1, precision))
+        .values('cell')
+        .annotate(count=Count('id'), lat=Avg('lat'), lon=Avg('lon'))
+        .order_by('cell')
+    )
+
+
+def weather_cell(lat, lon):
+    """Grid cell whose forecast a site shares."""
+    return encode(lat, lon, WEATHER_CELL_PRECISION)
@@ -0,0 +1,175 @@
+"""
+Shared geocode cache. Addresses are normalized to a key from (city, state, country); one GeocodeCache
+row per key serves every project at that location for GEOCODE_CACHE_TTL_DAYS. A project's
+ProjectWeatherLocation records the key it was resolved from, so the upstream geocoder is only called
+when the address actually changes (Project saves with a new address also drop the stale location).
+Failed lookups are cached too (status set, no coordinates): addresses the API can't place for
+GEOCODE_NOT_FOUND_TTL_HOURS, upstream errors for GEOCODE_FAILURE_TTL_MINUTES.
+"""
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+US_STATES = {
+    'alabama': 'al', 'alaska': 'ak', 'arizona': 'az', 'arkansas': 'ar', 'california': 'ca', 'colorado': 'co',
+    'connecticut': 'ct', 'delaware': 'de', 'district of columbia': 'dc', 'florida': 'fl', 'georgia': 'ga',
+    'hawaii': 'hi', 'idaho': 'id', 'illinois': 'il', 'indiana': 'in', 'iowa': 'ia', 'kansas': 'ks',
+    'kentucky': 'ky', 'louisiana': 'la', 'maine': 'me', 'maryland': 'md', 'massachusetts': 'ma',
+    'michigan': 'mi', 'minnesota': 'mn', 'mississippi': 'ms', 'missouri': 'mo', 'montana': 'mt',
+    'nebraska': 'ne', 'nevada': 'nv', 'new hampshire': 'nh', 'new jersey': 'nj', 'new mexico': 'nm',
+    'new york': 'ny', 'north carolina': 'nc', 'north dakota': 'nd', 'ohio': 'oh', 'oklahoma': 'ok',
+    'oregon': 'or', 'pennsylvania': 'pa', 'rhode island': 'ri', 'south carolina': 'sc', 'south dakota': 'sd',
+    'tennessee': 'tn', 'texas': 'tx', 'utah': 'ut', 'vermont': 'vt', 'virginia': 'va', 'washington': 'wa',
+    'west virginia': 'wv', 'wisconsin': 'wi', 'wyoming': 'wy',
+}
+_COUNTRY_ALIASES = {'': 'us', 'usa': 'us', 'united states': 'us', 'united states of america': 'us'}
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+ADDRESS_FIELDS = ('city', 'state', 'country')
+
+# GeocodeCache.status
+FOUND = ''
+NOT_FOUND = 'not_found'
+FAILED = 'failed'
+
+
+def get_ttl():
+    return timedelta(days=getattr(settings, 'GEOCODE_CACHE_TTL_DAYS', 90))
+
+
+def get_negative_ttl(status):
+    """How long a failed lookup is remembered: addresses the API can't place for a day, upstream errors briefly."""
+    if status == NOT_FOUND:
+        return timedelta(hours=getattr(settings, 'GEOCODE_NOT_FOUND_TTL_HOURS', 24))
+    return timedelta(minutes=getattr(settings, 'GEOCODE_FAILURE_TTL_MINUTES', 15))
+
+
+def _clean(value):
+    return _NON_WORD.sub(' ', (value or '').lower()).strip()
+
+
+def address_key(city, state, country=''):
+    """Normalized 'city|state|country' key; '' when there is no city or state to geocode."""
+    city, state, country = _clean(city), _clean(state), _clean(country)
+    if not city and not state:
+        return ''
+    country = _COUNTRY_ALIASES.get(country, country)
+    if country == 'us':
+        state = US_STATES.get(state, state)
+    return f'{city}|{state}|{country}'
+
+
+def project_address_key(project):
+    return address_key(*(getattr(project, f, '') for f in ADDRESS_FIELDS))
+
+
+def project_has_address(project):
+    """True when the project has a city or state to geocode; projects without one have no weather."""
+    return bool((getattr(project, 'city', None) or '').strip() or (getattr(project, 'state', None) or '').strip())
+
+
+def forget_locations(*project_ids):
+    """Drop the stored lat/lon and forecast of projects whose address changed; the next refresh re-resolves them."""
+    from core.models import ProjectWeatherCache, ProjectWeatherLocation
+    if not project_ids:
+        return
+    ProjectWeatherLocation.objects.filter(project_id__in=project_ids).delete()
+    ProjectWeatherCache.objects.filter(project_id__in=project_ids).delete()
+
+
+def cached_coordinates(keys, now=None):
+    """{key: (lat, lon)} for keys with a GeocodeCache row younger than the TTL."""
+    from core.models import GeocodeCache
+    since = (now or timezone.now()) - get_ttl()
+    rows = GeocodeCache.objects.filter(key__in=set(keys), fetched_at__gte=since, status=FOUND)
+    return {row.key: (row.lat, row.lon) for row in rows.only('key', 'lat', 'lon')}
+
+
+def failed_keys(keys, now=None):
+    """Keys whose last lookup failed recently enough that they should not be retried yet."""
+    from core.models import GeocodeCache
+    now = now or timezone.now()
+    longest = max(get_negative_ttl(NOT_FOUND), get_negative_ttl(FAILED))
+    rows = (
+        GeocodeCache.objects.filter(key__in=set(keys), fetched_at__gte=now - longest)
+        .exclude(status=FOUND)
+        .values_list('key', 'status', 'fetched_at')
+    )
+    return {key for key, status, fetched_at in rows if fetched_at >= now - get_negative_ttl(status)}
+
+
+def store_coordinates(resolved, now=None):
+    """Upsert {key: (lat, lon)} into GeocodeCache in one statement."""
+    from core.models import GeocodeCache
+    if not resolved:
+        return
+    now = now or timezone.now()
+    GeocodeCache.objects.bulk_create(
+        [
+            GeocodeCache(key=key, lat=Decimal(str(lat)), lon=Decimal(str(lon)), status=FOUND, source='open-meteo', fetched_at=now)
+            for key, (lat, lon) in resolved.items()
+        ],
+        batch_size=500, update_conflicts=True, unique_fields=['key'],
+        update_fields=['lat', 'lon', 'status', 'source', 'fetched_at'],
+    )
+
+
+def store_failures(failures, now=None):
+    """Upsert negative rows for {key: NOT_FOUND | FAILED} so the lookup isn't repeated until get_negative_ttl passes."""
+    from core.models import GeocodeCache
+    failures = {key: status for key, status in failures.items() if key}
+    if not failures:
+        return
+    now = now or timezone.now()
+    GeocodeCache.objects.bulk_create(
+        [
+            GeocodeCache(key=key, lat=None, lon=None, status=status, source='open-meteo', fetched_at=now)
+            for key, status in failures.items()
+        ],
+        batch_size=500, update_conflicts=True, unique_fields=['key'],
+        update_fields=['lat', 'lon', 'status', 'source', 'fetched_at'],
+    )
+
+
+def known_coordinates(projects):
+    """
+    {project_id: (lat, lon)} resolvable without the network: the project's own location if it was
+    resolved from the current address, else a fresh shared cache row. Two queries for any number of projects.
+    """
+    from core.models import ProjectWeatherLocation
+    projects = list(projects)
+    keys = {p.pk: project_address_key(p) for p in projects}
+    locations = ProjectWeatherLocation.objects.filter(project_id__in=list(keys)).only('project_id', 'lat', 'lon', 'address_key')
+    known = {
+        loc.project_id: (loc.lat, loc.lon)
+        for loc in locations
+        if loc.address_key and loc.address_key == keys.get(loc.project_id)
+    }
+    shared = cached_coordinates(k for pk, k in keys.items() if pk not in known and k)
+    for pk, key in keys.items():
+        if pk not in known and key in shared:
+            known[pk] = shared[key]
+    return known
+
+
+def resolve_project(project, geocoder):
+    """
+    (lat, lon) for one project, calling geocoder(city, state) -> (lat, lon, status) only when neither
+    its location nor the shared cache covers the current address and it hasn't failed recently.
+    Returns (None, None) if the address can't be geocoded.
+    """
+    known = known_coordinates([project]).get(project.pk)
+    if known:
+        return float(known[0]), float(known[1])
+    key = project_address_key(project)
+    if key in failed_keys([key]):
+        return None, None
+    lat, lon, status = geocoder((project.city or '').strip(), (project.state or '').strip())
+    if lat is not None and lon is not None:
+        store_coordinates({key: (lat, lon)})
+    else:
+        store_failures({key: status})
+    return lat, lon
@@ -0,0 +1,135 @@
+"""
+Database-backed background jobs. Views enqueue(); `manage.py run_jobs` claims and runs them.
+Handlers are registered per kind with @register('kind') and receive (job, payload); they call
+job_progress() as they go so status pages can poll /jobs/<id>/.
+Workers record a WorkerHeartbeat on every poll, so views can tell (worker_running()) whether a queued
+job will actually be picked up and say so when it won't (or, where configured, run it inline with run_now()).
+"""
+import json
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import BackgroundJob, WorkerHeartbeat
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def register(kind):
+    """Decorator: handle jobs of this kind."""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, key='', user=None):
+    """
+    Queue a job, or return the queued/running job with the same (kind, key) if there is one.
+    Returns (job, created).
+    """
+    with transaction.atomic():
+        if key:
+            existing = BackgroundJob.objects.filter(
+                kind=kind, key=key, status__in=BackgroundJob.ACTIVE_STATUSES
+            ).first()
+            if existing:
+                return existing, False
+        job = BackgroundJob.objects.create(
+            kind=kind,
+            key=key,
+            payload_json=json.dumps(payload or {}),
+            created_by=user,
+        )
+    return job, True
+
+
+def job_progress(job, done=None, total=None, message=None):
+    """Record progress in its own short UPDATE (visible to pollers while the job keeps running)."""
+    values = {}
+    if done is not None:
+        job.progress_done = values['progress_done'] = done
+    if total is not None:
+        job.progress_total = values['progress_total'] = total
+    if message is not None:
+        job.message = values['message'] = message
+    if values:
+        BackgroundJob.objects.filter(pk=job.pk).update(**values)
+
+
+def get_worker_timeout():
+    return timedelta(seconds=getattr(settings, 'JOBS_WORKER_TIMEOUT_SECONDS', 120))
+
+
+def heartbeat(name=None):
+    """Record that a worker (default: this host and process) is polling the queue now."""
+    name = name or f'{socket.gethostname()}:{os.getpid()}'
+    now = timezone.now()
+    WorkerHeartbeat.objects.update_or_create(name=name, defaults={'seen_at': now})
+    # Every worker process gets its own row; forget long-gone ones
+    WorkerHeartbeat.objects.filter(seen_at__lt=now - timedelta(days=7)).delete()
+
+
+def worker_running():
+    """True if some run_jobs worker has polled within JOBS_WORKER_TIMEOUT_SECONDS."""
+    return WorkerHeartbeat.objects.filter(seen_at__gte=timezone.now() - get_worker_timeout()).exists()
+
+
+def _claim(job):
+    """Atomically move this queued job to running; False if another runner got it first."""
+    claimed = BackgroundJob.objects.filter(pk=job.pk, status=BackgroundJob.STATUS_QUEUED).update(
+        status=BackgroundJob.STATUS_RUNNING, started_at=timezone.now()
+    )
+    if claimed:
+        job.refresh_from_db()
+    return bool(claimed)
+
+
+def _claim_next():
+    """Atomically move the oldest queued job to running; None if the queue is empty."""
+    for job in BackgroundJob.objects.filter(status=BackgroundJob.STATUS_QUEUED).order_by('created_at', 'id')[:5]:
+        if _claim(job):
+            return job
+    return None
+
+
+def run_job(job):
+    """Run one claimed job and record done/failed."""
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job kind "{job.kind}".')
+        handler(job, json.loads(job.payload_json or '{}'))
+    except Exception as e:
+        logger.exception('Background job %s failed', job.pk)
+        status, message = BackgroundJob.STATUS_FAILED, str(e) or e.__class__.__name__
+    else:
+        status, message = BackgroundJob.STATUS_DONE, job.message
+    BackgroundJob.objects.filter(pk=job.pk).update(status=status, message=message, finished_at=timezone.now())
+    job.status, job.message = status, message
+    return job
+
+
+def run_now(job):
+    """Run a queued job in this process (when no worker is running). Returns the job, or None if it was already claimed."""
+    if not _claim(job):
+        return None
+    return run_job(job)
+
+
+def run_pending(limit=None):
+    """Run queued jobs until the queue is empty (or limit jobs ran). Returns the jobs run."""
+    ran = []
+    while limit is None or len(ran) < limit:
+        job = _claim_next()
+        if job is None:
+            break
+        ran.append(run_job(job))
+    return ran
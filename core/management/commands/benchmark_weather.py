@@ -0,0 +1,76 @@
+"""
+Measure weather refresh throughput offline against core.fake_openmeteo, whose URL is passed straight
+to refresh_projects. Synthetic BENCH- projects are created up front and each pass commits as a normal
+refresh would (no long-held write lock); they and their weather/geocode rows are deleted afterwards.
+Usage: python manage.py benchmark_weather
+       python manage.py benchmark_weather --projects 500 --cities 100 --latency 0.05 --concurrency 1,8,16
+       python manage.py benchmark_weather --error-rate 0.2
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import upstream
+from core.fake_openmeteo import FakeOpenMeteo
+from core.models import GeocodeCache, ProjectWeatherCache, ProjectWeatherLocation
+from core.weather_refresh import refresh_projects
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Benchmark refresh_projects against a local fake Open-Meteo server.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=200, help='Synthetic projects (default 200).')
+        parser.add_argument('--cities', type=int, default=50, help='Distinct addresses among them (default 50).')
+        parser.add_argument('--latency', type=float, default=0.05, help='Fake upstream seconds per request (default 0.05).')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of upstream requests that fail.')
+        parser.add_argument('--concurrency', type=str, default='1,8', help='Comma-separated worker counts to compare.')
+        parser.add_argument('--rate', type=float, default=0, help='Requests per second per host (default 0 = unlimited).')
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(n) for n in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError('--concurrency must be comma-separated integers, e.g. 1,8,16')
+        if Project.all_objects.filter(project_number__startswith='BENCH-').exists():
+            raise CommandError('BENCH- projects already exist; remove them before benchmarking.')
+        with FakeOpenMeteo(latency=options['latency'], error_rate=options['error_rate']) as server:
+            projects = self._create_projects(options['projects'], max(1, options['cities']))
+            try:
+                for concurrency in levels:
+                    self._clear(projects)
+                    server.reset()
+                    upstream.client.breaker.reset()
+                    upstream.client.metrics.reset()
+                    started = time.monotonic()
+                    result = refresh_projects(projects, concurrency=concurrency, rate_per_host=options['rate'],
+                                              base_url=server.url)
+                    seconds = time.monotonic() - started
+                    self.stdout.write(
+                        f'concurrency={concurrency}: {len(result["refreshed"])}/{len(projects)} refreshed in {seconds:.2f}s '
+                        f'({len(projects) / seconds:.0f} projects/s); upstream requests: {len(server.calls)} '
+                        f'({result["geocoded"]} geocode, {result["forecast_requests"]} forecast), '
+                        f'errors: {server.errors}, connections: {len(server.connections)}'
+                    )
+                    for line in upstream.format_metrics(upstream.client.metrics.snapshot()):
+                        self.stdout.write(f'  {line}')
+            finally:
+                self._clear(projects)
+                # Cascades take the projects' health and forecast history rows with them
+                Project.all_objects.filter(pk__in=[p.pk for p in projects]).delete()
+
+    def _create_projects(self, count, cities):
+        Project.objects.bulk_create([
+            Project(project_number=f'BENCH-{i}', name=f'Benchmark {i}', client='Benchmark', pm='Benchmark',
+                    city=f'Bench City {i % cities}', state='NV', status=Project.STATUS_ACTIVE)
+            for i in range(count)
+        ])
+        return list(Project.objects.filter(project_number__startswith='BENCH-'))
+
+    def _clear(self, projects):
+        """Forget coordinates and forecasts so every pass does the full geocode + forecast work."""
+        ids = [p.pk for p in projects]
+        ProjectWeatherLocation.objects.filter(project_id__in=ids).delete()
+        ProjectWeatherCache.objects.filter(project_id__in=ids).delete()
+        GeocodeCache.objects.filter(key__startswith='bench city ').delete()
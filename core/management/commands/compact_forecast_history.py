@@ -0,0 +1,18 @@
+"""
+Thin forecast history older than WEATHER_HISTORY_HOURLY_DAYS to the last forecast issued each day
+(core.forecast_history). Run daily.
+Usage: python manage.py compact_forecast_history
+"""
+from django.core.management.base import BaseCommand
+
+from core.forecast_history import compact, get_hourly_days
+
+
+class Command(BaseCommand):
+    help = 'Keep one forecast per project per day for history older than the full-resolution window.'
+
+    def handle(self, *args, **options):
+        deleted = compact()
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {deleted} intra-day forecast(s) older than {get_hourly_days()} days.'
+        ))
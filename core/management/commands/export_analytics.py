@@ -0,0 +1,29 @@
+"""
+Write columnar snapshots of time entries, work items and projects for analysis.
+Parquet when pyarrow is installed, otherwise NumPy .npz; later runs append only new/changed rows.
+Usage: python manage.py export_analytics --output /path/to/analytics
+       python manage.py export_analytics --output /path/to/analytics --full --format npz
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.analytics_export import FORMAT_NPZ, FORMAT_PARQUET, TABLES, export_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Export typed, dictionary-encoded snapshots of time/task/project data (incremental by default).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='analytics', help='Output directory (default: ./analytics).')
+        parser.add_argument('--format', choices=[FORMAT_PARQUET, FORMAT_NPZ], default=None,
+                            help='File format (default: parquet if pyarrow is installed, else npz).')
+        parser.add_argument('--full', action='store_true', help='Ignore the manifest and export every row.')
+        parser.add_argument('--table', action='append', choices=list(TABLES), help='Export only this table (repeatable).')
+
+    def handle(self, *args, **options):
+        try:
+            counts = export_snapshot(options['output'], fmt=options['format'], full=options['full'], tables=options['table'])
+        except ImportError as e:
+            raise CommandError(str(e))
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count} row{"" if count == 1 else "s"}')
+        self.stdout.write(self.style.SUCCESS(f'Snapshot written to {options["output"]}.'))
@@ -0,0 +1,32 @@
+"""
+Create/update projects from a CSV master list keyed on project_number (idempotent; reruns change nothing).
+Columns: project_number plus any of name, address_line1, address_line2, city, state, zip_code, country,
+client, pm, status, notes. Columns not in the file are left unchanged.
+Usage: python manage.py import_projects projects.csv
+       python manage.py import_projects projects.csv --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.importer import import_projects
+
+
+class Command(BaseCommand):
+    help = 'Import or sync projects from a CSV file keyed on project_number.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file (UTF-8, header row required).')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                result = import_projects(f, dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(str(e))
+        for err in result['errors']:
+            self.stderr.write(err)
+        prefix = 'Dry run: ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{result['created']} created, {result['updated']} updated, "
+            f"{result['unchanged']} unchanged, {len(result['errors'])} error(s)."
+        ))
@@ -0,0 +1,33 @@
+"""
+Reclassify overtime hours for time entries (daily/weekly thresholds from settings).
+Usage: python manage.py recompute_overtime
+       python manage.py recompute_overtime --from 2025-01-01 --to 2025-03-31
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from time_tracking.models import TimeEntry
+from time_tracking.overtime import classify_overtime
+
+
+class Command(BaseCommand):
+    help = 'Recompute overtime_hours on time entries for a date range (default: all entries).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', default='', help='First date (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='date_to', default='', help='Last date (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        bounds = TimeEntry.objects.aggregate(first=Min('date'), last=Max('date'))
+        if bounds['first'] is None:
+            self.stdout.write(self.style.SUCCESS('No time entries.'))
+            return
+        try:
+            start = date.fromisoformat(options['date_from']) if options['date_from'] else bounds['first']
+            end = date.fromisoformat(options['date_to']) if options['date_to'] else bounds['last']
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        updated = classify_overtime(start, end)
+        self.stdout.write(self.style.SUCCESS(f'Reclassified {updated} time entr{"y" if updated == 1 else "ies"} ({start} to {end}).'))
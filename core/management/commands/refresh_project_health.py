@@ -0,0 +1,15 @@
+"""
+Recompute ProjectHealth for every project. Run daily: overdue counts and hour-burn windows move with the date.
+Usage: python manage.py refresh_project_health
+"""
+from django.core.management.base import BaseCommand
+
+from projects.health import refresh_all
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed health score for all projects.'
+
+    def handle(self, *args, **options):
+        count = refresh_all()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed health for {count} project(s).'))
@@ -1,12 +1,16 @@
 """
 Refresh weather cache for active projects (geocode + fetch 7-day forecast).
-Uses get_forecast_for_project with force_refresh=True (Open-Meteo, precipitation_probability_max).
+Fetches run concurrently (core.weather_refresh) with a per-host rate limit; sites in the same grid cell
+share one forecast fetch, and results are written in bulk at the end. Per-host call latency and errors
+are printed afterwards.
 Usage: python manage.py refresh_weather
        python manage.py refresh_weather --project_id 1
+       python manage.py refresh_weather --concurrency 16 --rate 20
 """
 from django.core.management.base import BaseCommand
 from projects.models import Project
-from core.weather_utils import get_forecast_for_project
+from core import upstream
+from core.weather_refresh import get_concurrency, get_rate_per_host, refresh_projects
 
 
 class Command(BaseCommand):
@@ -14,14 +18,25 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--project_id', type=str, default='', help='Refresh only this project ID.')
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help=f'Parallel fetches (default WEATHER_REFRESH_CONCURRENCY={get_concurrency()}).')
+        parser.add_argument('--rate', type=float, default=None,
+                            help=f'Requests per second per host (default WEATHER_RATE_LIMIT_PER_HOST={get_rate_per_host()}).')
 
     def handle(self, *args, **options):
         qs = Project.objects.filter(status=Project.STATUS_ACTIVE)
         if options.get('project_id'):
             qs = qs.filter(pk=options['project_id'])
-        for project in qs:
-            result = get_forecast_for_project(project, force_refresh=True)
-            if result:
-                self.stdout.write(f'Cached: {project.project_number}')
-            else:
-                self.stdout.write(f'Skipped (no address) or failed: {project.project_number}')
+        projects = {p.pk: p for p in qs}
+        upstream.client.metrics.reset()
+        result = refresh_projects(projects.values(), concurrency=options['concurrency'], rate_per_host=options['rate'])
+        for pk in result['refreshed']:
+            self.stdout.write(f'Cached: {projects[pk].project_number}')
+        for pk in result['skipped'] + result['failed']:
+            self.stdout.write(f'Skipped (no address) or failed: {projects[pk].project_number}')
+        self.stdout.write(
+            f'Addresses geocoded: {result["geocoded"]}; forecast cells: {result["cells"]} '
+            f'in {result["forecast_requests"]} request(s)'
+        )
+        for line in upstream.format_metrics(upstream.client.metrics.snapshot()):
+            self.stdout.write(line)
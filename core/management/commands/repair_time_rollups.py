@@ -0,0 +1,18 @@
+"""
+Recompute denormalized time totals (WorkItem.logged_hours / last_logged_at,
+Project.total_hours / hours_this_week) from time entries.
+Usage: python manage.py repair_time_rollups
+"""
+from django.core.management.base import BaseCommand
+
+from time_tracking.rollups import repair_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute logged hours on work items and hour totals on projects from time entries.'
+
+    def handle(self, *args, **options):
+        fixed = repair_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired {fixed["work_items"]} work item(s) and {fixed["projects"]} project(s).'
+        ))
@@ -0,0 +1,30 @@
+"""
+Run queued background jobs (project deletion, weather refresh). Schedule it as an always-on task, or run
+with --once from cron; see README "Background jobs". Each poll records a heartbeat, which tells the web
+app a worker is running (otherwise the weather pages say none is running).
+Usage: python manage.py run_jobs
+       python manage.py run_jobs --once
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import heartbeat, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs; polls for new ones unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls (default 5).')
+
+    def handle(self, *args, **options):
+        while True:
+            heartbeat()
+            for job in run_pending():
+                style = self.style.SUCCESS if job.status == job.STATUS_DONE else self.style.ERROR
+                self.stdout.write(style(f'{job.kind} #{job.pk}: {job.status}. {job.message}'))
+            if options['once']:
+                return
+            time.sleep(options['interval'])
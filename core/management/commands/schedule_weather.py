@@ -0,0 +1,38 @@
+"""
+Keep weather caches fresh by staleness instead of refreshing everything (core.weather_schedule).
+Run as an always-on task, or with --once from cron; the call budget is stored in the database, so
+separate --once runs share it.
+Usage: python manage.py schedule_weather
+       python manage.py schedule_weather --once
+       python manage.py schedule_weather --budget 300 --burst 30
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.weather_schedule import get_burst, get_calls_per_hour, run_once
+
+
+class Command(BaseCommand):
+    help = 'Refresh the most stale project forecasts within an upstream call budget.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run one pass and exit.')
+        parser.add_argument('--interval', type=float, default=60.0, help='Seconds between passes (default 60).')
+        parser.add_argument('--budget', type=float, default=None,
+                            help=f'Upstream calls per hour (default WEATHER_SCHEDULE_CALLS_PER_HOUR={get_calls_per_hour()}).')
+        parser.add_argument('--burst', type=int, default=None,
+                            help=f'Most calls in one pass (default WEATHER_SCHEDULE_BURST={get_burst()}).')
+        parser.add_argument('--concurrency', type=int, default=None, help='Parallel fetches per pass.')
+
+    def handle(self, *args, **options):
+        while True:
+            summary = run_once(concurrency=options['concurrency'], calls_per_hour=options['budget'], burst=options['burst'])
+            if summary['due'] or options['once']:
+                self.stdout.write(
+                    f'Due: {summary["due"]}; refreshed {len(summary["refreshed"])}, failed {len(summary["failed"])}, '
+                    f'deferred {summary["deferred"]}; upstream calls: {summary["calls"]}'
+                )
+            if options['once']:
+                return
+            time.sleep(max(options['interval'], min(summary['retry_after'], 3600)))
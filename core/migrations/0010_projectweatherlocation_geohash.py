@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:38
+
+from django.db import migrations, models
+
+# Frozen copy of core.geo.encode so later changes to the app module can't alter this migration
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+
+def encode(lat, lon, precision=GEOHASH_PRECISION):
+    lat, lon = float(lat), float(lon)
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            bit = lon >= mid
+            lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            bit = lat >= mid
+            lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+        value = (value << 1) | bit
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def backfill_geohash(apps, schema_editor):
+    ProjectWeatherLocation = apps.get_model('core', 'ProjectWeatherLocation')
+    rows = list(ProjectWeatherLocation.objects.only('id', 'lat', 'lon'))
+    for row in rows:
+        row.geohash = encode(row.lat, row.lon)
+    ProjectWeatherLocation.objects.bulk_update(rows, ['geohash'], batch_size=500)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectweatherlocation',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, noop),
+    ]
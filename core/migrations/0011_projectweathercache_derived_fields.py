@@ -0,0 +1,130 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:43
+
+import json
+
+from django.db import migrations, models
+
+# Frozen copy of the core.weather_utils.Forecast logic as of this migration, so later changes to the
+# app module can't alter (or break) the historical backfill
+PROB_KEYS = ('precipitation_probability_max', 'precipitation_probability', 'precip_prob', 'pop')
+RAIN_WEATHERCODES = {61, 63, 65, 80, 81, 82, 95, 96, 99}
+
+
+def _precip_sum_to_prob(mm):
+    if mm >= 10:
+        return 85
+    if mm >= 5:
+        return 60
+    if mm >= 2:
+        return 40
+    if mm >= 0.5:
+        return 20
+    return 0
+
+
+def _day_prob(daily, i):
+    for key in PROB_KEYS:
+        arr = daily.get(key)
+        if isinstance(arr, list) and i < len(arr) and arr[i] is not None:
+            try:
+                return min(100, max(0, int(float(arr[i]))))
+            except (TypeError, ValueError):
+                pass
+    precips = daily.get('precipitation_sum') or []
+    if i < len(precips):
+        try:
+            return _precip_sum_to_prob(float(precips[i]))
+        except (TypeError, ValueError):
+            pass
+    codes = daily.get('weathercode') or []
+    if i < len(codes):
+        try:
+            if int(codes[i]) in RAIN_WEATHERCODES:
+                return 60
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def _risk_level(max_prob):
+    if max_prob is None:
+        return 'UNKNOWN'
+    if max_prob >= 50:
+        return 'HIGH'
+    if max_prob >= 30:
+        return 'MODERATE'
+    if max_prob >= 10:
+        return 'LOW'
+    return 'CLEAR'
+
+
+def _daily(forecast_json):
+    try:
+        data = json.loads(forecast_json)
+    except json.JSONDecodeError:
+        return {}
+    return (data.get('daily') if isinstance(data, dict) else None) or {}
+
+
+def backfill_derived_fields(apps, schema_editor):
+    ProjectWeatherCache = apps.get_model('core', 'ProjectWeatherCache')
+    rows = list(ProjectWeatherCache.objects.exclude(forecast_json=''))
+    for row in rows:
+        daily = _daily(row.forecast_json)
+        n_days = len(daily.get('time') or ())
+        preview = [_day_prob(daily, i) for i in range(min(7, n_days))]
+        known = [p for p in preview if p is not None]
+        row.max_precip_prob = max(known) if known else None
+        row.risk_level = _risk_level(row.max_precip_prob)
+        row.today_precip_prob = _day_prob(daily, 0)
+        row.today_temp = None
+        temps = daily.get('temperature_2m_max') or []
+        if n_days and temps:
+            try:
+                row.today_temp = float(temps[0])
+            except (TypeError, ValueError):
+                pass
+        row.preview_probs = preview
+    ProjectWeatherCache.objects.bulk_update(
+        rows, ['risk_level', 'max_precip_prob', 'today_precip_prob', 'today_temp', 'preview_probs'], batch_size=500
+    )
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_projectweatherlocation_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectweathercache',
+            name='max_precip_prob',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='projectweathercache',
+            name='preview_probs',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='projectweathercache',
+            name='risk_level',
+            field=models.CharField(db_index=True, default='UNKNOWN', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='projectweathercache',
+            name='today_precip_prob',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='projectweathercache',
+            name='today_temp',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_derived_fields, noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:48
+
+import re
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of core.geocoding.address_key as of this migration, so later changes to the app module
+# can't alter (or break) the historical backfill
+US_STATES = {
+    'alabama': 'al', 'alaska': 'ak', 'arizona': 'az', 'arkansas': 'ar', 'california': 'ca', 'colorado': 'co',
+    'connecticut': 'ct', 'delaware': 'de', 'district of columbia': 'dc', 'florida': 'fl', 'georgia': 'ga',
+    'hawaii': 'hi', 'idaho': 'id', 'illinois': 'il', 'indiana': 'in', 'iowa': 'ia', 'kansas': 'ks',
+    'kentucky': 'ky', 'louisiana': 'la', 'maine': 'me', 'maryland': 'md', 'massachusetts': 'ma',
+    'michigan': 'mi', 'minnesota': 'mn', 'mississippi': 'ms', 'missouri': 'mo', 'montana': 'mt',
+    'nebraska': 'ne', 'nevada': 'nv', 'new hampshire': 'nh', 'new jersey': 'nj', 'new mexico': 'nm',
+    'new york': 'ny', 'north carolina': 'nc', 'north dakota': 'nd', 'ohio': 'oh', 'oklahoma': 'ok',
+    'oregon': 'or', 'pennsylvania': 'pa', 'rhode island': 'ri', 'south carolina': 'sc', 'south dakota': 'sd',
+    'tennessee': 'tn', 'texas': 'tx', 'utah': 'ut', 'vermont': 'vt', 'virginia': 'va', 'washington': 'wa',
+    'west virginia': 'wv', 'wisconsin': 'wi', 'wyoming': 'wy',
+}
+_COUNTRY_ALIASES = {'': 'us', 'usa': 'us', 'united states': 'us', 'united states of america': 'us'}
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def _clean(value):
+    return _NON_WORD.sub(' ', (value or '').lower()).strip()
+
+
+def address_key(city, state, country=''):
+    city, state, country = _clean(city), _clean(state), _clean(country)
+    if not city and not state:
+        return ''
+    country = _COUNTRY_ALIASES.get(country, country)
+    if country == 'us':
+        state = US_STATES.get(state, state)
+    return f'{city}|{state}|{country}'
+
+
+def backfill_address_keys(apps, schema_editor):
+    """Existing locations keep their coordinates; the first location per address seeds the shared cache."""
+    ProjectWeatherLocation = apps.get_model('core', 'ProjectWeatherLocation')
+    GeocodeCache = apps.get_model('core', 'GeocodeCache')
+    rows = list(ProjectWeatherLocation.objects.select_related('project').order_by('-updated_at'))
+    seeds = {}
+    for row in rows:
+        row.address_key = address_key(row.project.city, row.project.state, row.project.country)
+        if row.address_key and row.address_key not in seeds:
+            seeds[row.address_key] = GeocodeCache(
+                key=row.address_key, lat=row.lat, lon=row.lon, source=row.geocode_source, fetched_at=timezone.now()
+            )
+    ProjectWeatherLocation.objects.bulk_update(rows, ['address_key'], batch_size=500)
+    GeocodeCache.objects.bulk_create(seeds.values(), batch_size=500)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_projectweathercache_derived_fields'),
+        ('projects', '0008_projecthealth'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=300, unique=True)),
+                ('lat', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('lon', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('source', models.CharField(blank=True, max_length=100)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'core_geocodecache',
+            },
+        ),
+        migrations.AddField(
+            model_name='projectweatherlocation',
+            name='address_key',
+            field=models.CharField(blank=True, max_length=300),
+        ),
+        migrations.RunPython(backfill_address_keys, noop),
+    ]
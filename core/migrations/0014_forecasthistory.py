@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_projecthealth'),
+        ('core', '0013_geocodecache_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fetched_at', models.DateTimeField()),
+                ('first_date', models.DateField()),
+                ('precip_prob', models.BinaryField()),
+                ('temp_max', models.BinaryField()),
+                ('temp_min', models.BinaryField()),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_history', to='projects.project')),
+            ],
+            options={
+                'db_table': 'core_forecasthistory',
+                'indexes': [models.Index(fields=['project', 'first_date', 'fetched_at'], name='core_foreca_project_e903e1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_forecasthistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('seen_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'core_workerheartbeat',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_workerheartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UpstreamBudget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('tokens', models.FloatField()),
+                ('refilled_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'core_upstreambudget',
+            },
+        ),
+    ]
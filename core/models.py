@@ -189,12 +189,41 @@ class ProjectWeatherLocation(models.Model):
     )
     lat = models.DecimalField(max_digits=9, decimal_places=6)
     lon = models.DecimalField(max_digits=9, decimal_places=6)
+    # Set from lat/lon on save; prefixes are grid cells for spatial lookups (core.geo)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+    # Normalized address this lat/lon was resolved from (core.geocoding.address_key)
+    address_key = models.CharField(max_length=300, blank=True)
     geocode_source = models.CharField(max_length=100, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'core_projectweatherlocation'
 
+    def save(self, *args, **kwargs):
+        from core.geo import encode
+        self.geohash = encode(self.lat, self.lon)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ('lat' in update_fields or 'lon' in update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
+
+class GeocodeCache(models.Model):
+    """Geocoded lat/lon per normalized address, shared by every project at that address."""
+    key = models.CharField(max_length=300, unique=True)
+    lat = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    lon = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    # '' = resolved; 'not_found' / 'failed' = negative entry with no coordinates (core.geocoding)
+    status = models.CharField(max_length=10, blank=True, default='')
+    source = models.CharField(max_length=100, blank=True)
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'core_geocodecache'
+
+    def __str__(self):
+        return self.key
+
 
 class ProjectWeatherCache(models.Model):
     """Cached 7-day forecast for a project."""
@@ -205,6 +234,135 @@ class ProjectWeatherCache(models.Model):
     )
     forecast_json = models.TextField(blank=True)
     fetched_at = models.DateTimeField(null=True, blank=True)
+    # Derived from forecast_json on save so list views can filter/sort without parsing it
+    risk_level = models.CharField(max_length=10, default='UNKNOWN', db_index=True)
+    max_precip_prob = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True)
+    today_precip_prob = models.PositiveSmallIntegerField(null=True, blank=True)
+    today_temp = models.FloatField(null=True, blank=True)
+    preview_probs = models.JSONField(default=list, blank=True)
 
     class Meta:
         db_table = 'core_projectweathercache'
+
+    DERIVED_FIELDS = ('risk_level', 'max_precip_prob', 'today_precip_prob', 'today_temp', 'preview_probs')
+
+    def set_derived_fields(self, forecast=None):
+        """Fill the derived columns from forecast (a weather_utils.Forecast) or by parsing forecast_json."""
+        from core.weather_utils import Forecast
+        forecast = forecast or Forecast.parse(self.forecast_json)
+        self.risk_level = forecast.risk_level()
+        self.max_precip_prob = forecast.max_precip_prob_7day()
+        self.today_precip_prob = forecast.daily_precip_prob(0)
+        self.today_temp = forecast.today_temp
+        self.preview_probs = forecast.preview(7)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'forecast_json' in update_fields:
+            self.set_derived_fields()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.DERIVED_FIELDS}
+        super().save(*args, **kwargs)
+
+
+class ForecastHistory(models.Model):
+    """
+    One fetched daily forecast series for a project, kept after the cache row is overwritten. Series are
+    packed array('f') BLOBs (4 bytes per day, NaN where missing); see core.forecast_history.
+    """
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.CASCADE,
+        related_name='forecast_history',
+    )
+    fetched_at = models.DateTimeField()
+    # Date of the first day in the series, i.e. the day the forecast was issued for
+    first_date = models.DateField()
+    precip_prob = models.BinaryField()
+    temp_max = models.BinaryField()
+    temp_min = models.BinaryField()
+
+    class Meta:
+        db_table = 'core_forecasthistory'
+        indexes = [models.Index(fields=['project', 'first_date', 'fetched_at'])]
+
+    def __str__(self):
+        return f'{self.project_id} @ {self.fetched_at:%Y-%m-%d %H:%M}'
+
+
+class BackgroundJob(models.Model):
+    """Queued work run outside the request by `manage.py run_jobs` (see core.jobs)."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    kind = models.CharField(max_length=50)
+    # De-duplication key: at most one queued/running job per (kind, key)
+    key = models.CharField(max_length=200, blank=True)
+    payload_json = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='background_jobs',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'core_backgroundjob'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='background_job_status_idx'),
+            models.Index(fields=['kind', 'key'], name='background_job_kind_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def percent(self):
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.progress_total:
+            return 0
+        return min(100, round(100 * self.progress_done / self.progress_total))
+
+
+class UpstreamBudget(models.Model):
+    """Persisted token bucket state (core.weather_schedule), so separate --once runs share one call budget."""
+    name = models.CharField(max_length=100, unique=True)
+    tokens = models.FloatField()
+    refilled_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'core_upstreambudget'
+
+    def __str__(self):
+        return f"{self.name}: {self.tokens:.1f}"
+
+
+class WorkerHeartbeat(models.Model):
+    """Last time each `manage.py run_jobs` worker polled the queue (see core.jobs.worker_running)."""
+    name = models.CharField(max_length=200, unique=True)
+    seen_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'core_workerheartbeat'
+
+    def __str__(self):
+        return f"{self.name} ({self.seen_at})"
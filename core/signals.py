@@ -2,10 +2,20 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.conf import settings
 
-from .models import Profile
+from .models import Profile, ProjectWeatherCache
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_profile_for_user(sender, instance, created, **kwargs):
     if created:
         Profile.objects.get_or_create(user=instance, defaults={'role': Profile.SCHEDULER})
+
+
+@receiver(post_save, sender=ProjectWeatherCache)
+def record_forecast_history(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep each fetched series before the next refresh overwrites it (bulk refreshes call record() directly)."""
+    if raw or not instance.fetched_at or (update_fields is not None and 'forecast_json' not in update_fields):
+        return
+    from core import forecast_history
+    from core.weather_utils import forecast_for
+    forecast_history.record({instance.project_id: forecast_for(instance)}, instance.fetched_at)
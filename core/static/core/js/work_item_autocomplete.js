@@ -0,0 +1,58 @@
+/**
+ * Work item picker: selects marked with data-autocomplete-url start with only the current choice.
+ * Typing in the search box fetches matching tasks (scoped to the selected project) and refills the options.
+ */
+(function () {
+  'use strict';
+
+  function init(select) {
+    var url = select.getAttribute('data-autocomplete-url');
+    var form = select.form;
+    var projectSelect = form ? form.querySelector('select[name="project"]') : null;
+    var search = document.createElement('input');
+    search.type = 'search';
+    search.className = 'form-control';
+    search.placeholder = 'Search tasks...';
+    search.style.marginBottom = '0.25rem';
+    select.parentNode.insertBefore(search, select);
+    var timer = null;
+
+    function fill(results) {
+      var current = select.value;
+      var keep = null;
+      for (var i = select.options.length - 1; i >= 0; i--) {
+        var opt = select.options[i];
+        if (opt.value === '') continue;
+        if (opt.value === current) { keep = opt; continue; }
+        select.remove(i);
+      }
+      results.forEach(function (r) {
+        if (keep && String(r.id) === keep.value) return;
+        var opt = document.createElement('option');
+        opt.value = r.id;
+        opt.textContent = r.text;
+        select.appendChild(opt);
+      });
+    }
+
+    function load() {
+      var params = new URLSearchParams({ q: search.value.trim() });
+      if (projectSelect && projectSelect.value) params.set('project', projectSelect.value);
+      fetch(url + '?' + params.toString(), { credentials: 'same-origin' })
+        .then(function (r) { return r.ok ? r.json() : { results: [] }; })
+        .then(function (data) { fill(data.results || []); })
+        .catch(function () {});
+    }
+
+    search.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(load, 200);
+    });
+    select.addEventListener('focus', function () {
+      if (select.options.length <= 2) load();
+    });
+    if (projectSelect) projectSelect.addEventListener('change', load);
+  }
+
+  document.querySelectorAll('select[data-autocomplete-url]').forEach(init);
+})();
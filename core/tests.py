@@ -203,3 +203,789 @@ class ScheduleEmailBuilderTest(TestCase):
         self.assertNotIn('cdnjs.cloudflare.com', content)
         self.assertNotIn('cdn.jsdelivr', content)
         self.assertNotIn('unpkg.com', content)
+
+
+class AnalyticsExportTest(TestCase):
+    """export_analytics writes typed npz parts and only appends new/changed rows on later runs."""
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.user = User.objects.create_user(username='a', password='p')
+        self.project = Project.objects.create(
+            project_number='PRJ-AX', name='AX', client='C', pm='PM', status=Project.STATUS_ACTIVE
+        )
+
+    def _export(self):
+        from io import StringIO
+        from django.core.management import call_command
+        call_command('export_analytics', output=self.tmp.name, format='npz', stdout=StringIO())
+
+    def _parts(self, table):
+        from core.analytics_export import load_npz, read_manifest
+        manifest = read_manifest(self.tmp.name)
+        return [load_npz(f'{self.tmp.name}/{p}') for p in manifest[table]['parts']]
+
+    def test_incremental_snapshots(self):
+        from work.models import WorkItem
+        import numpy as np
+        TimeEntry.objects.create(user=self.user, project=self.project, date=date(2025, 2, 10), hours=Decimal('3.5'))
+        item = WorkItem.objects.create(project=self.project, title='T')
+        self._export()
+        (entries,) = self._parts('time_entries')
+        self.assertEqual(entries['hours'].dtype, np.float64)
+        self.assertEqual(entries['date'].dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(list(entries['project_number']), ['PRJ-AX'])
+        self.assertTrue(entries['work_item_id.null'][0])
+
+        TimeEntry.objects.create(user=self.user, project=self.project, date=date(2025, 2, 11), hours=Decimal('1'))
+        item.title = 'T2'
+        item.save()
+        self._export()
+        entry_parts = self._parts('time_entries')
+        self.assertEqual([len(p['id']) for p in entry_parts], [1, 1])
+        work_parts = self._parts('work_items')
+        self.assertEqual(list(work_parts[-1]['title']), ['T2'])
+        # Logging time moved the project's rollups, so the project row is exported again
+        self.assertEqual(len(self._parts('projects')), 2)
+
+    def test_edits_and_bulk_updates_are_reexported(self):
+        from time_tracking.approvals import approve_week
+        entry = TimeEntry.objects.create(user=self.user, project=self.project, date=date(2025, 2, 10), hours=Decimal('3'))
+        self._export()
+        entry.hours = Decimal('4')
+        entry.save()
+        self._export()
+        self.assertEqual(list(self._parts('time_entries')[-1]['hours']), [4.0])
+        approve_week(self.user.pk, date(2025, 2, 10), self.user)
+        self.project.name = 'AX renamed'
+        self.project.save()
+        self._export()
+        self.assertEqual(list(self._parts('time_entries')[-1]['status']), [TimeEntry.STATUS_APPROVED])
+        self.assertEqual(list(self._parts('projects')[-1]['name']), ['AX renamed'])
+        self._export()
+        self.assertEqual(len(self._parts('time_entries')), 3)
+
+
+class BackgroundJobTest(TestCase):
+    """core.jobs de-duplicates active jobs and records failures."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='j', password='p')
+
+    def test_enqueue_dedupes_until_finished(self):
+        from core import jobs
+        from core.models import BackgroundJob
+        calls = []
+        jobs.register('test_noop')(lambda job, payload: calls.append(payload))
+        first, created = jobs.enqueue('test_noop', {'n': 1}, key='k')
+        second, created_again = jobs.enqueue('test_noop', {'n': 2}, key='k')
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, second.pk)
+        jobs.run_pending()
+        self.assertEqual(calls, [{'n': 1}])
+        _third, created = jobs.enqueue('test_noop', {'n': 3}, key='k')
+        self.assertTrue(created)
+        self.assertEqual(BackgroundJob.objects.filter(status=BackgroundJob.STATUS_DONE).count(), 1)
+
+    def test_failure_recorded_and_status_view_restricted(self):
+        from core import jobs
+        from core.models import BackgroundJob
+
+        def boom(job, payload):
+            raise ValueError('bad payload')
+        jobs.register('test_boom')(boom)
+        job, _created = jobs.enqueue('test_boom', user=self.user)
+        with self.assertLogs('core.jobs', level='ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.message), (BackgroundJob.STATUS_FAILED, 'bad payload'))
+        User.objects.create_user(username='other', password='p')
+        self.client.login(username='other', password='p')
+        self.assertEqual(self.client.get(reverse('job_status', kwargs={'pk': job.pk})).status_code, 403)
+        self.client.login(username='j', password='p')
+        self.assertTrue(self.client.get(reverse('job_status', kwargs={'pk': job.pk})).json()['finished'])
+
+
+class GeoIndexTest(TestCase):
+    """Geohash cells on ProjectWeatherLocation back radius/nearest lookups and forecast sharing."""
+
+    SITES = {
+        'LA': (34.052235, -118.243683),
+        'SM': (34.019454, -118.491191),
+        'PAS': (34.147785, -118.144516),
+        'SD': (32.715736, -117.161087),
+        'NY': (40.712776, -74.005974),
+    }
+
+    def setUp(self):
+        from core.models import ProjectWeatherLocation
+        self.locations = {}
+        for number, (lat, lon) in self.SITES.items():
+            project = Project.objects.create(project_number=number, name=number, client='C', pm='P')
+            self.locations[number] = ProjectWeatherLocation.objects.create(
+                project=project, lat=Decimal(str(lat)), lon=Decimal(str(lon))
+            )
+
+    def test_encode_and_saved_geohash(self):
+        from core import geo
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(len(geo.neighbours('u4pruyd')), 9)
+        loc = self.locations['LA']
+        self.assertEqual(loc.geohash, geo.encode(loc.lat, loc.lon))
+        loc.lat = Decimal('40.7')
+        loc.save(update_fields=['lat'])
+        loc.refresh_from_db()
+        self.assertEqual(loc.geohash, geo.encode('40.7', loc.lon))
+
+    def test_radius_and_nearest(self):
+        from core import geo
+        lat, lon = self.SITES['LA']
+        within = geo.locations_within(lat, lon, 20 * geo.KM_PER_MILE)
+        self.assertEqual([loc.project.project_number for _d, loc in within], ['LA', 'PAS', 'SM'])
+        nearest = geo.nearest_locations(lat, lon, k=4)
+        self.assertEqual([loc.project.project_number for _d, loc in nearest], ['LA', 'PAS', 'SM', 'SD'])
+        far = geo.nearest_locations(lat, lon, k=5)
+        self.assertEqual(far[-1][1].project.project_number, 'NY')
+        self.assertAlmostEqual(far[-1][0], 3936, delta=20)
+
+    def test_nearby_view_and_clusters(self):
+        from core import geo
+        User.objects.create_user(username='sched', password='pass')
+        self.client.login(username='sched', password='pass')
+        r = self.client.get(reverse('weather_nearby'), {'project_id': self.locations['LA'].project_id, 'miles': 20})
+        self.assertEqual([row['project_number'] for row in r.json()['results']], ['PAS', 'SM'])
+        r = self.client.get(reverse('weather_nearby'), {'lat': 32.7, 'lon': -117.2, 'k': 1})
+        self.assertEqual(r.json()['results'][0]['project_number'], 'SD')
+        self.assertEqual(self.client.get(reverse('weather_nearby'), {'lat': 'x'}).status_code, 400)
+        self.assertEqual(sum(c['count'] for c in geo.clusters(precision=2)), 5)
+        self.assertEqual(len(geo.clusters(precision=2)), 3)
+
+    def test_same_cell_forecast_shared(self):
+        from datetime import datetime, timezone as dt_timezone
+        from core.models import ProjectWeatherCache, ProjectWeatherLocation
+        from core.geo import weather_cell
+        from core.weather_utils import _fresh_cell_forecast
+        la = self.locations['LA']
+        neighbour = Project.objects.create(project_number='LA2', name='LA2', client='C', pm='P')
+        ProjectWeatherLocation.objects.create(project=neighbour, lat=la.lat + Decimal('0.001'), lon=la.lon)
+        fetched = datetime(2026, 1, 1, 12, tzinfo=dt_timezone.utc)
+        ProjectWeatherCache.objects.create(project=la.project, forecast_json='{"daily": {}}', fetched_at=fetched)
+        cell = weather_cell(la.lat, la.lon)
+        self.assertEqual(_fresh_cell_forecast(cell, fetched, neighbour.pk), '{"daily": {}}')
+        self.assertIsNone(_fresh_cell_forecast(cell, fetched + timedelta(minutes=1), neighbour.pk))
+        self.assertIsNone(_fresh_cell_forecast(weather_cell(*self.SITES['SD']), fetched, neighbour.pk))
+
+
+class ForecastParseTest(TestCase):
+    """Forecast parses forecast_json once; the module-level helpers keep their old results."""
+
+    DATA = {'daily': {
+        'time': ['2026-01-01', '2026-01-02', '2026-01-03', '2026-01-04'],
+        'precipitation_probability_max': [5, None, 'x', None],
+        'precipitation_sum': [0, 6.5, 0.1, None],
+        'weathercode': [0, 0, 0, 61],
+        'temperature_2m_max': [21.5, 19.0, None, 18.2],
+        'temperature_2m_min': [10.0, 9.5, 8.0, 7.0],
+    }}
+
+    def test_matches_helpers(self):
+        import json
+        from core.weather_utils import (
+            Forecast, get_daily_precip_prob, get_max_precip_prob_7day, get_risk_level, parse_forecast_days,
+        )
+        text = json.dumps(self.DATA)
+        forecast = Forecast.parse(text)
+        self.assertEqual(forecast.preview(), [5, 60, 0, 60])
+        self.assertEqual([get_daily_precip_prob(text, i) for i in range(4)], [5, 60, 0, 60])
+        self.assertIsNone(get_daily_precip_prob(text, 4))
+        self.assertEqual(get_max_precip_prob_7day(text), 60)
+        self.assertEqual(get_risk_level(text), 'HIGH')
+        days = parse_forecast_days(text)
+        self.assertEqual(days[0], {
+            'date': '2026-01-01', 'temp_max': 21.5, 'temp_min': 10.0, 'precip': 0.0, 'precip_prob': 5, 'wind': None,
+        })
+        self.assertIsNone(days[2]['temp_max'])
+        self.assertEqual(forecast.today_temp, 21.5)
+        for bad in (None, '', 'not json', '[]', '{"daily": {}}'):
+            self.assertEqual(get_risk_level(bad), 'UNKNOWN')
+            self.assertEqual(parse_forecast_days(bad), [])
+            self.assertIsNone(get_daily_precip_prob(bad, 0))
+
+    def test_memoized_per_fetch(self):
+        import json
+        from django.utils import timezone
+        from core.models import ProjectWeatherCache
+        from core.weather_utils import forecast_for
+        project = Project.objects.create(project_number='PRJ-FC', name='FC', client='C', pm='P')
+        cache = ProjectWeatherCache.objects.create(
+            project=project, forecast_json=json.dumps(self.DATA), fetched_at=timezone.now()
+        )
+        first = forecast_for(cache)
+        self.assertIs(forecast_for(ProjectWeatherCache.objects.get(pk=cache.pk)), first)
+        cache.fetched_at = timezone.now() + timedelta(seconds=1)
+        self.assertIsNot(forecast_for(cache), first)
+        self.assertEqual(forecast_for(None).risk_level(), 'UNKNOWN')
+
+
+class WeatherDerivedColumnsTest(TestCase):
+    """Risk and preview columns are written with the forecast; list views read them instead of the JSON."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sched', password='pass')
+
+    def _project(self, number, probs):
+        import json
+        from django.utils import timezone
+        from core.models import ProjectWeatherCache
+        project = Project.objects.create(
+            project_number=number, name=number, client='C', pm='P', city='Austin', state='TX',
+            status=Project.STATUS_ACTIVE,
+        )
+        forecast = {'daily': {
+            'time': [f'2026-01-0{i + 1}' for i in range(len(probs))],
+            'precipitation_probability_max': probs,
+            'temperature_2m_max': [20.5] * len(probs),
+        }}
+        ProjectWeatherCache.objects.create(project=project, forecast_json=json.dumps(forecast), fetched_at=timezone.now())
+        return project
+
+    def test_columns_written_on_save(self):
+        from core.models import ProjectWeatherCache
+        project = self._project('W-1', [10, 55, 0])
+        cache = ProjectWeatherCache.objects.get(project=project)
+        self.assertEqual(
+            (cache.risk_level, cache.max_precip_prob, cache.today_precip_prob, cache.today_temp, cache.preview_probs),
+            ('HIGH', 55, 10, 20.5, [10, 55, 0]),
+        )
+        cache.forecast_json = ''
+        cache.save(update_fields=['forecast_json'])
+        cache.refresh_from_db()
+        self.assertEqual((cache.risk_level, cache.max_precip_prob, cache.preview_probs), ('UNKNOWN', None, []))
+
+    def test_table_filters_and_sorts_in_sql(self):
+        self._project('W-1', [10, 20])
+        self._project('W-2', [60])
+        self._project('W-3', [35])
+        self.client.login(username='sched', password='pass')
+        r = self.client.get(reverse('weather_table'), {'risk': 'high'})
+        self.assertEqual([row['project'].project_number for row in r.context['project_rows']], ['W-2'])
+        r = self.client.get(reverse('weather_table'), {'sort': 'precip'})
+        self.assertEqual([row['project'].project_number for row in r.context['project_rows']], ['W-2', 'W-3', 'W-1'])
+        r = self.client.get(reverse('weather'))
+        rows = {row['project'].project_number: row for row in r.context['project_rows']}
+        self.assertEqual(rows['W-1']['preview_days'], [10, 20])
+        self.assertEqual(r.context['count_high'], 1)
+        self.assertNotIn('forecast_json', r.context['project_rows'][0]['cache'].__dict__)
+
+
+class FakeUpstreamMixin:
+    """Runs core.fake_openmeteo for the test class and points the weather endpoints at it."""
+
+    LATENCY = 0.05
+    ERROR_RATE = 0.0
+
+    @classmethod
+    def setUpClass(cls):
+        from core.fake_openmeteo import FakeOpenMeteo
+        super().setUpClass()
+        cls.server = FakeOpenMeteo(latency=cls.LATENCY, error_rate=cls.ERROR_RATE).start()
+        cls.calls, cls.connections = cls.server.calls, cls.server.connections
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        from django.test import override_settings
+        from core import upstream
+        urls = override_settings(WEATHER_GEOCODE_BASE_URL=self.server.url, WEATHER_FORECAST_BASE_URL=self.server.url)
+        urls.enable()
+        self.addCleanup(urls.disable)
+        self.server.reset()
+        upstream.client.breaker.reset()
+        upstream.client.metrics.reset()
+
+
+class ConcurrentWeatherRefreshTest(FakeUpstreamMixin, TestCase):
+    """refresh_projects against a local fake upstream: bounded parallelism, shared cells, bulk writes."""
+
+    def _projects(self, n, prefix='R'):
+        return [
+            Project.objects.create(project_number=f'{prefix}-{i}', name=f'{prefix}{i}', client='C', pm='P',
+                                   city=f'Town {prefix}{i}', state='NV', status=Project.STATUS_ACTIVE)
+            for i in range(n)
+        ]
+
+    def test_parallel_refresh_is_faster_and_writes_in_bulk(self):
+        import time
+        from core.models import ProjectWeatherCache, ProjectWeatherLocation
+        from core.weather_refresh import refresh_projects
+        serial_projects, parallel_projects = self._projects(12, 'S'), self._projects(12, 'P')
+        started = time.monotonic()
+        serial = refresh_projects(serial_projects, concurrency=1, rate_per_host=0)
+        serial_seconds = time.monotonic() - started
+        started = time.monotonic()
+        parallel = refresh_projects(parallel_projects, concurrency=8, rate_per_host=0)
+        parallel_seconds = time.monotonic() - started
+        self.assertEqual(len(serial['refreshed']), 12)
+        self.assertEqual(len(parallel['refreshed']), 12)
+        self.assertLess(parallel_seconds, serial_seconds / 3)
+        cache = ProjectWeatherCache.objects.get(project=parallel_projects[0])
+        self.assertEqual((cache.risk_level, cache.max_precip_prob, cache.preview_probs), ('MODERATE', 40, [40, 10]))
+        location = ProjectWeatherLocation.objects.get(project=parallel_projects[0])
+        self.assertEqual(len(location.geohash), 9)
+        self.assertEqual(parallel_projects[0].health.weather_risk, 'MODERATE')
+
+    def test_same_city_shares_one_forecast_fetch(self):
+        from core.weather_refresh import refresh_projects
+        projects = self._projects(4)
+        for p in projects:
+            p.city = 'Reno'
+            p.save()
+        Project.objects.create(project_number='NA', name='No address', client='C', pm='P', status=Project.STATUS_ACTIVE)
+        result = refresh_projects(Project.objects.all(), concurrency=4, rate_per_host=0)
+        self.assertEqual(len(result['refreshed']), 4)
+        self.assertEqual(len(result['skipped']), 1)
+        self.assertEqual(result['cells'], 1)
+        self.assertEqual(self.calls.count('/v1/forecast'), 1)
+
+    def test_rate_limiter_spaces_calls_per_host(self):
+        import time
+        from core.weather_refresh import HostRateLimiter
+        limiter = HostRateLimiter(20)
+        started = time.monotonic()
+        for _ in range(5):
+            limiter.wait('a')
+        limiter.wait('b')
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+        self.assertLess(time.monotonic() - started, 0.3)
+
+
+class GeocodeCacheTest(FakeUpstreamMixin, TestCase):
+    """Geocoding happens once per normalized address, and again only when a project's address changes."""
+
+    LATENCY = 0
+
+    def test_address_key_normalization(self):
+        from core.geocoding import address_key
+        self.assertEqual(address_key(' El  Segundo ', 'California', 'USA'), 'el segundo|ca|us')
+        self.assertEqual(address_key('El Segundo', 'CA', ''), 'el segundo|ca|us')
+        self.assertEqual(address_key('', '', 'US'), '')
+
+    def test_shared_and_reused_across_refreshes(self):
+        from core.models import GeocodeCache, ProjectWeatherCache, ProjectWeatherLocation
+        from core.weather_refresh import refresh_projects
+        for i, state in enumerate(('TX', 'Texas', 'tx.')):
+            Project.objects.create(project_number=f'G-{i}', name=f'G{i}', client='C', pm='P', city='Austin', state=state)
+        result = refresh_projects(Project.objects.all(), rate_per_host=0)
+        self.assertEqual((len(result['refreshed']), result['geocoded']), (3, 1))
+        self.assertEqual(self.calls.count('/v1/search'), 1)
+        self.assertEqual(GeocodeCache.objects.get().key, 'austin|tx|us')
+        self.assertEqual(set(ProjectWeatherLocation.objects.values_list('address_key', flat=True)), {'austin|tx|us'})
+
+        result = refresh_projects(Project.objects.all(), rate_per_host=0)
+        self.assertEqual(result['geocoded'], 0)
+        self.assertEqual(self.calls.count('/v1/search'), 1)
+
+        # A new project at a known address uses the shared row
+        Project.objects.create(project_number='G-3', name='G3', client='C', pm='P', city='austin', state='TX')
+        self.assertEqual(refresh_projects(Project.objects.all(), rate_per_host=0)['geocoded'], 0)
+
+        # Changing the address drops the old location and forecast; the next refresh geocodes the new one
+        moved = Project.objects.get(project_number='G-0')
+        moved.notes = 'unrelated edit'
+        moved.save()
+        self.assertTrue(ProjectWeatherLocation.objects.filter(project=moved).exists())
+        moved.city = 'Dallas'
+        moved.save()
+        self.assertFalse(ProjectWeatherLocation.objects.filter(project=moved).exists())
+        self.assertFalse(ProjectWeatherCache.objects.filter(project=moved).exists())
+        result = refresh_projects(Project.objects.all(), rate_per_host=0)
+        self.assertEqual(result['geocoded'], 1)
+        self.assertEqual(self.calls.count('/v1/search'), 2)
+        self.assertEqual(ProjectWeatherLocation.objects.get(project=moved).address_key, 'dallas|tx|us')
+
+    def test_single_project_lookup_uses_cache(self):
+        from core.weather_utils import get_forecast_for_project
+        first = Project.objects.create(project_number='S-1', name='S1', client='C', pm='P', city='Boise', state='ID')
+        second = Project.objects.create(project_number='S-2', name='S2', client='C', pm='P', city='Boise', state='ID')
+        self.assertIsNotNone(get_forecast_for_project(first, force_refresh=True))
+        self.assertIsNotNone(get_forecast_for_project(second, force_refresh=True))
+        self.assertIsNotNone(get_forecast_for_project(first, force_refresh=True))
+        self.assertEqual(self.calls.count('/v1/search'), 1)
+
+
+class BatchedForecastTest(FakeUpstreamMixin, TestCase):
+    """Many grid cells are fetched in a few multi-coordinate requests over reused gzip connections."""
+
+    LATENCY = 0
+
+    def test_cells_batched_into_few_requests(self):
+        import json
+        from core import geo, weather_utils
+        from core.models import ProjectWeatherCache, ProjectWeatherLocation
+        from core.weather_refresh import refresh_projects
+        for i in range(120):
+            Project.objects.create(project_number=f'B-{i}', name=f'B{i}', client='C', pm='P',
+                                   city=f'Town {i}', state='NV')
+        originals = weather_utils.FORECAST_BATCH_SIZE
+        weather_utils.FORECAST_BATCH_SIZE = 25
+        self.addCleanup(setattr, weather_utils, 'FORECAST_BATCH_SIZE', originals)
+        result = refresh_projects(Project.objects.all(), concurrency=1, rate_per_host=0)
+        self.assertEqual(len(result['refreshed']), 120)
+        self.assertEqual(result['forecast_requests'], -(-result['cells'] // 25))
+        self.assertEqual(self.calls.count('/v1/forecast'), result['forecast_requests'])
+        # One worker thread: every geocode and forecast call shared a single kept-alive connection
+        self.assertEqual(len(self.connections), 1)
+        cache = ProjectWeatherCache.objects.select_related('project__weather_location').first()
+        self.assertEqual(cache.risk_level, 'MODERATE')
+        # Fetched at a real site in the cell, not the cell's center
+        location = cache.project.weather_location
+        site_lats = {
+            round(float(loc.lat), 4) for loc in ProjectWeatherLocation.objects.all()
+            if loc.geohash.startswith(geo.weather_cell(location.lat, location.lon))
+        }
+        self.assertIn(json.loads(cache.forecast_json)['latitude'], site_lats)
+        cell_lat, _lon = geo.decode(geo.weather_cell(location.lat, location.lon))
+        self.assertNotIn(round(cell_lat, 4), site_lats)
+
+    def test_single_cell_and_failed_batch(self):
+        from core import geo
+        from core.weather_utils import fetch_forecasts, fetch_site_forecast
+        cell, other = geo.weather_cell(36.1, -115.1), geo.weather_cell(39.5, -119.8)
+        self.assertEqual(fetch_site_forecast(36.1, -115.1)['latitude'], 36.1)
+        self.assertEqual(set(fetch_forecasts({cell: (36.1, -115.1), other: (39.5, -119.8)})), {cell, other})
+        with self.settings(WEATHER_FORECAST_BASE_URL=self.server.url + '/missing'):
+            self.assertEqual(fetch_forecasts({cell: (36.1, -115.1)}), {})
+
+
+class QueuedWeatherRefreshTest(FakeUpstreamMixin, TestCase):
+    """
+    The refresh button queues one de-duplicated job; the worker runs it and the status endpoint reports it.
+    Without a live worker the job stays queued unless WEATHER_REFRESH_INLINE_WITHOUT_WORKER opts in.
+    """
+
+    LATENCY = 0
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='wx', password='testpass')
+        self.client = Client()
+        self.client.login(username='wx', password='testpass')
+        self.project = Project.objects.create(project_number='Q-1', name='Q1', client='C', pm='P',
+                                              city='Reno', state='NV', status=Project.STATUS_ACTIVE)
+
+    def test_refresh_is_queued_deduplicated_and_run_by_worker(self):
+        from core.jobs import heartbeat, run_pending
+        from core.models import BackgroundJob, ProjectWeatherCache
+        heartbeat('test-worker')
+        response = self.client.post(reverse('weather_refresh'))
+        self.assertRedirects(response, reverse('weather'), fetch_redirect_response=False)
+        self.client.post(reverse('weather_refresh'))
+        self.client.post(reverse('weather_refresh'), {'project_id': self.project.pk})
+        self.assertEqual(BackgroundJob.objects.filter(kind='refresh_weather').count(), 1)
+        self.assertEqual(self.calls, [])
+        status = self.client.get(reverse('weather_refresh_status')).json()
+        self.assertTrue(status['active'] and status['worker'])
+        self.assertContains(self.client.get(reverse('weather')), 'weather-refresh-jobs')
+
+        self.assertEqual(len(run_pending()), 1)
+        job = BackgroundJob.objects.get(kind='refresh_weather')
+        self.assertEqual(job.status, BackgroundJob.STATUS_DONE)
+        self.assertIn('Refreshed 1 of 1', job.message)
+        self.assertTrue(ProjectWeatherCache.objects.filter(project=self.project).exists())
+        self.assertFalse(self.client.get(reverse('weather_refresh_status')).json()['active'])
+        # Finished jobs no longer block a new refresh
+        self.client.post(reverse('weather_refresh'), {'project_id': self.project.pk})
+        self.assertEqual(BackgroundJob.objects.get(status=BackgroundJob.STATUS_QUEUED).key, f'project:{self.project.pk}')
+
+    def test_refresh_stays_queued_without_a_live_worker(self):
+        from django.utils import timezone
+        from core.jobs import worker_running
+        from core.models import BackgroundJob, ProjectWeatherCache, WorkerHeartbeat
+        WorkerHeartbeat.objects.create(name='stopped', seen_at=timezone.now() - timedelta(hours=1))
+        self.assertFalse(worker_running())
+        response = self.client.post(reverse('weather_refresh'), follow=True)
+        self.assertContains(response, 'no background worker is running')
+        self.assertEqual(self.calls, [])
+        self.assertEqual(BackgroundJob.objects.get(kind='refresh_weather').status, BackgroundJob.STATUS_QUEUED)
+        self.assertFalse(ProjectWeatherCache.objects.filter(project=self.project).exists())
+        status = self.client.get(reverse('weather_refresh_status')).json()
+        self.assertTrue(status['active'])
+        self.assertFalse(status['worker'])
+
+    def test_inline_fallback_is_opt_in(self):
+        from core.models import BackgroundJob, ProjectWeatherCache
+        with self.settings(WEATHER_REFRESH_INLINE_WITHOUT_WORKER=True):
+            response = self.client.post(reverse('weather_refresh'), follow=True)
+        self.assertContains(response, 'Refreshed 1 of 1')
+        self.assertEqual(BackgroundJob.objects.get(kind='refresh_weather').status, BackgroundJob.STATUS_DONE)
+        self.assertTrue(ProjectWeatherCache.objects.filter(project=self.project).exists())
+
+
+class WeatherScheduleTest(FakeUpstreamMixin, TestCase):
+    """schedule_weather refreshes the most stale sites first, paced by risk, upcoming tasks and a call budget."""
+
+    LATENCY = 0
+
+    def _project(self, number, prob=None, age_hours=None):
+        import json
+        from django.utils import timezone
+        from core.models import ProjectWeatherCache
+        project = Project.objects.create(project_number=number, name=number, client='C', pm='P',
+                                         city=f'Town {number}', state='NV', status=Project.STATUS_ACTIVE)
+        if prob is not None:
+            ProjectWeatherCache.objects.create(project=project, forecast_json=json.dumps(
+                {'daily': {'time': ['2026-01-01'], 'precipitation_probability_max': [prob]}}))
+            ProjectWeatherCache.objects.filter(project=project).update(
+                fetched_at=timezone.now() - timedelta(hours=age_hours))
+        return project
+
+    def test_refresh_interval(self):
+        from core.weather_schedule import IDLE_INTERVAL, refresh_interval
+        today = date(2026, 3, 2)
+        self.assertEqual(refresh_interval('HIGH', today + timedelta(days=1), today), timedelta(hours=1))
+        self.assertEqual(refresh_interval('CLEAR', today + timedelta(days=1), today), timedelta(hours=6))
+        self.assertEqual(refresh_interval('HIGH', today + timedelta(days=5), today), timedelta(hours=3))
+        self.assertEqual(refresh_interval('HIGH', None, today), IDLE_INTERVAL)
+        self.assertEqual(refresh_interval('MODERATE', today + timedelta(days=30), today), IDLE_INTERVAL)
+
+    def test_queue_orders_by_staleness(self):
+        from django.utils import timezone
+        from core.weather_schedule import build_queue, pop_due
+        from work.models import WorkItem
+        never = self._project('N')
+        meeting = self._project('M', prob=80, age_hours=2)
+        WorkItem.objects.create(project=meeting, title='Site meeting', meeting_at=timezone.now() + timedelta(days=1))
+        idle = self._project('I', prob=80, age_hours=2)
+        stale_idle = self._project('S', prob=5, age_hours=30)
+        done = self._project('D', prob=80, age_hours=2)
+        WorkItem.objects.create(project=done, title='Closed', meeting_at=timezone.now() + timedelta(hours=5),
+                                status=WorkItem.STATUS_DONE)
+        self.assertEqual(pop_due(build_queue(), 10), [never.pk, meeting.pk, stale_idle.pk])
+        self.assertEqual(pop_due(build_queue(), 2), [never.pk, meeting.pk])
+        self.assertNotIn(idle.pk, pop_due(build_queue(), 10))
+
+    def test_negatively_cached_addresses_do_not_starve_the_queue(self):
+        from django.utils import timezone
+        from core.geocoding import NOT_FOUND, project_address_key
+        from core.models import GeocodeCache
+        from core.weather_schedule import build_queue, pop_due
+        nowhere = self._project('X')
+        never = self._project('N')
+        GeocodeCache.objects.create(key=project_address_key(nowhere), status=NOT_FOUND, fetched_at=timezone.now())
+        self.assertEqual(pop_due(build_queue(), 1), [never.pk])
+        # Retried once the negative result expires
+        later = timezone.now() + timedelta(days=2)
+        self.assertIn(nowhere.pk, pop_due(build_queue(later), 10))
+
+    def test_token_bucket(self):
+        from core.weather_schedule import TokenBucket
+        clock = [0.0]
+        bucket = TokenBucket(rate_per_second=2, capacity=4, clock=lambda: clock[0])
+        bucket.spend(6)
+        self.assertEqual(bucket.available(), -2)
+        self.assertEqual(bucket.seconds_until(1), 1.5)
+        clock[0] = 100
+        self.assertEqual(bucket.available(), 4)
+
+    def test_run_once_respects_budget(self):
+        from core.models import ProjectWeatherCache
+        from core.weather_schedule import TokenBucket, run_once
+        for i in range(3):
+            self._project(f'B{i}')
+        bucket = TokenBucket(rate_per_second=0, capacity=2)
+        summary = run_once(bucket)
+        self.assertEqual((summary['due'], len(summary['refreshed']), summary['deferred']), (3, 2, 1))
+        self.assertEqual(summary['calls'], len(self.calls))
+        self.assertEqual(ProjectWeatherCache.objects.count(), 2)
+        # The overdrawn bucket allows nothing more until it refills
+        self.assertEqual(run_once(bucket)['refreshed'], [])
+        self.assertEqual(run_once(TokenBucket(rate_per_second=0, capacity=10))['due'], 1)
+
+    def test_once_runs_share_the_persisted_budget(self):
+        from io import StringIO
+        from django.core.management import call_command
+        for i in range(4):
+            self._project(f'C{i}')
+        first, second = StringIO(), StringIO()
+        with self.settings(WEATHER_SCHEDULE_BURST=2, WEATHER_SCHEDULE_CALLS_PER_HOUR=1):
+            call_command('schedule_weather', once=True, stdout=first)
+            call_command('schedule_weather', once=True, stdout=second)
+        self.assertIn('refreshed 2', first.getvalue())
+        # The first run overdrew the stored bucket; a fresh process must not start with a full burst
+        self.assertIn('Due: 2; refreshed 0, failed 0, deferred 2; upstream calls: 0', second.getvalue())
+
+
+class FakeOpenMeteoTest(FakeUpstreamMixin, TestCase):
+    """Error injection in the fake upstream, and the offline benchmark command."""
+
+    LATENCY = 0
+
+    def test_injected_errors_fail_refresh_without_raising(self):
+        from core.weather_refresh import refresh_projects
+        project = Project.objects.create(project_number='E-1', name='E1', client='C', pm='P', city='Elko', state='NV')
+        self.server.error_rate = 1.0
+        self.addCleanup(setattr, self.server, 'error_rate', 0.0)
+        result = refresh_projects([project], rate_per_host=0)
+        self.assertEqual(result['failed'], [project.pk])
+        self.assertGreaterEqual(self.server.errors, 1)
+
+    def test_benchmark_command_leaves_database_unchanged(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from core.models import ForecastHistory, GeocodeCache, ProjectWeatherCache, ProjectWeatherLocation
+        out = StringIO()
+        call_command('benchmark_weather', projects=20, cities=5, latency=0, concurrency='1,4', stdout=out)
+        lines = [line for line in out.getvalue().splitlines() if line.startswith('concurrency=')]
+        self.assertEqual(len(lines), 2)
+        self.assertIn('20/20 refreshed', lines[1])
+        self.assertIn('(5 geocode', lines[1])
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(ProjectWeatherCache.objects.exists() or GeocodeCache.objects.exists())
+        self.assertFalse(ProjectWeatherLocation.objects.exists() or ForecastHistory.objects.exists())
+
+
+class UpstreamFailureTest(FakeUpstreamMixin, TestCase):
+    """A failing upstream trips the circuit breaker, failed geocodes are cached, and calls are measured."""
+
+    LATENCY = 0
+
+    def _fail_upstream(self):
+        self.server.error_rate = 1.0
+        self.addCleanup(setattr, self.server, 'error_rate', 0.0)
+
+    def test_breaker_opens_backs_off_and_closes(self):
+        from core.upstream import CircuitBreaker, CircuitOpenError
+        clock = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, backoff=10, max_backoff=25, clock=lambda: clock[0])
+        breaker.record_failure('h')
+        breaker.before_call('h')
+        breaker.record_failure('h')
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call('h')
+        clock[0] = 10
+        breaker.before_call('h')  # half-open trial
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call('h')  # only one trial at a time
+        breaker.record_failure('h')
+        clock[0] = 29
+        self.assertTrue(breaker.is_open('h'))  # backoff doubled to 20s
+        clock[0] = 30
+        breaker.before_call('h')
+        breaker.record_failure('h')
+        clock[0] = 54
+        self.assertTrue(breaker.is_open('h'))  # capped at 25s
+        clock[0] = 55
+        breaker.before_call('h')
+        breaker.record_success('h')
+        breaker.before_call('h')
+        self.assertFalse(breaker.is_open('h'))
+
+    def test_failing_upstream_short_circuits_refresh(self):
+        import time
+        from core import upstream
+        from core.weather_refresh import refresh_projects
+        self._fail_upstream()
+        projects = [
+            Project.objects.create(project_number=f'F-{i}', name=f'F{i}', client='C', pm='P', city=f'Fail {i}', state='NV')
+            for i in range(40)
+        ]
+        started = time.monotonic()
+        result = refresh_projects(projects, concurrency=1, rate_per_host=0)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(len(result['failed']), 40)
+        # The breaker opened after WEATHER_CIRCUIT_FAILURES errors; the rest never reached the server
+        self.assertEqual(len(self.calls), 5)
+        (metrics,) = upstream.client.metrics.snapshot().values()
+        self.assertEqual((metrics['calls'], metrics['errors'], metrics['short_circuited']), (5, 5, 35))
+
+    def test_failed_geocodes_are_negatively_cached(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from core.geocoding import FAILED, NOT_FOUND
+        from core.models import GeocodeCache
+        from core.weather_refresh import refresh_projects
+        from core.weather_utils import get_forecast_for_project
+        self._fail_upstream()
+        project = Project.objects.create(project_number='G-1', name='G1', client='C', pm='P', city='Nowhere', state='NV')
+        refresh_projects([project], rate_per_host=0)
+        self.assertEqual(GeocodeCache.objects.get().status, FAILED)
+        self.server.error_rate = 0.0
+        self.server.reset()
+        self.assertEqual(refresh_projects([project], rate_per_host=0)['geocoded'], 0)
+        self.assertIsNone(get_forecast_for_project(project, force_refresh=True))
+        self.assertEqual(self.calls, [])
+        # Upstream errors are retried after GEOCODE_FAILURE_TTL_MINUTES; "not found" is kept for a day
+        GeocodeCache.objects.update(fetched_at=timezone.now() - timedelta(minutes=20))
+        self.assertEqual(len(refresh_projects([project], rate_per_host=0)['refreshed']), 1)
+        GeocodeCache.objects.update(status=NOT_FOUND, lat=None, lon=None, fetched_at=timezone.now() - timedelta(hours=2))
+        project.city = 'Elsewhere'
+        project.save()
+        GeocodeCache.objects.update(key='elsewhere|nv|us')
+        self.assertEqual(refresh_projects([project], rate_per_host=0)['geocoded'], 0)
+
+
+class ForecastHistoryTest(TestCase):
+    """Each fetched series is kept as packed floats and can be queried by target date and lead time."""
+
+    def setUp(self):
+        self.project = Project.objects.create(project_number='H-1', name='H1', client='C', pm='P', city='Reno', state='NV')
+
+    def _fetch(self, first_day, probs, hours=0):
+        import json
+        from datetime import datetime
+        from django.utils import timezone
+        from core.models import ProjectWeatherCache
+        day = date.fromisoformat(first_day)
+        ProjectWeatherCache.objects.update_or_create(project=self.project, defaults={
+            'forecast_json': json.dumps({'daily': {
+                'time': [(day + timedelta(days=i)).isoformat() for i in range(len(probs))],
+                'precipitation_probability_max': probs,
+                'temperature_2m_max': [20.5] * len(probs)}}),
+            'fetched_at': timezone.make_aware(datetime(day.year, day.month, day.day, 6 + hours)),
+        })
+
+    def test_history_kept_packed_and_queryable_by_lead(self):
+        from core.forecast_history import precip_prob, precip_prob_by_lead, unpack
+        from core.models import ForecastHistory
+        self._fetch('2026-03-01', [10, 20, 30, 40, 50, 60, 70])
+        self._fetch('2026-03-01', [10, 20, 30, 40, 50, 60, 70], hours=1)  # unchanged: no new row
+        self._fetch('2026-03-01', [10, 25, 35, 40, 50, 60, 70], hours=2)
+        self._fetch('2026-03-02', [15, 45, 55, 40, 50, 60, None])
+        self.assertEqual(ForecastHistory.objects.count(), 3)
+        row = ForecastHistory.objects.order_by('fetched_at').first()
+        self.assertEqual(len(bytes(row.precip_prob)), 7 * 4)
+        self.assertAlmostEqual(unpack(row.temp_max)[0], 20.5)
+        target = date(2026, 3, 3)
+        self.assertEqual(precip_prob(self.project, target, 2), 35)  # last forecast issued Mar 1
+        self.assertEqual(precip_prob(self.project.pk, target, 1), 45)
+        self.assertIsNone(precip_prob(self.project, target, 0))
+        self.assertIsNone(precip_prob(self.project, date(2026, 3, 8), 1))  # missing value
+        self.assertEqual(precip_prob_by_lead(self.project, target), {1: 45, 2: 35})
+
+    def test_compact_keeps_last_forecast_per_day(self):
+        from django.utils import timezone
+        from core.forecast_history import compact, precip_prob
+        from core.models import ForecastHistory
+        for hour, prob in enumerate([10, 20, 30]):
+            self._fetch('2026-01-05', [prob, prob], hours=hour)
+        today = timezone.localdate()
+        self._fetch(today.isoformat(), [1, 2])
+        self._fetch(today.isoformat(), [3, 4], hours=1)
+        self.assertEqual(compact(), 2)
+        self.assertEqual(ForecastHistory.objects.count(), 3)
+        self.assertEqual(precip_prob(self.project, date(2026, 1, 6), 1), 30)
+
+    def test_bulk_refresh_records_history(self):
+        from core.models import ForecastHistory
+        from core.weather_refresh import _write
+        from django.utils import timezone
+        forecast = {'daily': {'time': ['2026-04-01', '2026-04-02'], 'precipitation_probability_max': [5, 80]}}
+        _write({self.project: (39.5, -119.8, forecast)}, timezone.now())
+        _write({self.project: (39.5, -119.8, forecast)}, timezone.now())
+        self.assertEqual(ForecastHistory.objects.filter(project=self.project).count(), 1)
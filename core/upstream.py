@@ -0,0 +1,240 @@
+"""
+Keep-alive HTTP client for the weather APIs. Each thread keeps one http.client connection per
+(scheme, host, port) and reuses it across requests, so a refresh pays the TCP+TLS handshake once per
+worker instead of once per call. Responses are requested gzip-compressed.
+Calls go through a per-host CircuitBreaker: after repeated failures a host is skipped outright
+(CircuitOpenError, no network) for an exponentially growing backoff. Latency and errors per host are
+recorded in client.metrics.
+"""
+import gzip
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+USER_AGENT = 'gc-scheduler-weather/1.0'
+
+
+class UpstreamError(Exception):
+    """Non-2xx response from an upstream API."""
+
+    def __init__(self, status, url):
+        super().__init__(f'HTTP {status} from {url}')
+        self.status = status
+
+
+class CircuitOpenError(Exception):
+    """The host's circuit is open: the call was not attempted."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f'{host} unavailable; retrying in {retry_in:.0f}s')
+        self.host = host
+        self.retry_in = retry_in
+
+
+def _is_host_failure(exc):
+    """Timeouts, connection errors, 5xx and 429 count against a host; other 4xx are the caller's problem."""
+    if isinstance(exc, UpstreamError):
+        return exc.status >= 500 or exc.status == 429
+    return True
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker. `failure_threshold` consecutive failures open the circuit for `backoff` seconds;
+    then one trial call is let through (half-open). Success closes the circuit and resets the backoff;
+    failure reopens it with the backoff doubled, up to `max_backoff`.
+    """
+
+    def __init__(self, failure_threshold=5, backoff=30.0, max_backoff=900.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    @classmethod
+    def from_settings(cls):
+        from django.conf import settings
+        return cls(
+            failure_threshold=getattr(settings, 'WEATHER_CIRCUIT_FAILURES', 5),
+            backoff=getattr(settings, 'WEATHER_CIRCUIT_BACKOFF_SECONDS', 30),
+            max_backoff=getattr(settings, 'WEATHER_CIRCUIT_MAX_BACKOFF_SECONDS', 900),
+        )
+
+    def _state(self, host):
+        return self._hosts.setdefault(host, {'failures': 0, 'open_until': 0.0, 'backoff': self.base_backoff, 'trial': False})
+
+    def before_call(self, host):
+        """Raise CircuitOpenError if the host is being skipped; otherwise the call may go ahead."""
+        with self._lock:
+            state = self._state(host)
+            now = self._clock()
+            if state['open_until'] > now:
+                raise CircuitOpenError(host, state['open_until'] - now)
+            if state['open_until']:
+                # Backoff elapsed: let one trial call through and hold the rest until it reports back
+                if state['trial']:
+                    raise CircuitOpenError(host, 0)
+                state['trial'] = True
+
+    def record_success(self, host):
+        with self._lock:
+            self._hosts[host] = {'failures': 0, 'open_until': 0.0, 'backoff': self.base_backoff, 'trial': False}
+
+    def record_failure(self, host):
+        with self._lock:
+            state = self._state(host)
+            state['failures'] += 1
+            if state['trial']:
+                state['backoff'] = min(state['backoff'] * 2, self.max_backoff)
+            elif state['failures'] < self.failure_threshold:
+                return
+            state['trial'] = False
+            state['open_until'] = self._clock() + state['backoff']
+
+    def is_open(self, host):
+        with self._lock:
+            return self._state(host)['open_until'] > self._clock()
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+class CallMetrics:
+    """Per-host call counts, errors, short-circuited calls and latency, safe to update from worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host):
+        return self._hosts.setdefault(host, {'calls': 0, 'errors': 0, 'short_circuited': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+
+    def record(self, host, seconds, error=False):
+        with self._lock:
+            row = self._host(host)
+            row['calls'] += 1
+            row['errors'] += bool(error)
+            row['seconds'] += seconds
+            row['max_seconds'] = max(row['max_seconds'], seconds)
+
+    def record_short_circuit(self, host):
+        with self._lock:
+            self._host(host)['short_circuited'] += 1
+
+    def snapshot(self):
+        """{host: {'calls', 'errors', 'short_circuited', 'avg_ms', 'max_ms'}}."""
+        with self._lock:
+            return {
+                host: {
+                    'calls': row['calls'],
+                    'errors': row['errors'],
+                    'short_circuited': row['short_circuited'],
+                    'avg_ms': round(row['seconds'] / row['calls'] * 1000, 1) if row['calls'] else 0.0,
+                    'max_ms': round(row['max_seconds'] * 1000, 1),
+                }
+                for host, row in self._hosts.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+def format_metrics(snapshot):
+    """One line per host, for command output."""
+    return [
+        f'{host}: {m["calls"]} call(s), {m["errors"]} error(s), {m["short_circuited"]} skipped by breaker; '
+        f'avg {m["avg_ms"]} ms, max {m["max_ms"]} ms'
+        for host, m in sorted(snapshot.items())
+    ]
+
+
+class KeepAliveClient:
+    def __init__(self, breaker=None):
+        self._local = threading.local()
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = CallMetrics()
+
+    def _connection(self, scheme, netloc, timeout):
+        pool = self._local.__dict__.setdefault('connections', {})
+        conn = pool.get((scheme, netloc))
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conn = pool[(scheme, netloc)] = conn_class(netloc, timeout=timeout)
+        conn.timeout = timeout
+        return conn
+
+    def _drop(self, scheme, netloc):
+        conn = self._local.__dict__.get('connections', {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def get(self, url, timeout=10):
+        """
+        Response body bytes (decompressed). Retries once on a fresh connection if a reused one was closed.
+        Raises CircuitOpenError without touching the network while the host's circuit is open.
+        """
+        host = urlsplit(url).netloc
+        try:
+            self.breaker.before_call(host)
+        except CircuitOpenError:
+            self.metrics.record_short_circuit(host)
+            raise
+        started = time.monotonic()
+        try:
+            body = self._get(url, timeout)
+        except Exception as exc:
+            self.metrics.record(host, time.monotonic() - started, error=True)
+            if _is_host_failure(exc):
+                self.breaker.record_failure(host)
+            else:
+                self.breaker.record_success(host)
+            raise
+        self.metrics.record(host, time.monotonic() - started)
+        self.breaker.record_success(host)
+        return body
+
+    def _get(self, url, timeout):
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        headers = {'Accept-Encoding': 'gzip', 'Connection': 'keep-alive', 'User-Agent': USER_AGENT}
+        for attempt in (1, 2):
+            conn = self._connection(parts.scheme, parts.netloc, timeout)
+            reused = conn.sock is not None
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionError):
+                self._drop(parts.scheme, parts.netloc)
+                if reused and attempt == 1:
+                    continue
+                raise
+            except Exception:
+                self._drop(parts.scheme, parts.netloc)
+                raise
+            if response.will_close:
+                self._drop(parts.scheme, parts.netloc)
+            if not 200 <= response.status < 300:
+                raise UpstreamError(response.status, url)
+            if response.getheader('Content-Encoding', '').lower() == 'gzip':
+                body = gzip.decompress(body)
+            return body
+
+    def get_json(self, url, timeout=10):
+        return json.loads(self.get(url, timeout=timeout).decode())
+
+    def close(self):
+        """Close this thread's connections."""
+        for key in list(self._local.__dict__.get('connections', {})):
+            self._drop(*key)
+
+
+client = KeepAliveClient(breaker=CircuitBreaker.from_settings())
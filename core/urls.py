@@ -7,12 +7,15 @@ urlpatterns = [
     path('profile/', views.ProfileView.as_view(), name='profile'),
     path('profile/edit/', views.ProfileEditView.as_view(), name='profile_edit'),
     path('activity/', views.ActivityListView.as_view(), name='activity_list'),
+    path('jobs/<int:pk>/', views.JobStatusView.as_view(), name='job_status'),
     path('search/', views.SearchView.as_view(), name='search'),
     path('weather/', views.WeatherDashboardView.as_view(), name='weather'),
     path('weather/list/', RedirectView.as_view(url=reverse_lazy('weather_table'), permanent=False), name='weather_list_redirect'),
     path('weather/table/', views.WeatherTableView.as_view(), name='weather_table'),
     path('weather/project/<int:project_id>/', views.WeatherProjectDetailView.as_view(), name='weather_project_detail'),
+    path('weather/nearby/', views.WeatherNearbyView.as_view(), name='weather_nearby'),
     path('weather/refresh/', views.WeatherRefreshView.as_view(), name='weather_refresh'),
+    path('weather/refresh/status/', views.WeatherRefreshStatusView.as_view(), name='weather_refresh_status'),
     path('schedule-email-builder/', views.ScheduleEmailBuilderView.as_view(), name='schedule_email_builder'),
     path('schedule-email-builder/test/', views.ScheduleEmailBuilderTestRunnerView.as_view(), name='schedule_email_builder_test'),
 ]
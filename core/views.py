@@ -1,22 +1,28 @@
 from datetime import date, timedelta
-import json
 from django.shortcuts import get_object_or_404, redirect, render
-from django.http import HttpResponse
-from django.db.models import Q, Sum
+from django.http import HttpResponse, JsonResponse
+from django.db.models import F, Q, Sum
 from django.views.generic import ListView
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 
+from core.geocoding import project_has_address
+from core.jobs import run_now, worker_running
 from core.mixins import user_is_manager, ManagerRequiredMixin, SchedulerOrManagerMixin
-from core.models import AuditLog, ProjectWeatherCache, ProjectWeatherLocation
-from core.weather_utils import get_daily_precip_prob, get_max_precip_prob_7day, get_risk_level, parse_forecast_days, RISK_UNKNOWN, _project_has_address
+from core.models import AuditLog, BackgroundJob, ProjectWeatherCache, ProjectWeatherLocation
+from core.weather_jobs import active_refresh_jobs, get_inline_without_worker, queue_weather_refresh
+from core.weather_utils import forecast_for, RISK_CLEAR, RISK_HIGH, RISK_LOW, RISK_MODERATE, RISK_UNKNOWN
 from work.models import WorkItem
 from time_tracking.models import TimeEntry
-from projects.models import Project
+from projects.models import Project, ProjectHealth
+from projects.search import ranked_project_ids
 from django.utils import timezone as tz
 
 
+WEATHER_RISK_LEVELS = (RISK_HIGH, RISK_MODERATE, RISK_LOW, RISK_CLEAR)
+
+
 def _week_range(ref_date):
     """Return (start, end) for the week containing ref_date (Mon–Sun)."""
     start = ref_date - timedelta(days=ref_date.weekday())
@@ -84,6 +90,14 @@ def dashboard(request):
     active_projects_count = Project.objects.filter(status=Project.STATUS_ACTIVE).count()
     active_work_items = list(overdue[:5]) + list(due_this_week[:5])
     active_work_items_total = overdue.count() + due_this_week.count()
+    # Worst first off the indexed score; ?health=<level> narrows to one level
+    health_level = request.GET.get('health', '')
+    unhealthy = ProjectHealth.objects.select_related('project').filter(project__deleted_at__isnull=True)
+    if health_level:
+        unhealthy = unhealthy.filter(level=health_level)
+    else:
+        unhealthy = unhealthy.exclude(level=ProjectHealth.LEVEL_GOOD)
+    unhealthy_projects = list(unhealthy.order_by('score', 'project__name')[:10])
 
     return render(request, 'core/dashboard.html', {
         'overdue': overdue,
@@ -101,6 +115,9 @@ def dashboard(request):
         'active_projects_count': active_projects_count,
         'active_work_items': active_work_items,
         'active_work_items_total': active_work_items_total,
+        'unhealthy_projects': unhealthy_projects,
+        'health_level': health_level,
+        'health_levels': ProjectHealth.LEVEL_CHOICES,
         'today': today,
     })
 
@@ -127,9 +144,9 @@ class SearchView(SchedulerOrManagerMixin, View):
         tasks = []
         if q:
             is_mgr = user_is_manager(request.user)
-            projects = list(Project.objects.filter(
-                Q(project_number__icontains=q) | Q(name__icontains=q)
-            ).order_by('project_number')[:15])
+            ids = ranked_project_ids(q, limit=15)
+            by_id = Project.objects.in_bulk(ids)
+            projects = [by_id[pk] for pk in ids if pk in by_id]
             task_qs = WorkItem.objects.select_related('project').filter(
                 Q(title__icontains=q) | (Q(pk=int(q)) if q.isdigit() else Q(pk=-1))
             )
@@ -143,6 +160,25 @@ class SearchView(SchedulerOrManagerMixin, View):
         })
 
 
+class JobStatusView(LoginRequiredMixin, View):
+    """JSON progress for a background job (creator or managers only)."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(BackgroundJob, pk=pk)
+        if job.created_by_id != request.user.pk and not user_is_manager(request.user):
+            return JsonResponse({'error': 'Not allowed.'}, status=403)
+        return JsonResponse({
+            'id': job.pk,
+            'kind': job.kind,
+            'status': job.status,
+            'done': job.progress_done,
+            'total': job.progress_total,
+            'percent': job.percent,
+            'message': job.message,
+            'finished': job.status not in BackgroundJob.ACTIVE_STATUSES,
+        })
+
+
 class ProfileView(LoginRequiredMixin, View):
     """Profile page: user info and links to Edit Profile, Logout."""
 
@@ -174,38 +210,26 @@ class WeatherDashboardView(SchedulerOrManagerMixin, LoginRequiredMixin, View):
 
     def get(self, request):
         projects = list(Project.objects.filter(status=Project.STATUS_ACTIVE).order_by('project_number'))
-        cache_by_id = {c.project_id: c for c in ProjectWeatherCache.objects.filter(project_id__in=[p.id for p in projects])}
+        # Rows use the derived columns; only the selected project's forecast_json is loaded
+        cache_by_id = {
+            c.project_id: c
+            for c in ProjectWeatherCache.objects.filter(project_id__in=[p.id for p in projects]).defer('forecast_json')
+        }
         project_rows = []
         counts = {'HIGH': 0, 'MODERATE': 0, 'LOW': 0, 'CLEAR': 0, 'UNKNOWN': 0}
         for p in projects:
             cache = cache_by_id.get(p.id)
-            forecast_json = cache.forecast_json if cache else None
-            risk = RISK_UNKNOWN if not _project_has_address(p) else get_risk_level(forecast_json)
+            risk = cache.risk_level if cache and project_has_address(p) else RISK_UNKNOWN
             counts[risk] = counts.get(risk, 0) + 1
-            today_precip = get_daily_precip_prob(forecast_json, 0) if forecast_json else None
-            today_temp = None
-            preview_days = []
-            if cache and cache.forecast_json:
-                try:
-                    data = json.loads(cache.forecast_json)
-                    daily = data.get('daily') or {}
-                    highs = daily.get('temperature_2m_max') or []
-                    if highs:
-                        today_temp = highs[0]
-                    for i in range(min(7, len(daily.get('time') or []))):
-                        preview_days.append(get_daily_precip_prob(forecast_json, i))
-                except (json.JSONDecodeError, TypeError):
-                    pass
-            max_precip_prob = get_max_precip_prob_7day(forecast_json)
             project_rows.append({
                 'project': p,
                 'cache': cache,
                 'risk_level': risk,
-                'max_precip_prob': max_precip_prob,
-                'has_address': _project_has_address(p),
-                'today_precip_prob': today_precip,
-                'today_temp': today_temp,
-                'preview_days': preview_days,
+                'max_precip_prob': cache.max_precip_prob if cache else None,
+                'has_address': project_has_address(p),
+                'today_precip_prob': cache.today_precip_prob if cache else None,
+                'today_temp': cache.today_temp if cache else None,
+                'preview_days': cache.preview_probs if cache else [],
             })
         selected_project = None
         selected_cache = None
@@ -216,12 +240,13 @@ class WeatherDashboardView(SchedulerOrManagerMixin, LoginRequiredMixin, View):
             try:
                 sid = int(selected_id)
                 selected_project = next((p for p in projects if p.id == sid), None)
-                selected_cache = cache_by_id.get(selected_project.id) if selected_project else None
-                forecast_days = parse_forecast_days(selected_cache.forecast_json) if selected_cache else []
-                selected_max_precip_prob = get_max_precip_prob_7day(selected_cache.forecast_json) if selected_cache else None
+                selected_cache = ProjectWeatherCache.objects.filter(project=selected_project).first() if selected_project else None
+                forecast_days = forecast_for(selected_cache).days() if selected_cache else []
+                selected_max_precip_prob = selected_cache.max_precip_prob if selected_cache else None
             except (ValueError, AttributeError):
                 pass
         return render(request, 'core/weather_dashboard.html', {
+            'refresh_jobs': active_refresh_jobs(),
             'project_rows': project_rows,
             'count_high': counts['HIGH'],
             'count_moderate': counts['MODERATE'],
@@ -236,21 +261,38 @@ class WeatherDashboardView(SchedulerOrManagerMixin, LoginRequiredMixin, View):
 
 
 class WeatherTableView(SchedulerOrManagerMixin, LoginRequiredMixin, View):
-    """Table view of active projects with cached forecast at /weather/table/."""
+    """
+    Table view of active projects with cached forecast at /weather/table/.
+    ?risk=HIGH|MODERATE|LOW|CLEAR filters and ?sort=precip orders by max 7-day precip, both in SQL.
+    """
 
     def get(self, request):
-        projects = list(Project.objects.filter(status=Project.STATUS_ACTIVE).order_by('project_number'))
-        cache_by_id = {c.project_id: c for c in ProjectWeatherCache.objects.filter(project_id__in=[p.id for p in projects])}
+        projects = Project.objects.filter(status=Project.STATUS_ACTIVE).order_by('project_number')
+        risk_filter = (request.GET.get('risk') or '').upper()
+        if risk_filter in WEATHER_RISK_LEVELS:
+            projects = projects.filter(weather_cache__risk_level=risk_filter)
+        if request.GET.get('sort') == 'precip':
+            projects = projects.order_by(F('weather_cache__max_precip_prob').desc(nulls_last=True), 'project_number')
+        projects = list(projects)
+        cache_by_id = {
+            c.project_id: c
+            for c in ProjectWeatherCache.objects.filter(project_id__in=[p.id for p in projects]).defer('forecast_json')
+        }
         project_rows = []
         for p in projects:
             cache = cache_by_id.get(p.id)
-            risk = RISK_UNKNOWN if not _project_has_address(p) else get_risk_level(cache.forecast_json if cache else None)
-            max_precip_prob = get_max_precip_prob_7day(cache.forecast_json if cache else None)
             project_rows.append({
-                'project': p, 'cache': cache, 'risk_level': risk,
-                'max_precip_prob': max_precip_prob, 'has_address': _project_has_address(p),
+                'project': p, 'cache': cache,
+                'risk_level': cache.risk_level if cache and project_has_address(p) else RISK_UNKNOWN,
+                'max_precip_prob': cache.max_precip_prob if cache else None,
+                'has_address': project_has_address(p),
             })
-        return render(request, 'core/weather_list.html', {'project_rows': project_rows})
+        return render(request, 'core/weather_list.html', {
+            'refresh_jobs': active_refresh_jobs(),
+            'project_rows': project_rows,
+            'risk_filter': risk_filter,
+            'risk_levels': WEATHER_RISK_LEVELS,
+        })
 
 
 class WeatherProjectDetailView(SchedulerOrManagerMixin, LoginRequiredMixin, View):
@@ -259,22 +301,62 @@ class WeatherProjectDetailView(SchedulerOrManagerMixin, LoginRequiredMixin, View
     def get(self, request, project_id):
         project = get_object_or_404(Project, pk=project_id, status=Project.STATUS_ACTIVE)
         cache = ProjectWeatherCache.objects.filter(project=project).first()
-        forecast_json = cache.forecast_json if cache else None
-        risk_level = get_risk_level(forecast_json)
-        max_precip_prob = get_max_precip_prob_7day(forecast_json)
-        forecast_days = parse_forecast_days(forecast_json)
-        today_precip = get_daily_precip_prob(forecast_json, 0) if forecast_json else None
+        forecast = forecast_for(cache)
+        risk_level = cache.risk_level if cache else RISK_UNKNOWN
+        max_precip_prob = cache.max_precip_prob if cache else None
+        forecast_days = forecast.days()
+        today_precip = cache.today_precip_prob if cache else None
         return render(request, 'core/weather_project_detail.html', {
+            'refresh_jobs': active_refresh_jobs(),
             'project': project,
             'cache': cache,
             'risk_level': risk_level,
             'max_precip_prob': max_precip_prob,
-            'has_address': _project_has_address(project),
+            'has_address': project_has_address(project),
             'forecast_days': forecast_days,
             'today_precip_prob': today_precip,
         })
 
 
+class WeatherNearbyView(SchedulerOrManagerMixin, LoginRequiredMixin, View):
+    """
+    JSON: geocoded sites near a point, from the geohash index. GET lat & lon (or project_id) with
+    miles=<radius> (default 20) for a radius search, or k=<n> for the n nearest.
+    """
+
+    def get(self, request):
+        from core import geo
+        project_id = request.GET.get('project_id')
+        try:
+            if project_id:
+                origin = get_object_or_404(ProjectWeatherLocation, project_id=int(project_id))
+                lat, lon = float(origin.lat), float(origin.lon)
+            else:
+                lat, lon = float(request.GET['lat']), float(request.GET['lon'])
+            k = int(request.GET['k']) if request.GET.get('k') else None
+            miles = float(request.GET.get('miles') or 20)
+        except (KeyError, ValueError):
+            return JsonResponse({'error': 'Give lat and lon (or project_id), and miles or k.'}, status=400)
+        active = ProjectWeatherLocation.objects.filter(project__deleted_at__isnull=True)
+        if project_id:
+            active = active.exclude(project_id=project_id)
+        if k:
+            found = geo.nearest_locations(lat, lon, k=min(k, 100), queryset=active)
+        else:
+            found = geo.locations_within(lat, lon, miles * geo.KM_PER_MILE, queryset=active)
+        return JsonResponse({'results': [
+            {
+                'project_id': loc.project_id,
+                'project_number': loc.project.project_number,
+                'name': loc.project.name,
+                'lat': float(loc.lat),
+                'lon': float(loc.lon),
+                'miles': round(km / geo.KM_PER_MILE, 2),
+            }
+            for km, loc in found
+        ]})
+
+
 def _schedule_email_builder_csp():
     return (
         "default-src 'self'; "
@@ -314,15 +396,40 @@ class ScheduleEmailBuilderTestRunnerView(SchedulerOrManagerMixin, LoginRequiredM
 
 
 class WeatherRefreshView(SchedulerOrManagerMixin, LoginRequiredMixin, View):
-    """POST: trigger weather cache refresh for a project or all. Redirects back to weather."""
+    """POST: queue a weather cache refresh for a project or all. Redirects back to weather."""
 
     def post(self, request):
-        from django.core.management import call_command
         project_id = request.POST.get('project_id')
-        try:
-            call_command('refresh_weather', project_id=str(project_id) if project_id else '')
-        except Exception as e:
-            messages.warning(request, f'Refresh failed: {e}')
+        job, created = queue_weather_refresh(project_id=int(project_id) if project_id and project_id.isdigit() else None, user=request.user)
+        worker = worker_running()
+        if not worker and get_inline_without_worker():
+            # Opt-in: no run_jobs worker would pick it up, so refresh in this request
+            ran = run_now(job) if job.status == job.STATUS_QUEUED else None
+            if ran is not None and ran.status == ran.STATUS_DONE:
+                messages.success(request, ran.message or 'Weather refreshed.')
+            elif ran is not None:
+                messages.error(request, f'Weather refresh failed: {ran.message}')
+            else:
+                messages.info(request, 'A weather refresh is already running.')
+        elif not worker:
+            messages.warning(request, 'Weather refresh queued, but no background worker is running. It starts when manage.py run_jobs runs.')
+        elif created:
+            messages.success(request, 'Weather refresh queued. This page updates when it finishes.')
         else:
-            messages.success(request, 'Weather data refreshed.')
+            messages.info(request, 'A weather refresh is already queued or running.')
         return redirect('weather')
+
+
+class WeatherRefreshStatusView(SchedulerOrManagerMixin, LoginRequiredMixin, View):
+    """JSON: queued/running weather refresh jobs, polled by the weather pages."""
+
+    def get(self, request):
+        jobs = list(active_refresh_jobs())
+        return JsonResponse({
+            'active': bool(jobs),
+            'worker': worker_running(),
+            'jobs': [
+                {'id': job.pk, 'status': job.status, 'percent': job.percent, 'message': job.message}
+                for job in jobs
+            ],
+        })
@@ -0,0 +1,51 @@
+"""
+Background weather refresh. The weather pages queue a job instead of fetching inside the request;
+`manage.py run_jobs` runs it and the pages poll WeatherRefreshStatusView until it finishes. Clicks
+while a matching refresh is still queued or running get the existing job back. Where no worker is
+running the job stays queued and the pages say so; WEATHER_REFRESH_INLINE_WITHOUT_WORKER=True opts in
+to running it inside the request instead (blocking on upstream fetches).
+"""
+from django.conf import settings
+
+from core.jobs import enqueue, job_progress, register
+from core.models import BackgroundJob
+from projects.models import Project
+from .weather_refresh import refresh_projects
+
+REFRESH_WEATHER = 'refresh_weather'
+ALL_KEY = 'all'
+
+
+def get_inline_without_worker():
+    return getattr(settings, 'WEATHER_REFRESH_INLINE_WITHOUT_WORKER', False)
+
+
+def queue_weather_refresh(project_id=None, user=None):
+    """Queue a refresh of one project or all active projects. Returns (job, created)."""
+    # A queued refresh of everything already covers any single project
+    active_all = BackgroundJob.objects.filter(
+        kind=REFRESH_WEATHER, key=ALL_KEY, status__in=BackgroundJob.ACTIVE_STATUSES
+    ).first()
+    if active_all:
+        return active_all, False
+    key = f'project:{project_id}' if project_id else ALL_KEY
+    return enqueue(REFRESH_WEATHER, {'project_id': project_id}, key=key, user=user)
+
+
+def active_refresh_jobs():
+    return BackgroundJob.objects.filter(kind=REFRESH_WEATHER, status__in=BackgroundJob.ACTIVE_STATUSES).order_by('pk')
+
+
+@register(REFRESH_WEATHER)
+def refresh_weather(job, payload):
+    projects = Project.objects.filter(status=Project.STATUS_ACTIVE)
+    if payload.get('project_id'):
+        projects = projects.filter(pk=payload['project_id'])
+    projects = list(projects)
+    job_progress(job, done=0, total=len(projects), message=f'Refreshing weather for {len(projects)} project(s)...')
+    result = refresh_projects(projects)
+    job_progress(
+        job, done=len(projects),
+        message=f'Refreshed {len(result["refreshed"])} of {len(projects)} project(s); '
+                f'{len(result["failed"])} failed, {len(result["skipped"])} without an address.',
+    )
@@ -0,0 +1,151 @@
+"""
+Bulk weather refresh. Coordinates are resolved from the geocode cache first (core.geocoding); only
+addresses it can't answer, and that haven't failed recently, are geocoded, once per distinct address. Geocoding and forecast HTTP calls
+run in a bounded thread pool over kept-alive connections, spaced per host by HostRateLimiter; workers
+never touch the database. Sites in the same grid cell share one forecast, fetched at the first such
+site's coordinates (not the cell center), cells are fetched up to
+FORECAST_BATCH_SIZE per request, and everything is written in bulk upserts once every fetch has finished.
+A failing upstream trips core.upstream's circuit breaker, so the remaining calls fail in microseconds.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.geo import encode, weather_cell
+from core.geocoding import (
+    failed_keys, known_coordinates, project_address_key, project_has_address, store_coordinates, store_failures,
+)
+from core import forecast_history, weather_utils
+from core.weather_utils import Forecast, fetch_forecasts, geocode_status
+
+
+def get_concurrency():
+    return getattr(settings, 'WEATHER_REFRESH_CONCURRENCY', 8)
+
+
+def get_rate_per_host():
+    """Requests per second allowed to each upstream host (0 = unlimited)."""
+    return getattr(settings, 'WEATHER_RATE_LIMIT_PER_HOST', 10)
+
+
+class HostRateLimiter:
+    """Spaces calls to each host at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _write(fetched, now):
+    """Upsert locations and caches for {project: (lat, lon, forecast)} in bulk, and append to forecast history."""
+    from core.models import ProjectWeatherCache, ProjectWeatherLocation
+    from projects import analytics, health
+    locations, caches = [], []
+    parsed, by_project = {}, {}
+    for project, (lat, lon, forecast) in fetched.items():
+        lat, lon = Decimal(str(lat)), Decimal(str(lon))
+        locations.append(ProjectWeatherLocation(
+            project_id=project.pk, lat=lat, lon=lon, geohash=encode(lat, lon),
+            address_key=project_address_key(project), geocode_source='open-meteo', updated_at=now,
+        ))
+        cache = ProjectWeatherCache(project_id=project.pk, forecast_json=json.dumps(forecast), fetched_at=now)
+        # Sites sharing a cell share the dict; parse it once
+        key = id(forecast)
+        if key not in parsed:
+            parsed[key] = Forecast(forecast)
+        cache.set_derived_fields(parsed[key])
+        caches.append(cache)
+        by_project[project.pk] = parsed[key]
+    with transaction.atomic():
+        ProjectWeatherLocation.objects.bulk_create(
+            locations, batch_size=500, update_conflicts=True, unique_fields=['project'],
+            update_fields=['lat', 'lon', 'geohash', 'address_key', 'geocode_source', 'updated_at'],
+        )
+        ProjectWeatherCache.objects.bulk_create(
+            caches, batch_size=500, update_conflicts=True, unique_fields=['project'],
+            update_fields=['forecast_json', 'fetched_at', *ProjectWeatherCache.DERIVED_FIELDS],
+        )
+    # Bulk upserts skip the cache signals; do what they would have
+    forecast_history.record(by_project, now)
+    ids = [project.pk for project in fetched]
+    analytics.invalidate(*ids)
+    health.refresh(*ids)
+
+
+def _geocode_key(project, limiter, base_url=None):
+    return geocode_status((project.city or '').strip(), (project.state or '').strip(), limiter, base_url)
+
+
+def refresh_projects(projects, concurrency=None, rate_per_host=None, base_url=None):
+    """
+    Fetch and store forecasts for projects. Returns {'refreshed': [ids], 'failed': [ids],
+    'skipped': [ids without an address], 'geocoded': upstream geocode lookups, 'cells': distinct grid
+    cells, 'forecast_requests': batched forecast calls}. base_url sends both geocode and forecast
+    calls to one host instead of the configured ones (benchmark_weather's fake server).
+    """
+    concurrency = max(1, concurrency or get_concurrency())
+    limiter = HostRateLimiter(get_rate_per_host() if rate_per_host is None else rate_per_host)
+    projects = list(projects)
+    targets = [p for p in projects if project_has_address(p)]
+    coords = known_coordinates(targets)
+    # One geocode per distinct address the cache can't answer and that hasn't failed recently
+    to_geocode = {}
+    for p in targets:
+        if p.pk not in coords:
+            to_geocode.setdefault(project_address_key(p), p)
+    for key in failed_keys(to_geocode):
+        del to_geocode[key]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        geocoded = dict(zip(to_geocode, pool.map(lambda p: _geocode_key(p, limiter, base_url), to_geocode.values())))
+        resolved = {key: (lat, lon) for key, (lat, lon, _status) in geocoded.items() if lat is not None and lon is not None}
+        for p in targets:
+            if p.pk not in coords and project_address_key(p) in resolved:
+                coords[p.pk] = resolved[project_address_key(p)]
+        # Each cell is fetched at the coordinates of the first site in it
+        wanted = {}
+        for p in targets:
+            if p.pk in coords:
+                wanted.setdefault(weather_cell(*coords[p.pk]), coords[p.pk])
+        sites = list(wanted.items())
+        size = weather_utils.FORECAST_BATCH_SIZE
+        batches = [dict(sites[i:i + size]) for i in range(0, len(sites), size)]
+        cells = {}
+        for result in pool.map(lambda batch: fetch_forecasts(batch, limiter, base_url), batches):
+            cells.update(result)
+    fetched = {}
+    for p in targets:
+        if p.pk in coords:
+            forecast = cells.get(weather_cell(*coords[p.pk]))
+            if forecast is not None:
+                fetched[p] = (*coords[p.pk], forecast)
+    now = timezone.now()
+    store_coordinates(resolved, now)
+    store_failures({key: status for key, (lat, lon, status) in geocoded.items() if key not in resolved}, now)
+    if fetched:
+        _write(fetched, now)
+    refreshed = {p.pk for p in fetched}
+    return {
+        'refreshed': [p.pk for p in targets if p.pk in refreshed],
+        'failed': [p.pk for p in targets if p.pk not in refreshed],
+        'skipped': [p.pk for p in projects if not project_has_address(p)],
+        'geocoded': len(to_geocode),
+        'cells': len(wanted),
+        'forecast_requests': len(batches),
+    }
@@ -0,0 +1,190 @@
+"""
+Staleness-prioritized weather refresh. Each active project with an address gets a refresh interval from
+its current risk level and its next open task (site meeting or due date): a HIGH-risk site with a
+meeting tomorrow is refreshed hourly, a project with nothing coming up once a day. Projects are kept in
+a heap ordered by staleness (age of the cached forecast / interval); those at or past their interval are
+refreshed most-stale first, as many per pass as the TokenBucket of upstream calls allows. The bucket is
+stored in UpstreamBudget between passes, so cron-driven `--once` runs share one hourly budget. Addresses with
+a live negative geocode result (core.geocoding.failed_keys) are left out until it expires, so sites that
+can't be placed don't sit at the top of the queue and starve the rest.
+Run by `manage.py schedule_weather`.
+"""
+import heapq
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from core.geocoding import ADDRESS_FIELDS, failed_keys, project_address_key, project_has_address
+from core.weather_refresh import refresh_projects
+from core.weather_utils import RISK_HIGH, RISK_MODERATE
+
+# (next event within N days, interval by risk level, interval for other levels); first match wins
+INTERVALS = (
+    (1, {RISK_HIGH: timedelta(hours=1), RISK_MODERATE: timedelta(hours=3)}, timedelta(hours=6)),
+    (7, {RISK_HIGH: timedelta(hours=3), RISK_MODERATE: timedelta(hours=6)}, timedelta(hours=12)),
+)
+IDLE_INTERVAL = timedelta(hours=24)
+BUDGET_NAME = 'weather_schedule'
+
+
+def get_calls_per_hour():
+    return getattr(settings, 'WEATHER_SCHEDULE_CALLS_PER_HOUR', 600)
+
+
+def get_burst():
+    return getattr(settings, 'WEATHER_SCHEDULE_BURST', 60)
+
+
+class TokenBucket:
+    """
+    Upstream call budget: refills at rate tokens/second up to capacity. spend() records calls after the
+    fact and may overdraw; the debt is repaid before more work is allowed.
+    """
+
+    def __init__(self, rate_per_second, capacity, clock=time.monotonic):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._clock = clock
+        self._updated = clock()
+
+    @classmethod
+    def from_settings(cls, calls_per_hour=None, burst=None):
+        calls_per_hour = get_calls_per_hour() if calls_per_hour is None else calls_per_hour
+        return cls(calls_per_hour / 3600.0, get_burst() if burst is None else burst)
+
+    def available(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return self.tokens
+
+    def spend(self, calls):
+        self.available()
+        self.tokens -= calls
+
+    def seconds_until(self, calls=1):
+        """Seconds until `calls` tokens are available (inf if the bucket never refills)."""
+        deficit = calls - self.available()
+        if deficit <= 0:
+            return 0.0
+        return deficit / self.rate if self.rate else math.inf
+
+
+def load_bucket(calls_per_hour=None, burst=None, name=BUDGET_NAME):
+    """TokenBucket from settings, holding what the last saved pass left plus the refill since then."""
+    from core.models import UpstreamBudget
+    bucket = TokenBucket.from_settings(calls_per_hour, burst)
+    row = UpstreamBudget.objects.filter(name=name).first()
+    if row is not None:
+        elapsed = max(0.0, (timezone.now() - row.refilled_at).total_seconds())
+        bucket.tokens = min(bucket.capacity, row.tokens + elapsed * bucket.rate)
+    return bucket
+
+
+def save_bucket(bucket, name=BUDGET_NAME):
+    from core.models import UpstreamBudget
+    UpstreamBudget.objects.update_or_create(
+        name=name, defaults={'tokens': bucket.available(), 'refilled_at': timezone.now()}
+    )
+
+
+def refresh_interval(risk_level, next_event, today):
+    """How often to refresh a site with this risk level whose next open task falls on next_event (a date or None)."""
+    if next_event is not None:
+        days_away = (next_event - today).days
+        for within_days, by_risk, default in INTERVALS:
+            if days_away <= within_days:
+                return by_risk.get(risk_level, default)
+    return IDLE_INTERVAL
+
+
+def next_events(project_ids, now):
+    """{project_id: date of the next upcoming meeting or due date among its open tasks}."""
+    from work.models import WorkItem
+    today = timezone.localdate(now)
+    rows = (
+        WorkItem.objects.filter(project_id__in=project_ids)
+        .exclude(status=WorkItem.STATUS_DONE)
+        .values('project_id')
+        .annotate(
+            next_meeting=Min('meeting_at', filter=Q(meeting_at__gte=now)),
+            next_due=Min('due_date', filter=Q(due_date__gte=today)),
+        )
+    )
+    events = {}
+    for row in rows:
+        dates = [d for d in (row['next_meeting'] and timezone.localtime(row['next_meeting']).date(), row['next_due']) if d]
+        if dates:
+            events[row['project_id']] = min(dates)
+    return events
+
+
+def build_queue(now=None):
+    """
+    Heap of (-staleness, project_id) for active projects with an address that hasn't recently failed to
+    geocode. Staleness is the cached forecast's age over the project's refresh interval (inf if never
+    fetched); >= 1 means due.
+    """
+    from core.models import ProjectWeatherCache
+    from projects.models import Project
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    projects = Project.objects.filter(status=Project.STATUS_ACTIVE).only('pk', *ADDRESS_FIELDS)
+    keys = {p.pk: project_address_key(p) for p in projects if project_has_address(p)}
+    failed = failed_keys(keys.values(), now)
+    ids = [pk for pk, key in keys.items() if key not in failed]
+    caches = {
+        project_id: (fetched_at, risk_level)
+        for project_id, fetched_at, risk_level in ProjectWeatherCache.objects.filter(project_id__in=ids)
+        .values_list('project_id', 'fetched_at', 'risk_level')
+    }
+    events = next_events(ids, now)
+    heap = []
+    for pk in ids:
+        fetched_at, risk_level = caches.get(pk, (None, ''))
+        if fetched_at is None:
+            staleness = math.inf
+        else:
+            staleness = (now - fetched_at) / refresh_interval(risk_level, events.get(pk), today)
+        heap.append((-staleness, pk))
+    heapq.heapify(heap)
+    return heap
+
+
+def pop_due(heap, limit):
+    """Pop up to limit due project ids, most stale first."""
+    due = []
+    while heap and len(due) < limit and -heap[0][0] >= 1:
+        due.append(heapq.heappop(heap)[1])
+    return due
+
+
+def run_once(bucket=None, now=None, concurrency=None, calls_per_hour=None, burst=None):
+    """
+    Refresh the most stale due projects the budget allows and charge the bucket for the upstream calls
+    made. Without a bucket the persisted one is loaded (load_bucket) and saved back afterwards; a bucket
+    passed in is used as is. Returns {'due', 'refreshed', 'failed', 'deferred', 'calls', 'retry_after'}
+    where retry_after is the seconds until the budget allows another call.
+    """
+    from projects.models import Project
+    persist = bucket is None
+    if persist:
+        bucket = load_bucket(calls_per_hour, burst)
+    heap = build_queue(now)
+    due = sum(1 for staleness, _pk in heap if -staleness >= 1)
+    ids = pop_due(heap, max(0, int(bucket.available())))
+    summary = {'due': due, 'refreshed': [], 'failed': [], 'deferred': due - len(ids), 'calls': 0}
+    if ids:
+        result = refresh_projects(Project.objects.filter(pk__in=ids), concurrency=concurrency)
+        summary['calls'] = result['geocoded'] + result['forecast_requests']
+        bucket.spend(summary['calls'])
+        summary['refreshed'], summary['failed'] = result['refreshed'], result['failed']
+        if persist:
+            save_bucket(bucket)
+    summary['retry_after'] = bucket.seconds_until(1)
+    return summary
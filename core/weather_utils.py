@@ -3,151 +3,373 @@ Helpers for parsing cached forecast JSON and computing rain risk.
 Supports Open-Meteo daily (precipitation_sum, weathercode) and optional precip prob keys.
 """
 import json
-import urllib.request
+import logging
+import math
+import threading
 import urllib.parse
+from array import array
+from collections import OrderedDict
+from datetime import timedelta
 from decimal import Decimal
+from django.conf import settings
 from django.utils import timezone
 
+from core import upstream
+from core.geo import weather_cell
+from core.geocoding import FAILED, FOUND, NOT_FOUND, project_has_address
+
+logger = logging.getLogger(__name__)
+
 RISK_HIGH = 'HIGH'
 RISK_MODERATE = 'MODERATE'
 RISK_LOW = 'LOW'
 RISK_CLEAR = 'CLEAR'
 RISK_UNKNOWN = 'UNKNOWN'
 
+GEOCODE_BASE_URL = 'https://geocoding-api.open-meteo.com'
+FORECAST_BASE_URL = 'https://api.open-meteo.com'
+GEOCODE_PATH = '/v1/search'
+FORECAST_PATH = '/v1/forecast'
+HTTP_TIMEOUT = 10
+# Sites per multi-coordinate forecast request (keeps the URL well under common length limits)
+FORECAST_BATCH_SIZE = 50
+
 # WMO weather codes that imply rain (61,63,65=rain 80,81,82=showers 95,96,99=thunderstorm)
 RAIN_WEATHERCODES = {61, 63, 65, 80, 81, 82, 95, 96, 99}
 
 
-def get_daily_precip_prob(forecast_json, day_index):
-    """
-    Return 0-100 (int) precip probability for day at index, or None if unavailable.
-    Tries: precipitation_probability_max, precipitation_probability, precip_prob, pop;
-    else derives from precipitation_sum (mm) or weathercode.
-    """
-    if not forecast_json:
-        return None
-    try:
-        data = json.loads(forecast_json) if isinstance(forecast_json, str) else forecast_json
-    except (json.JSONDecodeError, TypeError):
-        return None
-    daily = data.get('daily') or {}
-    if day_index < 0:
-        return None
+PROB_KEYS = ('precipitation_probability_max', 'precipitation_probability', 'precip_prob', 'pop')
+_NO_PROB = -1
+_MEMO_SIZE = 2048
+
+
+def _precip_sum_to_prob(mm):
+    """Rough mapping from daily precipitation_sum (mm) to a probability %."""
+    if mm >= 10:
+        return 85
+    if mm >= 5:
+        return 60
+    if mm >= 2:
+        return 40
+    if mm >= 0.5:
+        return 20
+    return 0
+
+
+def _day_prob(daily, i):
     # Explicit prob keys (Open-Meteo can return precipitation_probability_max)
-    for key in ('precipitation_probability_max', 'precipitation_probability', 'precip_prob', 'pop'):
+    for key in PROB_KEYS:
         arr = daily.get(key)
-        if isinstance(arr, list) and day_index < len(arr):
-            val = arr[day_index]
-            if val is not None:
-                try:
-                    return min(100, max(0, int(float(val))))
-                except (TypeError, ValueError):
-                    pass
-    # Derive from precipitation_sum (mm): rough mapping to %
+        if isinstance(arr, list) and i < len(arr) and arr[i] is not None:
+            try:
+                return min(100, max(0, int(float(arr[i]))))
+            except (TypeError, ValueError):
+                pass
     precips = daily.get('precipitation_sum') or []
-    if day_index < len(precips):
+    if i < len(precips):
         try:
-            mm = float(precips[day_index])
-            if mm >= 10:
-                return 85
-            if mm >= 5:
-                return 60
-            if mm >= 2:
-                return 40
-            if mm >= 0.5:
-                return 20
-            return 0
+            return _precip_sum_to_prob(float(precips[i]))
         except (TypeError, ValueError):
             pass
     # Weathercode: if rain code, treat as 60%
     codes = daily.get('weathercode') or []
-    if day_index < len(codes):
+    if i < len(codes):
         try:
-            if int(codes[day_index]) in RAIN_WEATHERCODES:
+            if int(codes[i]) in RAIN_WEATHERCODES:
                 return 60
         except (TypeError, ValueError):
             pass
     return None
 
 
-def get_max_precip_prob_7day(forecast_json):
-    """Return max daily precipitation probability (0-100) across 7-day forecast, or None."""
-    if not forecast_json:
-        return None
-    try:
-        data = json.loads(forecast_json) if isinstance(forecast_json, str) else forecast_json
-    except (json.JSONDecodeError, TypeError):
-        return None
-    times = (data.get('daily') or {}).get('time') or []
-    if not times:
+def _floats(values, n):
+    """array('d') of the first n values; NaN where missing or not numeric."""
+    out = array('d', [math.nan]) * n
+    for i, value in enumerate((values or [])[:n]):
+        try:
+            out[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return out
+
+
+def _value(arr, i):
+    if i >= len(arr) or math.isnan(arr[i]):
         return None
-    max_prob = None
-    for i in range(min(7, len(times))):
-        p = get_daily_precip_prob(forecast_json, i)
-        if p is not None:
-            max_prob = p if max_prob is None else max(max_prob, p)
-    return max_prob
+    return arr[i]
 
 
-def get_risk_level(forecast_json):
+class Forecast:
+    """
+    One parsed forecast_json: dates plus compact per-day arrays (precip probability as array('b') with
+    -1 for missing, temperatures/precip/wind as array('d') with NaN). Build with Forecast.parse(), or
+    forecast_for(cache) to reuse the parse for the same (project_id, fetched_at).
     """
-    Use MAX daily precip prob across 7-day forecast.
-    HIGH: >= 50%; MODERATE: 30-49%; LOW: 10-29%; CLEAR: < 10%.
-    UNKNOWN only when forecast missing/failed.
+    __slots__ = ('dates', 'probs', 'temp_max', 'temp_min', 'precip', 'wind')
+
+    def __init__(self, data=None):
+        daily = (data.get('daily') if isinstance(data, dict) else None) or {}
+        self.dates = tuple(daily.get('time') or ())
+        n_days = len(self.dates)
+        # Probabilities may exist past the date list; keep every index get_daily_precip_prob could ask for
+        n_probs = max([n_days] + [
+            len(daily.get(key) or ()) for key in (*PROB_KEYS, 'precipitation_sum', 'weathercode')
+            if isinstance(daily.get(key) or (), list)
+        ])
+        probs = (_day_prob(daily, i) for i in range(n_probs))
+        self.probs = array('b', (_NO_PROB if p is None else p for p in probs))
+        self.temp_max = _floats(daily.get('temperature_2m_max'), n_days)
+        self.temp_min = _floats(daily.get('temperature_2m_min'), n_days)
+        self.precip = _floats(daily.get('precipitation_sum'), n_days)
+        self.wind = _floats(daily.get('windspeed_10m_max'), n_days)
+
+    @classmethod
+    def parse(cls, forecast_json):
+        """Forecast from JSON text or an already-decoded dict; empty if missing or invalid."""
+        if not forecast_json:
+            return cls()
+        if isinstance(forecast_json, str):
+            try:
+                forecast_json = json.loads(forecast_json)
+            except json.JSONDecodeError:
+                return cls()
+        return cls(forecast_json)
+
+    def daily_precip_prob(self, day_index):
+        """0-100 precip probability for the day at index, or None."""
+        if day_index < 0 or day_index >= len(self.probs) or self.probs[day_index] == _NO_PROB:
+            return None
+        return self.probs[day_index]
+
+    def preview(self, days=7):
+        """Daily probabilities (None where unavailable) for the first `days` dated days."""
+        return [self.daily_precip_prob(i) for i in range(min(days, len(self.dates)))]
+
+    def max_precip_prob_7day(self):
+        known = [p for p in self.preview(7) if p is not None]
+        return max(known) if known else None
+
+    def risk_level(self):
+        """
+        Use MAX daily precip prob across 7-day forecast.
+        HIGH: >= 50%; MODERATE: 30-49%; LOW: 10-29%; CLEAR: < 10%.
+        UNKNOWN only when forecast missing/failed.
+        """
+        max_prob = self.max_precip_prob_7day()
+        if max_prob is None:
+            return RISK_UNKNOWN
+        if max_prob >= 50:
+            return RISK_HIGH
+        if max_prob >= 30:
+            return RISK_MODERATE
+        if max_prob >= 10:
+            return RISK_LOW
+        return RISK_CLEAR
+
+    @property
+    def today_temp(self):
+        return _value(self.temp_max, 0)
+
+    def days(self):
+        """List of dicts: date, temp_max, temp_min, precip, precip_prob, wind."""
+        return [
+            {
+                'date': t,
+                'temp_max': _value(self.temp_max, i),
+                'temp_min': _value(self.temp_min, i),
+                'precip': _value(self.precip, i),
+                'precip_prob': self.daily_precip_prob(i),
+                'wind': _value(self.wind, i),
+            }
+            for i, t in enumerate(self.dates)
+        ]
+
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def forecast_for(cache):
+    """Parsed Forecast for a ProjectWeatherCache row (or None), memoized by (project_id, fetched_at)."""
+    if cache is None:
+        return Forecast()
+    if cache.fetched_at is None:
+        return Forecast.parse(cache.forecast_json)
+    key = (cache.project_id, cache.fetched_at)
+    with _memo_lock:
+        forecast = _memo.get(key)
+        if forecast is not None:
+            _memo.move_to_end(key)
+            return forecast
+    forecast = Forecast.parse(cache.forecast_json)
+    with _memo_lock:
+        _memo[key] = forecast
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return forecast
+
+
+# Wrappers kept for callers holding raw forecast_json; each parses once per call.
+
+def get_daily_precip_prob(forecast_json, day_index):
+    """
+    Return 0-100 (int) precip probability for day at index, or None if unavailable.
+    Tries: precipitation_probability_max, precipitation_probability, precip_prob, pop;
+    else derives from precipitation_sum (mm) or weathercode.
     """
-    max_prob = get_max_precip_prob_7day(forecast_json)
-    if max_prob is None:
-        return RISK_UNKNOWN
-    if max_prob >= 50:
-        return RISK_HIGH
-    if max_prob >= 30:
-        return RISK_MODERATE
-    if max_prob >= 10:
-        return RISK_LOW
-    return RISK_CLEAR
+    return Forecast.parse(forecast_json).daily_precip_prob(day_index)
+
+
+def get_max_precip_prob_7day(forecast_json):
+    """Return max daily precipitation probability (0-100) across 7-day forecast, or None."""
+    return Forecast.parse(forecast_json).max_precip_prob_7day()
+
+
+def get_risk_level(forecast_json):
+    """See Forecast.risk_level."""
+    return Forecast.parse(forecast_json).risk_level()
 
 
 def parse_forecast_days(forecast_json):
     """Return list of dicts: date, temp_max, temp_min, precip, precip_prob, wind (if present)."""
-    if not forecast_json:
-        return []
-    try:
-        data = json.loads(forecast_json) if isinstance(forecast_json, str) else forecast_json
-    except (json.JSONDecodeError, TypeError):
-        return []
-    daily = data.get('daily') or {}
-    times = daily.get('time') or []
-    result = []
-    for i, t in enumerate(times):
-        highs = daily.get('temperature_2m_max') or []
-        lows = daily.get('temperature_2m_min') or []
-        precips = daily.get('precipitation_sum') or []
-        winds = daily.get('windspeed_10m_max') or []
-        day = {
-            'date': t,
-            'temp_max': highs[i] if i < len(highs) else None,
-            'temp_min': lows[i] if i < len(lows) else None,
-            'precip': precips[i] if i < len(precips) else None,
-            'precip_prob': get_daily_precip_prob(forecast_json, i),
-            'wind': winds[i] if i < len(winds) else None,
-        }
-        result.append(day)
-    return result
+    return Forecast.parse(forecast_json).days()
+
+
+def geocode_url(base_url=None):
+    """
+    Geocoding endpoint under base_url (e.g. a core.fake_openmeteo server), else WEATHER_GEOCODE_BASE_URL.
+    """
+    return (base_url or getattr(settings, 'WEATHER_GEOCODE_BASE_URL', GEOCODE_BASE_URL)).rstrip('/') + GEOCODE_PATH
+
+
+def forecast_url(base_url=None):
+    """Forecast endpoint under base_url, else WEATHER_FORECAST_BASE_URL."""
+    return (base_url or getattr(settings, 'WEATHER_FORECAST_BASE_URL', FORECAST_BASE_URL)).rstrip('/') + FORECAST_PATH
+
+
+def _get_json(url, limiter=None):
+    """
+    GET url over a kept-alive connection and decode JSON; limiter (weather_refresh.HostRateLimiter) spaces
+    calls per host. Raises upstream.CircuitOpenError at once, without waiting on the limiter, while the host is failing.
+    """
+    host = urllib.parse.urlsplit(url).netloc
+    if limiter is not None and not upstream.client.breaker.is_open(host):
+        limiter.wait(host)
+    return upstream.client.get_json(url, timeout=HTTP_TIMEOUT)
+
+
+def geocode_status(city, state, limiter=None, base_url=None):
+    """
+    (lat, lon, status) for a city/state. status is FOUND, NOT_FOUND (the API had no
+    match) or FAILED (upstream errors or an open circuit; lat/lon are None for both failures).
+    base_url overrides the configured geocoding host.
+    """
+    query = f"{city}, {state}".strip(', ')
+    if not query:
+        return None, None, NOT_FOUND
+    # Try "City, CA" and "City, California" for better geocode results
+    queries_to_try = [query]
+    if state.upper() == 'CA':
+        queries_to_try.append(f"{city}, California".strip(', '))
+    status = NOT_FOUND
+    for q in queries_to_try:
+        url = geocode_url(base_url) + '?' + urllib.parse.urlencode({'name': q, 'count': 1})
+        try:
+            results = _get_json(url, limiter).get('results') or []
+        except upstream.CircuitOpenError:
+            return None, None, FAILED
+        except Exception as exc:
+            logger.info('Geocode failed for %r: %s', q, exc)
+            status = FAILED
+            continue
+        if results:
+            return float(results[0]['latitude']), float(results[0]['longitude']), FOUND
+    return None, None, status
+
+
+def geocode(city, state, limiter=None):
+    """(lat, lon) for a city/state from the geocoding API, or (None, None)."""
+    lat, lon, _status = geocode_status(city, state, limiter)
+    return lat, lon
+
+
+def fetch_forecasts(sites, limiter=None, base_url=None):
+    """
+    {cell: forecast dict} for sites given as {cell: (lat, lon)}, one request per FORECAST_BATCH_SIZE cells
+    using the API's comma-separated multi-coordinate form. Each cell is fetched at the coordinates given
+    for it, a real site (callers pass the first one they see), not the cell's center, which can sit
+    several km from every site in it. Cells in a failed batch are left out. base_url overrides the
+    configured forecast host.
+    """
+    sites = dict(sites)
+    cells = list(sites)
+    forecasts = {}
+    for i in range(0, len(cells), FORECAST_BATCH_SIZE):
+        batch = cells[i:i + FORECAST_BATCH_SIZE]
+        coords = [sites[cell] for cell in batch]
+        url = forecast_url(base_url) + '?' + urllib.parse.urlencode({
+            'latitude': ','.join(f'{float(lat):.4f}' for lat, _lon in coords),
+            'longitude': ','.join(f'{float(lon):.4f}' for _lat, lon in coords),
+            'daily': 'precipitation_probability_max,temperature_2m_max,temperature_2m_min,weathercode',
+            'timezone': 'America/Los_Angeles',
+            'forecast_days': 7,
+        })
+        try:
+            data = _get_json(url, limiter)
+        except upstream.CircuitOpenError:
+            break
+        except Exception as exc:
+            logger.info('Forecast batch of %d cell(s) failed: %s', len(batch), exc)
+            continue
+        # One location comes back as an object, several as a list in request order
+        results = data if isinstance(data, list) else [data]
+        if len(results) == len(batch):
+            forecasts.update(zip(batch, results))
+    return forecasts
 
 
-def _project_has_address(project):
-    return bool((getattr(project, 'city', None) or '').strip() or (getattr(project, 'state', None) or '').strip())
+def fetch_site_forecast(lat, lon, limiter=None):
+    """7-day daily forecast dict for a site's own coordinates, or None on failure."""
+    cell = weather_cell(lat, lon)
+    return fetch_forecasts({cell: (lat, lon)}, limiter).get(cell)
 
 
-def get_forecast_for_project(project, force_refresh=False):
+def _fresh_cell_forecast(cell, since, exclude_project_id):
+    """forecast_json already fetched since `since` for another site in the same grid cell, or None."""
+    from core.models import ProjectWeatherCache
+    return (
+        ProjectWeatherCache.objects.filter(
+            project__weather_location__geohash__gte=cell,
+            project__weather_location__geohash__lt=cell + '~',
+            fetched_at__gte=since,
+        )
+        .exclude(project_id=exclude_project_id)
+        .exclude(forecast_json='')
+        .order_by('-fetched_at')
+        .values_list('forecast_json', flat=True)
+        .first()
+    )
+
+
+def get_forecast_ttl():
+    """How long a cached forecast is served as-is by get_forecast_for_project (WEATHER_FORECAST_TTL_MINUTES)."""
+    return timedelta(minutes=getattr(settings, 'WEATHER_FORECAST_TTL_MINUTES', 15))
+
+
+def get_forecast_for_project(project, force_refresh=False, shared=None):
     """
     Return structured forecast for project or None.
-    Uses Open-Meteo; caches in ProjectWeatherCache with 6h TTL unless force_refresh=True.
+    Uses Open-Meteo; caches in ProjectWeatherCache for get_forecast_ttl() (15 min by default) unless
+    force_refresh=True. Background refreshes are paced per project by core.weather_schedule.
+    Forecasts are fetched at the site's coordinates and shared by the sites in its grid cell
+    (core.geo.weather_cell, about 5 km square): via `shared` (cell -> forecast dict, kept by the caller across one refresh run)
+    or, without force_refresh, via another site's still-fresh cache row.
+    Coordinates come from core.geocoding, which only calls the geocoder when the address has changed.
     Return shape: { "city", "state", "lat", "lon", "daily": [ {"date", "temp_max", "temp_min", "precip_prob", "weather_code"?} ] } or None.
     """
     from core.models import ProjectWeatherCache, ProjectWeatherLocation
 
-    if not _project_has_address(project):
+    if not project_has_address(project):
         return None
     city = (getattr(project, 'city', None) or '').strip()
     state = (getattr(project, 'state', None) or '').strip()
@@ -155,12 +377,11 @@ def get_forecast_for_project(project, force_refresh=False):
     cache = ProjectWeatherCache.objects.filter(project=project).first()
     location = ProjectWeatherLocation.objects.filter(project=project).first()
     now = timezone.now()
-    # 15 min cache to avoid rate limits while keeping data fresh
-    cache_ttl_seconds = 15 * 60
+    ttl = get_forecast_ttl()
 
     if not force_refresh and cache and cache.fetched_at and cache.forecast_json:
-        if (now - cache.fetched_at).total_seconds() < cache_ttl_seconds:
-            daily = parse_forecast_days(cache.forecast_json)
+        if now - cache.fetched_at < ttl:
+            daily = forecast_for(cache).days()
             return {
                 'city': city,
                 'state': state,
@@ -169,54 +390,37 @@ def get_forecast_for_project(project, force_refresh=False):
                 'daily': daily,
             }
 
-    query = f"{city}, {state}".strip(', ')
-    if not query:
-        return None
-    # Try "City, CA" and "City, California" for better geocode results
-    queries_to_try = [query]
-    if state.upper() == 'CA' and query:
-        queries_to_try.append(f"{city}, California".strip(', '))
-    lat, lon = None, None
-    for q in queries_to_try:
-        url = 'https://geocoding-api.open-meteo.com/v1/search?' + urllib.parse.urlencode({'name': q, 'count': 1})
-        try:
-            with urllib.request.urlopen(url, timeout=10) as r:
-                data = json.loads(r.read().decode())
-                results = data.get('results') or []
-                if results:
-                    lat = float(results[0]['latitude'])
-                    lon = float(results[0]['longitude'])
-                    break
-        except Exception:
-            continue
+    from core.geocoding import project_address_key, resolve_project
+    lat, lon = resolve_project(project, geocode_status)
     if lat is None or lon is None:
         return None
 
-    forecast_url = (
-        'https://api.open-meteo.com/v1/forecast?'
-        + urllib.parse.urlencode({
-            'latitude': lat,
-            'longitude': lon,
-            'daily': 'precipitation_probability_max,temperature_2m_max,temperature_2m_min,weathercode',
-            'timezone': 'America/Los_Angeles',
-            'forecast_days': 7,
-        })
-    )
-    try:
-        with urllib.request.urlopen(forecast_url, timeout=10) as r:
-            forecast = json.loads(r.read().decode())
-    except Exception:
-        return None
+    cell = weather_cell(lat, lon)
+    forecast = shared.get(cell) if shared is not None else None
+    if forecast is None and not force_refresh:
+        cached = _fresh_cell_forecast(cell, now - ttl, project.pk)
+        forecast = json.loads(cached) if cached else None
+    if forecast is None:
+        forecast = fetch_site_forecast(lat, lon)
+        if forecast is None:
+            return None
+    if shared is not None:
+        shared[cell] = forecast
 
     ProjectWeatherLocation.objects.update_or_create(
         project=project,
-        defaults={'lat': Decimal(str(lat)), 'lon': Decimal(str(lon)), 'geocode_source': 'open-meteo'}
+        defaults={
+            'lat': Decimal(str(lat)),
+            'lon': Decimal(str(lon)),
+            'address_key': project_address_key(project),
+            'geocode_source': 'open-meteo',
+        }
     )
     ProjectWeatherCache.objects.update_or_create(
         project=project,
         defaults={'forecast_json': json.dumps(forecast), 'fetched_at': now}
     )
-    daily = parse_forecast_days(json.dumps(forecast))
+    daily = Forecast(forecast).days()
     return {
         'city': city,
         'state': state,
@@ -131,6 +131,43 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
+# Overtime thresholds (hours) used by time_tracking.overtime to split logged time per user
+TIME_OVERTIME_DAILY_HOURS = 8
+TIME_OVERTIME_WEEKLY_HOURS = 40
+# Planned hours per open task, used by the utilization report to turn due tasks into load
+TIME_UTILIZATION_TASK_HOURS = 4
+
+# Max age (seconds) of the in-process project search index before it is rebuilt (projects.search)
+PROJECT_SEARCH_INDEX_TTL = 300
+
+# Open-Meteo endpoints (core.weather_utils); point both at core.fake_openmeteo for offline tests and benchmarks
+WEATHER_GEOCODE_BASE_URL = os.environ.get('WEATHER_GEOCODE_BASE_URL', 'https://geocoding-api.open-meteo.com')
+WEATHER_FORECAST_BASE_URL = os.environ.get('WEATHER_FORECAST_BASE_URL', 'https://api.open-meteo.com')
+# refresh_weather: parallel upstream fetches and requests/second allowed per host (core.weather_refresh)
+WEATHER_REFRESH_CONCURRENCY = 8
+WEATHER_RATE_LIMIT_PER_HOST = 10
+# Age after which a shared geocode result (core.geocoding) is looked up again
+GEOCODE_CACHE_TTL_DAYS = 90
+# How long failed geocodes are remembered: addresses Open-Meteo can't place, and upstream errors
+GEOCODE_NOT_FOUND_TTL_HOURS = 24
+GEOCODE_FAILURE_TTL_MINUTES = 15
+# Days of forecast history kept at full refresh resolution before compact_forecast_history thins it to daily
+WEATHER_HISTORY_HOURLY_DAYS = 14
+# Weather upstream circuit breaker (core.upstream): consecutive failures that open it, and its backoff
+# (doubled after each failed trial call, up to the max)
+WEATHER_CIRCUIT_FAILURES = 5
+WEATHER_CIRCUIT_BACKOFF_SECONDS = 30
+WEATHER_CIRCUIT_MAX_BACKOFF_SECONDS = 900
+# Age below which get_forecast_for_project serves the cached forecast without refetching
+WEATHER_FORECAST_TTL_MINUTES = 15
+# schedule_weather: upstream calls allowed per hour (token bucket) and the largest burst (core.weather_schedule)
+WEATHER_SCHEDULE_CALLS_PER_HOUR = 600
+WEATHER_SCHEDULE_BURST = 60
+# A run_jobs worker not seen for this long counts as stopped; the weather pages then say no worker is running
+JOBS_WORKER_TIMEOUT_SECONDS = 120
+# Run a weather refresh inside the request when no worker is running (blocks on upstream fetches; off by default)
+WEATHER_REFRESH_INLINE_WITHOUT_WORKER = False
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,126 @@
+"""
+Project overview panel: hours by week, task counts, overdue tasks, open update requests and weather risk.
+Built from a fixed set of aggregate queries (independent of how many tasks/entries a project has) and
+cached per project; signals on time entries, tasks, update requests and the weather cache call
+invalidate() so the next view rebuilds it.
+"""
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncWeek
+
+from core.data_version import bump_version, get_version
+from core.geocoding import project_has_address
+from core.models import ProjectWeatherCache
+from core.weather_utils import RISK_UNKNOWN
+from time_tracking.models import TimeEntry
+from work.models import UpdateRequest, WorkItem
+
+HOURS_WEEKS = 26
+OVERDUE_LIMIT = 10
+CACHE_SECONDS = 30 * 60
+
+
+def version_name(project_id):
+    return f'project:{project_id}'
+
+
+def invalidate(*project_ids):
+    """Drop cached panels for these projects (None ids are ignored)."""
+    bump_version(*[version_name(pk) for pk in set(project_ids) if pk])
+
+
+def _hours_by_week(project, today):
+    first = today - timedelta(days=today.weekday()) - timedelta(weeks=HOURS_WEEKS - 1)
+    weeks = [first + timedelta(weeks=i) for i in range(HOURS_WEEKS)]
+    rows = (
+        TimeEntry.objects.filter(project=project, date__gte=first)
+        .annotate(week=TruncWeek('date'))
+        .values_list('week')
+        .annotate(total=Sum('hours'))
+        .order_by()
+    )
+    totals = {week: float(total or 0) for week, total in rows}
+    peak = max(totals.values(), default=0)
+    return [
+        {'week_start': w, 'hours': totals.get(w, 0.0), 'pct': round(100 * totals.get(w, 0.0) / peak) if peak else 0}
+        for w in weeks
+    ]
+
+
+def _task_counts(project, today):
+    """One grouped query -> counts by status, by type, and the overdue total."""
+    open_statuses = (WorkItem.STATUS_OPEN, WorkItem.STATUS_IN_PROGRESS)
+    rows = (
+        WorkItem.objects.filter(project=project)
+        .values_list('status', 'work_type')
+        .annotate(n=Count('id'), overdue=Count('id', filter=Q(due_date__lt=today, status__in=open_statuses)))
+        .order_by()
+    )
+    status_labels = dict(WorkItem.STATUS_CHOICES)
+    type_labels = dict(WorkItem.WORK_TYPE_CHOICES)
+    by_status = {value: 0 for value, _label in WorkItem.STATUS_CHOICES}
+    by_type = {}
+    overdue = 0
+    for status, work_type, n, late in rows:
+        by_status[status] = by_status.get(status, 0) + n
+        by_type[work_type] = by_type.get(work_type, 0) + n
+        overdue += late
+    return {
+        'by_status': [(status_labels.get(k, k), v) for k, v in by_status.items()],
+        'by_type': sorted(((type_labels.get(k, k), v) for k, v in by_type.items()), key=lambda r: (-r[1], r[0])),
+        'total': sum(by_status.values()),
+        'overdue_count': overdue,
+    }
+
+
+def _weather(project):
+    if not project_has_address(project):
+        return {'risk_level': RISK_UNKNOWN, 'max_precip_prob': None, 'fetched_at': None}
+    row = (
+        ProjectWeatherCache.objects.filter(project=project)
+        .values_list('risk_level', 'max_precip_prob', 'fetched_at')
+        .first()
+    )
+    risk_level, max_precip_prob, fetched_at = row or (RISK_UNKNOWN, None, None)
+    return {'risk_level': risk_level, 'max_precip_prob': max_precip_prob, 'fetched_at': fetched_at}
+
+
+def build_analytics(project, today=None):
+    """Uncached panel data for project (at most 5 queries, however much data the project has)."""
+    today = today or date.today()
+    overdue_tasks = list(
+        WorkItem.objects.filter(
+            project=project,
+            due_date__lt=today,
+            status__in=(WorkItem.STATUS_OPEN, WorkItem.STATUS_IN_PROGRESS),
+        )
+        .order_by('due_date', 'priority')
+        .values('id', 'title', 'due_date', 'priority', 'assigned_to__username')[:OVERDUE_LIMIT]
+    )
+    open_requests = list(
+        UpdateRequest.objects.filter(project=project, reply_confirmed_at__isnull=True)
+        .order_by('due_at')
+        .values('id', 'title', 'target_users', 'due_at')
+    )
+    hours = _hours_by_week(project, today)
+    return {
+        'hours_by_week': hours,
+        'hours_window_total': sum(w['hours'] for w in hours),
+        'tasks': _task_counts(project, today),
+        'overdue_tasks': overdue_tasks,
+        'open_update_requests': open_requests,
+        'weather': _weather(project),
+    }
+
+
+def project_analytics(project):
+    """Cached panel data; the key includes today's date because overdue and week windows move daily."""
+    today = date.today()
+    key = f'project_analytics:{project.pk}:{today.isoformat()}:{get_version(version_name(project.pk))}'
+    data = cache.get(key)
+    if data is None:
+        data = build_analytics(project, today)
+        cache.set(key, data, CACHE_SECONDS)
+    return data
@@ -18,6 +18,14 @@ class ProjectForm(forms.ModelForm):
         self.fields['address_line2'].required = False
         self.fields['country'].required = False
 
+    def clean_project_number(self):
+        number = self.cleaned_data['project_number']
+        # The default manager hides projects still being deleted, but their numbers are taken until the job finishes
+        pending = Project.all_objects.filter(project_number=number, deleted_at__isnull=False).exclude(pk=self.instance.pk)
+        if pending.exists():
+            raise forms.ValidationError('A project with this number is still being deleted. Try again shortly.')
+        return number
+
     def clean(self):
         data = super().clean()
         # Require address only on create so legacy projects without address can be saved on edit
@@ -25,4 +33,12 @@ class ProjectForm(forms.ModelForm):
             for f in ('address_line1', 'city', 'state', 'zip_code'):
                 if not (data.get(f) or '').strip():
                     self.add_error(f, 'Required for project address.')
-        return data
\ No newline at end of file
+        return data
+
+class ProjectImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label='CSV file',
+        help_text='Header row with project_number plus any of: name, address_line1, address_line2, city, '
+                  'state, zip_code, country, client, pm, status, notes. Missing columns are left unchanged.',
+    )
+    dry_run = forms.BooleanField(label='Preview only (no changes)', required=False)
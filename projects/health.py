@@ -0,0 +1,124 @@
+"""
+Project health: one ProjectHealth row per project with the signals managers otherwise collect by hand
+(overdue and open tasks, hour burn vs the 4-week average, weather risk, stale update requests) and a
+composite 0-100 score (100 = healthy). refresh() recomputes a set of projects with a fixed number of
+grouped queries and upserts their rows; signals call it for the projects a write touched, and
+`manage.py refresh_project_health` (refresh_all) recomputes everything daily (overdue/burn windows move with the date).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from core.geocoding import project_has_address
+from core.models import ProjectWeatherCache
+from core.weather_utils import RISK_HIGH, RISK_MODERATE, RISK_UNKNOWN
+from time_tracking.models import TimeEntry
+from work.models import UpdateRequest, WorkItem
+from .models import Project, ProjectHealth
+
+OVERDUE_PENALTY, OVERDUE_MAX = 10, 40
+STALE_REQUEST_PENALTY, STALE_REQUEST_MAX = 5, 20
+WEATHER_PENALTY = {RISK_HIGH: 20, RISK_MODERATE: 10}
+# (burn ratio threshold, penalty), checked from the top
+BURN_PENALTIES = ((2.0, 20), (1.5, 10))
+WATCH_BELOW, AT_RISK_BELOW = 80, 50
+
+FIELDS = (
+    'overdue_count', 'open_task_count', 'hours_last_7_days', 'hours_4wk_avg',
+    'weather_risk', 'stale_update_requests', 'score', 'level', 'computed_at',
+)
+
+
+def score_health(overdue, stale_requests, weather_risk, hours_7, hours_avg):
+    """Composite score and level from the raw signals."""
+    penalty = min(OVERDUE_MAX, overdue * OVERDUE_PENALTY)
+    penalty += min(STALE_REQUEST_MAX, stale_requests * STALE_REQUEST_PENALTY)
+    penalty += WEATHER_PENALTY.get(weather_risk, 0)
+    if hours_avg:
+        ratio = float(hours_7 / hours_avg)
+        penalty += next((p for threshold, p in BURN_PENALTIES if ratio >= threshold), 0)
+    score = max(0, 100 - penalty)
+    if score < AT_RISK_BELOW:
+        level = ProjectHealth.LEVEL_AT_RISK
+    elif score < WATCH_BELOW:
+        level = ProjectHealth.LEVEL_WATCH
+    else:
+        level = ProjectHealth.LEVEL_GOOD
+    return score, level
+
+
+def compute(projects, today=None):
+    """Unsaved ProjectHealth rows for projects (iterable of Project) from five grouped queries."""
+    today = today or date.today()
+    ids = [p.pk for p in projects]
+    open_statuses = (WorkItem.STATUS_OPEN, WorkItem.STATUS_IN_PROGRESS)
+    tasks = {
+        row['project_id']: row
+        for row in WorkItem.objects.filter(project_id__in=ids, status__in=open_statuses)
+        .values('project_id')
+        .annotate(open=Count('id'), overdue=Count('id', filter=Q(due_date__lt=today)))
+        .order_by()
+    }
+    week_from, month_from = today - timedelta(days=6), today - timedelta(days=34)
+    hours = {
+        row['project_id']: row
+        for row in TimeEntry.objects.filter(project_id__in=ids, date__gte=month_from, date__lte=today)
+        .values('project_id')
+        .annotate(
+            last_7=Sum('hours', filter=Q(date__gte=week_from)),
+            prior_28=Sum('hours', filter=Q(date__lt=week_from)),
+        )
+        .order_by()
+    }
+    stale = dict(
+        UpdateRequest.objects.filter(project_id__in=ids, reply_confirmed_at__isnull=True, due_at__lt=timezone.now())
+        .values_list('project_id')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    risks = dict(ProjectWeatherCache.objects.filter(project_id__in=ids).values_list('project_id', 'risk_level'))
+    rows = []
+    for project in projects:
+        t = tasks.get(project.pk, {})
+        h = hours.get(project.pk, {})
+        hours_7 = h.get('last_7') or Decimal('0')
+        hours_avg = ((h.get('prior_28') or Decimal('0')) / 4).quantize(Decimal('0.01'))
+        weather = risks.get(project.pk, RISK_UNKNOWN) if project_has_address(project) else RISK_UNKNOWN
+        score, level = score_health(t.get('overdue', 0), stale.get(project.pk, 0), weather, hours_7, hours_avg)
+        rows.append(ProjectHealth(
+            project=project,
+            overdue_count=t.get('overdue', 0),
+            open_task_count=t.get('open', 0),
+            hours_last_7_days=hours_7,
+            hours_4wk_avg=hours_avg,
+            weather_risk=weather,
+            stale_update_requests=stale.get(project.pk, 0),
+            score=score,
+            level=level,
+        ))
+    return rows
+
+
+def _upsert(projects):
+    rows = compute(projects)
+    if rows:
+        ProjectHealth.objects.bulk_create(
+            rows, batch_size=500, update_conflicts=True, unique_fields=['project'], update_fields=FIELDS,
+        )
+    return len(rows)
+
+
+def refresh(*project_ids):
+    """Recompute and upsert health for these projects (None ids are ignored)."""
+    ids = {pk for pk in project_ids if pk}
+    if not ids:
+        return 0
+    return _upsert(list(Project.objects.filter(pk__in=ids).only('id', 'city', 'state')))
+
+
+def refresh_all(batch_size=500):
+    """Recompute every project, a batch at a time. Returns the number of rows written."""
+    ids = list(Project.objects.order_by('pk').values_list('pk', flat=True))
+    return sum(refresh(*ids[i:i + batch_size]) for i in range(0, len(ids), batch_size))
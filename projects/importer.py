@@ -0,0 +1,149 @@
+"""
+Idempotent project import from a CSV master list, keyed on project_number.
+Existing projects are fetched in one query; new rows go through bulk_create and changed rows through
+bulk_update grouped by the exact set of fields that changed. Columns missing from the file are left alone,
+and so are blank name/client/pm cells on existing projects (those fields are required). A blank country
+cell also keeps the existing value, and is left out of new projects so the model default (US) applies.
+"""
+import csv
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.geocoding import ADDRESS_FIELDS, forget_locations, project_address_key
+from .models import Project
+
+KEY_FIELD = 'project_number'
+SYNC_FIELDS = (
+    'name', 'address_line1', 'address_line2', 'city', 'state', 'zip_code', 'country',
+    'client', 'pm', 'status', 'notes',
+)
+REQUIRED_ON_CREATE = ('name', 'client', 'pm')
+DEFAULTED_FIELDS = ('country',)
+BATCH_SIZE = 500
+
+_STATUS_ALIASES = {}
+for _value, _label in Project.STATUS_CHOICES:
+    _STATUS_ALIASES[_value] = _value
+    _STATUS_ALIASES[_label.lower()] = _value
+_STATUS_ALIASES['completed'] = Project.STATUS_COMPLETE
+
+
+def _header_key(name):
+    return (name or '').strip().lower().replace(' ', '_')
+
+
+def parse_csv(lines):
+    """
+    Read CSV rows (an iterable of text lines). Returns (rows, columns, errors):
+    rows maps project_number -> {field: value} for the SYNC_FIELDS present in the header,
+    errors is a list of (line number, message).
+    """
+    reader = csv.DictReader(lines)
+    header = {_header_key(h): h for h in (reader.fieldnames or [])}
+    if KEY_FIELD not in header:
+        return {}, (), [(1, 'Missing project_number column.')]
+    columns = tuple(f for f in SYNC_FIELDS if f in header)
+    max_lengths = {f: Project._meta.get_field(f).max_length for f in columns}
+    rows, errors = {}, []
+    for line, raw in enumerate(reader, start=2):
+        number = (raw.get(header[KEY_FIELD]) or '').strip()
+        if not number:
+            errors.append((line, 'Missing project_number.'))
+            continue
+        if number in rows:
+            errors.append((line, f'Duplicate project_number {number}.'))
+            continue
+        values = {f: (raw.get(header[f]) or '').strip() for f in columns}
+        if 'status' in values:
+            status = _STATUS_ALIASES.get(values['status'].lower())
+            if status is None:
+                errors.append((line, f'Unknown status "{values["status"]}".'))
+                continue
+            values['status'] = status
+        too_long = [f for f, n in max_lengths.items() if n and len(values[f]) > n]
+        if too_long:
+            errors.append((line, f'Too long: {", ".join(too_long)}.'))
+            continue
+        rows[number] = values
+    return rows, columns, errors
+
+
+def sync_projects(rows, columns, dry_run=False):
+    """
+    Apply parsed rows. Returns {'created', 'updated', 'unchanged', 'errors'} where errors lists
+    project numbers that could not be created (missing required columns/values).
+    """
+    existing = {
+        p.project_number: p
+        for p in Project.all_objects.filter(project_number__in=list(rows)).only(
+            'id', KEY_FIELD, 'deleted_at', *ADDRESS_FIELDS, *columns
+        )
+    }
+    to_create, errors, moved = [], [], []
+    changed_groups = defaultdict(list)
+    unchanged = 0
+    for number, values in rows.items():
+        project = existing.get(number)
+        if project is not None and project.deleted_at:
+            errors.append(f'{number}: project is being deleted.')
+            continue
+        if project is None:
+            missing = [f for f in REQUIRED_ON_CREATE if not values.get(f)]
+            if missing:
+                errors.append(f'{number}: new project needs {", ".join(missing)}.')
+                continue
+            to_create.append(Project(
+                project_number=number, **{f: v for f, v in values.items() if v or f not in DEFAULTED_FIELDS}
+            ))
+            continue
+        changed = tuple(
+            f for f in columns
+            if getattr(project, f) != values[f] and (values[f] or f not in REQUIRED_ON_CREATE + DEFAULTED_FIELDS)
+        )
+        if not changed:
+            unchanged += 1
+            continue
+        old_key = project_address_key(project)
+        for f in changed:
+            setattr(project, f, values[f])
+        if project_address_key(project) != old_key:
+            moved.append(project.pk)
+        changed_groups[changed].append(project)
+    updated = sum(len(group) for group in changed_groups.values())
+    if not dry_run and (to_create or updated):
+        with transaction.atomic():
+            if to_create:
+                Project.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+            now = timezone.now()
+            for fields, projects in changed_groups.items():
+                for project in projects:
+                    project.updated_at = now  # bulk_update skips auto_now
+                Project.objects.bulk_update(projects, fields + ('updated_at',), batch_size=BATCH_SIZE)
+        _after_bulk_write(
+            [p.pk for group in changed_groups.values() for p in group],
+            [p.project_number for p in to_create],
+            moved,
+        )
+    return {'created': len(to_create), 'updated': updated, 'unchanged': unchanged, 'errors': errors}
+
+
+def _after_bulk_write(updated_ids, created_numbers, moved_ids=()):
+    """Bulk writes skip Project signals; refresh what those signals would have. moved_ids changed address."""
+    from . import analytics, health, search
+    forget_locations(*moved_ids)
+    search.invalidate()
+    analytics.invalidate(*updated_ids)
+    created_ids = Project.objects.filter(project_number__in=created_numbers).values_list('pk', flat=True)
+    health.refresh(*updated_ids, *created_ids)
+
+
+def import_projects(lines, dry_run=False):
+    """Parse and apply a CSV. Returns the sync counts plus 'errors' from both steps as strings."""
+    rows, columns, parse_errors = parse_csv(lines)
+    result = sync_projects(rows, columns, dry_run=dry_run) if rows else {
+        'created': 0, 'updated': 0, 'unchanged': 0, 'errors': [],
+    }
+    result['errors'] = [f'Line {line}: {msg}' for line, msg in parse_errors] + result['errors']
+    return result
@@ -0,0 +1,120 @@
+"""
+Background project deletion. The view only sets Project.deleted_at (hiding it) and queues the job;
+the job removes children in bounded batches, each in its own short transaction, so the SQLite
+write lock is never held for more than one batch. Per-row signal follow-up is muted (core.bulk) while
+it runs; overtime is reclassified per batch and caches are invalidated once at the end. If the job
+fails, the project is un-hidden so it can be seen and deleted again rather than left half-removed.
+Jobs run in the `manage.py run_jobs` worker (see README).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from core.bulk import mute_signals
+from core.data_version import bump_version
+from core.jobs import enqueue, job_progress, register
+from core.models import ForecastHistory, ProjectWeatherCache, ProjectWeatherLocation, WhiteboardCard
+from time_tracking.models import TimeEntry
+from time_tracking.overtime import classify_overtime
+from work.models import UpdateRequest, WorkItem
+from . import analytics, search
+from .models import Project
+
+DELETE_PROJECT = 'delete_project'
+BATCH_SIZE = 500
+
+
+def queue_project_deletion(project, user=None):
+    """Hide the project now and queue removal of it and everything under it. Returns the job."""
+    from django.utils import timezone
+    now = timezone.now()
+    Project.all_objects.filter(pk=project.pk, deleted_at__isnull=True).update(deleted_at=now, updated_at=now)
+    search.invalidate()
+    job, _created = enqueue(DELETE_PROJECT, {'project_id': project.pk}, key=f'project:{project.pk}', user=user)
+    return job
+
+
+def _restore(project_id):
+    """Undo queue_project_deletion's hiding after a failed run."""
+    from django.utils import timezone
+    Project.all_objects.filter(pk=project_id).update(deleted_at=None, updated_at=timezone.now())
+    search.invalidate()
+
+
+def _batches(queryset):
+    """Yield lists of up to BATCH_SIZE primary keys until the queryset is empty."""
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+        if not ids:
+            return
+        yield ids
+
+
+def _delete_time_entries(project_id, advance):
+    """
+    Per-row signals would reclassify overtime once per entry, so with them muted each affected
+    user's date range is reclassified once per batch instead.
+    """
+    entries = TimeEntry.objects.filter(project_id=project_id)
+    for ids in _batches(entries):
+        batch = TimeEntry.objects.filter(pk__in=ids)
+        ranges = defaultdict(list)
+        for user_id, day in batch.values_list('user_id', 'date'):
+            ranges[user_id].append(day)
+        with transaction.atomic():
+            batch.delete()
+        for user_id, days in ranges.items():
+            classify_overtime(min(days), max(days), user_ids=[user_id])
+        advance(len(ids))
+
+
+def _delete_rows(queryset, advance):
+    """Batch delete through the ORM so cascades and SET_NULL still run."""
+    model = queryset.model
+    for ids in _batches(queryset):
+        with transaction.atomic():
+            model._base_manager.filter(pk__in=ids).delete()
+        advance(len(ids))
+
+
+@register(DELETE_PROJECT)
+def delete_project(job, payload):
+    project_id = payload['project_id']
+    project = Project.all_objects.filter(pk=project_id).first()
+    if project is None:
+        job_progress(job, message='Project already deleted.')
+        return
+    steps = [
+        ('time entries', TimeEntry.objects.filter(project_id=project_id)),
+        ('update requests', UpdateRequest.objects.filter(project_id=project_id)),
+        ('tasks', WorkItem.all_objects.filter(project_id=project_id)),
+        ('forecast history', ForecastHistory.objects.filter(project_id=project_id)),
+    ]
+    cards = WhiteboardCard.objects.filter(linked_project_id=project_id)
+    total = sum(qs.count() for _label, qs in steps) + 1
+    done = 0
+
+    def advance(n, label):
+        nonlocal done
+        done += n
+        job_progress(job, done=done, message=f'Deleting {label}...')
+
+    job_progress(job, done=0, total=total, message=f'Deleting {project.project_number}...')
+    try:
+        with mute_signals():
+            _delete_time_entries(project_id, lambda n: advance(n, 'time entries'))
+            for label, qs in steps[1:]:
+                _delete_rows(qs, lambda n, label=label: advance(n, label))
+            with transaction.atomic():
+                cards.update(linked_project=None)
+                ProjectWeatherCache.objects.filter(project_id=project_id).delete()
+                ProjectWeatherLocation.objects.filter(project_id=project_id).delete()
+                project.delete()
+    except Exception:
+        _restore(project_id)
+        raise
+    finally:
+        # Even a failed run has removed rows; drop what the muted handlers would have invalidated
+        bump_version('time_entries', 'work_items')
+        analytics.invalidate(project_id)
+    job_progress(job, done=total, message=f'Deleted {project.project_number}.')
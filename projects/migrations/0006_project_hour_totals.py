@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:22
+
+from datetime import date, timedelta
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_hour_totals(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    TimeEntry = apps.get_model('time_tracking', 'TimeEntry')
+    entries = TimeEntry.objects.filter(project__isnull=False).values_list('project_id').order_by()
+    for project_id, total in entries.annotate(t=Sum('hours')):
+        Project.objects.filter(pk=project_id).update(total_hours=total)
+    today = date.today()
+    week_start = today - timedelta(days=today.weekday())
+    this_week = entries.filter(date__gte=week_start, date__lte=week_start + timedelta(days=6))
+    for project_id, total in this_week.annotate(t=Sum('hours')):
+        Project.objects.filter(pk=project_id).update(hours_this_week=total, hours_week_start=week_start)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_add_project_address'),
+        ('time_tracking', '0006_timeentry_approval_and_timesheetlock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='hours_this_week',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='hours_week_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='total_hours',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(backfill_hour_totals, noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_project_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectHealth',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='health', serialize=False, to='projects.project')),
+                ('overdue_count', models.PositiveIntegerField(default=0)),
+                ('open_task_count', models.PositiveIntegerField(default=0)),
+                ('hours_last_7_days', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('hours_4wk_avg', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('weather_risk', models.CharField(blank=True, max_length=20)),
+                ('stale_update_requests', models.PositiveIntegerField(default=0)),
+                ('score', models.PositiveSmallIntegerField(db_index=True, default=100)),
+                ('level', models.CharField(choices=[('good', 'Good'), ('watch', 'Watch'), ('at_risk', 'At risk')], db_index=True, default='good', max_length=20)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'projects_projecthealth',
+            },
+        ),
+    ]
@@ -2,6 +2,13 @@ from django.conf import settings
 from django.db import models
 
 
+class ProjectManager(models.Manager):
+    """Hides projects queued for background deletion (deleted_at set)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Project(models.Model):
     STATUS_ACTIVE = 'active'
     STATUS_ON_HOLD = 'on_hold'
@@ -31,6 +38,17 @@ class Project(models.Model):
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
     notes = models.TextField(blank=True)
+    # Denormalized from TimeEntry by time_tracking signals; repair with `manage.py repair_time_rollups`
+    total_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_index=True)
+    hours_this_week = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    hours_week_start = models.DateField(null=True, blank=True)
+    # Set when deletion is queued; the row and its children are removed by the delete_project job
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Incremental analytics export key; .update()/bulk_update() callers must set it themselves
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ProjectManager()
+    all_objects = models.Manager()
 
     class Meta:
         db_table = 'projects_project'
@@ -38,3 +56,54 @@ class Project(models.Model):
 
     def __str__(self):
         return self.name
+
+    @property
+    def week_hours(self):
+        """hours_this_week if it was last maintained during the current week, else 0."""
+        from datetime import date, timedelta
+        today = date.today()
+        if self.hours_week_start != today - timedelta(days=today.weekday()):
+            return 0
+        return self.hours_this_week
+
+
+class ProjectHealth(models.Model):
+    """Precomputed health signals for one project; maintained by projects.health."""
+    LEVEL_GOOD = 'good'
+    LEVEL_WATCH = 'watch'
+    LEVEL_AT_RISK = 'at_risk'
+    LEVEL_CHOICES = [
+        (LEVEL_GOOD, 'Good'),
+        (LEVEL_WATCH, 'Watch'),
+        (LEVEL_AT_RISK, 'At risk'),
+    ]
+
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='health',
+    )
+    overdue_count = models.PositiveIntegerField(default=0)
+    open_task_count = models.PositiveIntegerField(default=0)
+    hours_last_7_days = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    hours_4wk_avg = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    weather_risk = models.CharField(max_length=20, blank=True)
+    stale_update_requests = models.PositiveIntegerField(default=0)
+    # 100 = healthy; penalties for overdue work, stale requests, weather and hour spikes
+    score = models.PositiveSmallIntegerField(default=100, db_index=True)
+    level = models.CharField(max_length=20, choices=LEVEL_CHOICES, default=LEVEL_GOOD, db_index=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'projects_projecthealth'
+
+    def __str__(self):
+        return f"{self.project_id}: {self.score}"
+
+    @property
+    def burn_ratio(self):
+        """Hours in the last 7 days relative to the prior 4-week weekly average (None without history)."""
+        if not self.hours_4wk_avg:
+            return None
+        return float(self.hours_last_7_days / self.hours_4wk_avg)
@@ -0,0 +1,127 @@
+"""
+In-process trigram index over project_number, name, client and pm for ranked fuzzy lookup.
+Built lazily on first search and rebuilt when Project signals bump the 'projects' data version
+(or after PROJECT_SEARCH_INDEX_TTL seconds, for writes made by other processes without a shared cache).
+Project numbers are compared without punctuation, so "24-01" still finds "2024-001".
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from core.data_version import bump_version, get_version
+from .models import Project
+
+VERSION_NAME = 'projects'
+# field -> weight applied to its similarity score
+FIELD_WEIGHTS = (
+    ('project_number', 1.0),
+    ('name', 0.9),
+    ('client', 0.7),
+    ('pm', 0.7),
+)
+MIN_SCORE = 0.2
+SUBSTRING_BONUS = 1.0
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_lock = threading.Lock()
+_index = None
+
+
+def get_ttl():
+    return getattr(settings, 'PROJECT_SEARCH_INDEX_TTL', 300)
+
+
+def normalize(value, compact=False):
+    """Lowercase and collapse punctuation to spaces (or drop it entirely when compact=True)."""
+    value = (value or '').lower()
+    return _NON_ALNUM.sub('' if compact else ' ', value).strip()
+
+
+def trigrams(text):
+    """Set of character trigrams of text, padded so short strings and word edges still count."""
+    if not text:
+        return set()
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Posting lists trigram -> [doc], where a doc is one (project, field) string."""
+
+    def __init__(self, rows):
+        self.docs = []  # (project_id, weight, normalized text, trigram count)
+        self.postings = defaultdict(list)
+        for row in rows:
+            project_id = row[0]
+            for (field, weight), value in zip(FIELD_WEIGHTS, row[1:]):
+                text = normalize(value, compact=(field == 'project_number'))
+                grams = trigrams(text)
+                if not grams:
+                    continue
+                doc = len(self.docs)
+                self.docs.append((project_id, weight, text, len(grams)))
+                for gram in grams:
+                    self.postings[gram].append(doc)
+        self.version = None
+        self.built_at = 0.0
+
+    def search(self, query, limit=None):
+        """Ranked [(project_id, score)] for query, best first; each project scored by its best field."""
+        plain, compact = normalize(query), normalize(query, compact=True)
+        if not compact:
+            return []
+        grams = trigrams(plain) | trigrams(compact)
+        hits = defaultdict(int)
+        for gram in grams:
+            for doc in self.postings.get(gram, ()):
+                hits[doc] += 1
+        best = {}
+        for doc, shared in hits.items():
+            project_id, weight, text, count = self.docs[doc]
+            score = shared / (len(grams) + count - shared)
+            if plain in text or compact in text:
+                score += SUBSTRING_BONUS
+            score *= weight
+            if score >= MIN_SCORE and score > best.get(project_id, 0):
+                best[project_id] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+
+def _build():
+    rows = Project.objects.values_list('id', *[field for field, _weight in FIELD_WEIGHTS])
+    return TrigramIndex(rows)
+
+
+def get_index():
+    """The current index, (re)built if missing, invalidated, or older than the TTL."""
+    global _index
+    version = get_version(VERSION_NAME)
+    index = _index
+    if index is not None and index.version == version and time.monotonic() - index.built_at < get_ttl():
+        return index
+    with _lock:
+        index = _index
+        if index is None or index.version != version or time.monotonic() - index.built_at >= get_ttl():
+            index = _build()
+            index.version = version
+            index.built_at = time.monotonic()
+            _index = index
+    return index
+
+
+def invalidate():
+    """Called from Project signals; every process rebuilds on its next search."""
+    bump_version(VERSION_NAME)
+
+
+def search_projects(query, limit=None):
+    """Ranked [(project_id, score)] matching query."""
+    return get_index().search(query, limit=limit)
+
+
+def ranked_project_ids(query, limit=None):
+    return [project_id for project_id, _score in search_projects(query, limit=limit)]
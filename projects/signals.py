@@ -0,0 +1,46 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from core.geocoding import address_key, forget_locations, project_address_key
+from core.models import ProjectWeatherCache
+from . import health, search
+from .analytics import invalidate
+from .models import Project
+
+
+@receiver(pre_save, sender=Project)
+def remember_address(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    previous = Project.all_objects.filter(pk=instance.pk).values('city', 'state', 'country').first()
+    instance._previous_address_key = address_key(**previous) if previous else None
+
+
+@receiver(post_save, sender=Project)
+def drop_weather_on_address_change(sender, instance, created, raw=False, **kwargs):
+    """A new address makes the stored lat/lon and forecast wrong; the next refresh re-resolves it."""
+    previous = getattr(instance, '_previous_address_key', None)
+    if raw or created or previous is None or previous == project_address_key(instance):
+        return
+    forget_locations(instance.pk)
+
+
+@receiver(post_save, sender=Project)
+def invalidate_analytics_on_project_save(sender, instance, raw=False, **kwargs):
+    """Address edits change the weather risk shown on the overview panel."""
+    if not raw:
+        invalidate(instance.pk)
+        health.refresh(instance.pk)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_search_index(sender, instance, **kwargs):
+    search.invalidate()
+
+
+@receiver(post_save, sender=ProjectWeatherCache)
+@receiver(post_delete, sender=ProjectWeatherCache)
+def invalidate_analytics_on_weather(sender, instance, **kwargs):
+    invalidate(instance.project_id)
+    health.refresh(instance.project_id)
@@ -1,6 +1,8 @@
 from django.test import TestCase, Client, RequestFactory
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from decimal import Decimal
+from io import StringIO
 from pathlib import Path
 
 from core.models import Profile
@@ -106,3 +108,438 @@ class ProjectViewsTest(TestCase):
         content = template_path.read_text(encoding='utf-8')
         self.assertIn('<th>PM</th>', content)
         self.assertNotIn('<th>Project manager</th>', content)
+
+
+class ProjectHourTotalsTest(TestCase):
+    """Project.total_hours / hours_this_week follow time entry signals; the list sorts on them without joins."""
+
+    def setUp(self):
+        from datetime import date, timedelta
+        self.user = User.objects.create_user(username='manager', password='pass')
+        self.user.profile.role = Profile.MANAGER
+        self.user.profile.save()
+        self.a = Project.objects.create(project_number='PRJ-A', name='Alpha', client='C', pm='PM')
+        self.b = Project.objects.create(project_number='PRJ-B', name='Beta', client='C', pm='PM')
+        today = date.today()
+        self.this_week = today - timedelta(days=today.weekday())
+        self.last_week = self.this_week - timedelta(days=7)
+
+    def _entry(self, project, day, hours):
+        from decimal import Decimal
+        from time_tracking.models import TimeEntry
+        return TimeEntry.objects.create(user=self.user, project=project, date=day, hours=Decimal(hours))
+
+    def test_totals_follow_entries(self):
+        from decimal import Decimal
+        old = self._entry(self.a, self.last_week, '5')
+        current = self._entry(self.a, self.this_week, '3')
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.total_hours, Decimal('8'))
+        self.assertEqual(self.a.week_hours, Decimal('3'))
+        current.project = self.b
+        current.save()
+        old.date = self.this_week
+        old.save()
+        self.a.refresh_from_db()
+        self.b.refresh_from_db()
+        self.assertEqual((self.a.total_hours, self.a.week_hours), (Decimal('5'), Decimal('5')))
+        self.assertEqual((self.b.total_hours, self.b.week_hours), (Decimal('3'), Decimal('3')))
+        old.delete()
+        self.a.refresh_from_db()
+        self.assertEqual((self.a.total_hours, self.a.week_hours), (Decimal('0'), Decimal('0')))
+
+    def test_week_rollover_restarts_from_entries(self):
+        from decimal import Decimal
+        self._entry(self.a, self.this_week, '2')
+        Project.objects.filter(pk=self.a.pk).update(hours_this_week=Decimal('40'), hours_week_start=self.last_week)
+        self._entry(self.a, self.this_week, '1')
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.week_hours, Decimal('3'))
+
+    def test_list_sorts_by_total_hours_without_aggregate(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self._entry(self.b, self.last_week, '9')
+        self._entry(self.a, self.last_week, '1')
+        self.client.login(username='manager', password='pass')
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(reverse('project_list'), {'sort': 'total_hours', 'order': 'desc'})
+        self.assertEqual([p.name for p in r.context['projects']], ['Beta', 'Alpha'])
+        project_queries = [q['sql'] for q in ctx.captured_queries if 'FROM "projects_project"' in q['sql']]
+        self.assertFalse(any('time_tracking_timeentry' in sql for sql in project_queries))
+
+    def test_repair_command(self):
+        from decimal import Decimal
+        from io import StringIO
+        from django.core.management import call_command
+        self._entry(self.a, self.last_week, '4')
+        Project.objects.filter(pk=self.a.pk).update(total_hours=Decimal('99'))
+        call_command('repair_time_rollups', stdout=StringIO())
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.total_hours, Decimal('4'))
+
+
+class ProjectAnalyticsTest(TestCase):
+    """The detail page's overview panel uses a fixed number of queries and is cached until related writes."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.manager = User.objects.create_user(username='manager', password='pass')
+        self.manager.profile.role = Profile.MANAGER
+        self.manager.profile.save()
+        self.project = Project.objects.create(
+            project_number='PRJ-AN', name='Analytics', client='C', pm='PM', city='Austin', state='TX'
+        )
+
+    def _populate(self, n):
+        from datetime import date, timedelta
+        from decimal import Decimal
+        from django.utils import timezone
+        from time_tracking.models import TimeEntry
+        from work.models import UpdateRequest, WorkItem
+        today = date.today()
+        for i in range(n):
+            WorkItem.objects.create(project=self.project, title=f'Late {i}', due_date=today - timedelta(days=i + 1))
+            WorkItem.objects.create(project=self.project, title=f'Done {i}', status=WorkItem.STATUS_DONE,
+                                    work_type=WorkItem.WORK_TYPE_CLAIM)
+            TimeEntry.objects.create(user=self.manager, project=self.project, date=today - timedelta(weeks=i), hours=Decimal('2'))
+            UpdateRequest.objects.create(title=f'UR {i}', project=self.project, due_at=timezone.now())
+
+    def test_constant_queries(self):
+        from projects.analytics import build_analytics
+        self._populate(2)
+        with self.assertNumQueries(5):
+            small = build_analytics(self.project)
+        self._populate(6)
+        with self.assertNumQueries(5):
+            large = build_analytics(self.project)
+        self.assertEqual(small['tasks']['overdue_count'], 2)
+        self.assertEqual(large['tasks']['total'], 16)
+        self.assertEqual(large['tasks']['overdue_count'], 8)
+        self.assertEqual(len(large['open_update_requests']), 8)
+        self.assertEqual(len(large['hours_by_week']), 26)
+        self.assertEqual(large['hours_window_total'], 16.0)
+        self.assertEqual(large['weather']['risk_level'], 'UNKNOWN')
+
+    def test_detail_view_cached_and_invalidated(self):
+        from datetime import date
+        from decimal import Decimal
+        from time_tracking.models import TimeEntry
+        self._populate(1)
+        self.client.login(username='manager', password='pass')
+        url = reverse('project_detail', kwargs={'pk': self.project.pk})
+        r = self.client.get(url)
+        self.assertContains(r, 'Open update requests (1)')
+        self.assertEqual(r.context['analytics']['hours_window_total'], 2.0)
+        r = self.client.get(url)
+        self.assertEqual(r.context['analytics']['hours_window_total'], 2.0)
+        TimeEntry.objects.create(user=self.manager, project=self.project, date=date.today(), hours=Decimal('3'))
+        r = self.client.get(url)
+        self.assertEqual(r.context['analytics']['hours_window_total'], 5.0)
+
+
+class ProjectSearchTest(TestCase):
+    """Trigram index ranks fuzzy project matches and follows Project writes."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.manager = User.objects.create_user(username='manager', password='pass')
+        self.manager.profile.role = Profile.MANAGER
+        self.manager.profile.save()
+        self.target = Project.objects.create(project_number='2024-001', name='Harbor Bridge', client='Port Authority', pm='Lee')
+        Project.objects.create(project_number='2023-015', name='Library Annex', client='City', pm='Kim')
+        Project.objects.create(project_number='2024-117', name='Bridge Street Offices', client='Acme', pm='Lee')
+
+    def test_fuzzy_project_number(self):
+        from projects.search import search_projects
+        ranked = search_projects('24-01')
+        self.assertEqual(ranked[0][0], self.target.pk)
+
+    def test_index_follows_project_signals(self):
+        from projects.search import ranked_project_ids
+        self.assertEqual(ranked_project_ids('riverside'), [])
+        p = Project.objects.create(project_number='2025-002', name='Riverside Clinic', client='C', pm='PM')
+        self.assertEqual(ranked_project_ids('riverside'), [p.pk])
+        p.delete()
+        self.assertEqual(ranked_project_ids('riverside'), [])
+
+    def test_list_search_and_lookup(self):
+        self.client.login(username='manager', password='pass')
+        r = self.client.get(reverse('project_list'), {'q': 'harbr bridge'})
+        self.assertEqual(r.context['projects'][0], self.target)
+        r = self.client.get(reverse('project_lookup'), {'q': '2024001'})
+        self.assertEqual(r.json()['results'][0], {'id': self.target.pk, 'text': '2024-001 — Harbor Bridge'})
+
+    def test_global_search_uses_index(self):
+        self.client.login(username='manager', password='pass')
+        r = self.client.get(reverse('search'), {'q': '24-001'})
+        self.assertEqual(r.context['projects'][0], self.target)
+
+
+class ProjectImportTest(TestCase):
+    """CSV import is keyed on project_number, writes only changed fields and is idempotent."""
+
+    HEADER = 'project_number,name,client,pm,status,city\n'
+
+    def setUp(self):
+        self.manager = User.objects.create_user(username='manager', password='pass')
+        self.manager.profile.role = Profile.MANAGER
+        self.manager.profile.save()
+        self.existing = Project.objects.create(
+            project_number='P-1', name='Old Name', client='C', pm='PM', city='Austin', notes='keep me'
+        )
+
+    def _import(self, body, **kwargs):
+        from projects.importer import import_projects
+        return import_projects((self.HEADER + body).splitlines(), **kwargs)
+
+    def test_create_update_unchanged_and_errors(self):
+        body = (
+            'P-1,New Name,C,PM,Active,Austin\n'
+            'P-2,Second,C2,PM2,On Hold,Dallas\n'
+            'P-3,,C,PM,active,\n'
+            'P-4,Bad,C,PM,archived,\n'
+        )
+        result = self._import(body)
+        self.assertEqual((result['created'], result['updated'], result['unchanged']), (1, 1, 0))
+        self.assertEqual(len(result['errors']), 2)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.name, 'New Name')
+        self.assertEqual(self.existing.notes, 'keep me')
+        self.assertEqual(Project.objects.get(project_number='P-2').status, Project.STATUS_ON_HOLD)
+        again = self._import(body)
+        self.assertEqual((again['created'], again['updated'], again['unchanged']), (0, 0, 2))
+
+    def test_blank_country_keeps_value_and_model_default(self):
+        from projects.importer import import_projects
+        Project.objects.filter(pk=self.existing.pk).update(country='CA')
+        lines = ('project_number,name,client,pm,city,country\n'
+                 'P-1,Old Name,C,PM,Austin,\n'
+                 'P-5,Fifth,C,PM,Boise,\n').splitlines()
+        result = import_projects(lines)
+        self.assertEqual((result['created'], result['updated'], result['unchanged']), (1, 0, 1))
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.country, 'CA')
+        self.assertEqual(Project.objects.get(project_number='P-5').country, 'US')
+
+    def test_dry_run_writes_nothing(self):
+        result = self._import('P-9,Nine,C,PM,active,\n', dry_run=True)
+        self.assertEqual(result['created'], 1)
+        self.assertFalse(Project.objects.filter(project_number='P-9').exists())
+
+    def test_unchanged_rerun_of_5k_rows_is_one_query(self):
+        body = ''.join(f'B-{i:05d},Project {i},Client {i % 40},PM {i % 7},active,City {i % 90}\n' for i in range(5000))
+        self.assertEqual(self._import(body)['created'], 5000)
+        with self.assertNumQueries(1):
+            result = self._import(body)
+        self.assertEqual(result['unchanged'], 5000)
+
+    def test_blank_required_cells_keep_values_and_moves_drop_weather(self):
+        from core.models import ProjectWeatherCache, ProjectWeatherLocation
+        ProjectWeatherLocation.objects.create(project=self.existing, lat=1, lon=2, address_key='austin||us')
+        ProjectWeatherCache.objects.create(project=self.existing, forecast_json='{}')
+        result = self._import('P-1,,,,active,Dallas\n')
+        self.assertEqual(result['updated'], 1)
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.name, self.existing.client, self.existing.pm), ('Old Name', 'C', 'PM'))
+        self.assertEqual(self.existing.city, 'Dallas')
+        self.assertFalse(ProjectWeatherLocation.objects.filter(project=self.existing).exists())
+        self.assertFalse(ProjectWeatherCache.objects.filter(project=self.existing).exists())
+
+    def test_import_page(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        self.client.login(username='manager', password='pass')
+        upload = SimpleUploadedFile('projects.csv', (self.HEADER + 'P-5,Five,C,PM,active,Reno\n').encode())
+        r = self.client.post(reverse('project_import'), {'csv_file': upload})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context['result']['created'], 1)
+        self.assertTrue(Project.objects.filter(project_number='P-5', city='Reno').exists())
+
+
+class ProjectBackgroundDeletionTest(TestCase):
+    """Deleting a project hides it at once and queues a batched delete of its children."""
+
+    def setUp(self):
+        from datetime import date, timedelta
+        from decimal import Decimal
+        from time_tracking.models import TimeEntry
+        from work.models import WorkItem
+        self.manager = User.objects.create_user(username='manager', password='pass')
+        self.manager.profile.role = Profile.MANAGER
+        self.manager.profile.save()
+        self.project = Project.objects.create(project_number='PRJ-DEL', name='Doomed', client='C', pm='PM')
+        self.other = Project.objects.create(project_number='PRJ-KEEP', name='Keeper', client='C', pm='PM')
+        self.task = WorkItem.objects.create(project=self.project, title='Gone')
+        monday = date(2025, 2, 10)
+        for i in range(5):
+            TimeEntry.objects.create(user=self.manager, project=self.project, work_item=self.task,
+                                     date=monday + timedelta(days=i % 2), hours=Decimal('5'))
+        self.kept = TimeEntry.objects.create(user=self.manager, project=self.other, date=monday, hours=Decimal('4'))
+
+    def test_delete_hides_then_job_removes_children(self):
+        from decimal import Decimal
+        from unittest import mock
+        from core.jobs import run_pending
+        from core.models import BackgroundJob
+        from time_tracking.models import TimeEntry
+        from work.models import WorkItem
+        from projects import jobs
+        self.client.login(username='manager', password='pass')
+        r = self.client.post(reverse('project_delete', kwargs={'pk': self.project.pk}))
+        self.assertEqual(r.status_code, 302)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertTrue(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.client.post(reverse('project_delete', kwargs={'pk': self.project.pk}))
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+        jobs.BATCH_SIZE, old_batch = 2, jobs.BATCH_SIZE
+        try:
+            # Per-row signal follow-up is muted for the whole job
+            with mock.patch('time_tracking.signals.entries_changed') as entries_changed, \
+                    mock.patch('work.signals.refresh_project_health') as refresh_health:
+                (job,) = run_pending()
+        finally:
+            jobs.BATCH_SIZE = old_batch
+        self.assertFalse(entries_changed.called or refresh_health.called)
+        self.assertEqual(job.status, BackgroundJob.STATUS_DONE)
+        job.refresh_from_db()
+        self.assertEqual((job.progress_done, job.progress_total), (7, 7))
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(WorkItem.all_objects.filter(pk=self.task.pk).exists())
+        self.assertEqual(list(TimeEntry.objects.all()), [self.kept])
+        self.kept.refresh_from_db()
+        self.assertEqual(self.kept.overtime_hours, Decimal('0'))
+
+        r = self.client.get(reverse('job_status', kwargs={'pk': job.pk}))
+        self.assertEqual(r.json()['status'], 'done')
+        self.assertEqual(r.json()['percent'], 100)
+
+    def test_failed_delete_unhides_project_for_retry(self):
+        from unittest import mock
+        from core.jobs import run_pending
+        from core.models import BackgroundJob
+        self.client.login(username='manager', password='pass')
+        self.client.post(reverse('project_delete', kwargs={'pk': self.project.pk}))
+        with mock.patch('projects.jobs.classify_overtime', side_effect=RuntimeError('disk I/O error')):
+            (job,) = run_pending()
+        self.assertEqual((job.status, job.message), (BackgroundJob.STATUS_FAILED, 'disk I/O error'))
+        self.assertIsNone(Project.objects.get(pk=self.project.pk).deleted_at)
+
+        self.client.post(reverse('project_delete', kwargs={'pk': self.project.pk}))
+        (retry,) = run_pending()
+        self.assertEqual(retry.status, BackgroundJob.STATUS_DONE)
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+
+
+class ProjectHealthTest(TestCase):
+    """ProjectHealth rows follow task, request and weather writes; list and dashboard sort/filter on them."""
+
+    def setUp(self):
+        self.manager = User.objects.create_user(username='manager', password='pass')
+        self.manager.profile.role = Profile.MANAGER
+        self.manager.profile.save()
+        self.project = Project.objects.create(
+            project_number='PRJ-HL', name='Healthy', client='C', pm='PM', city='Austin', state='TX'
+        )
+        self.other = Project.objects.create(project_number='PRJ-H2', name='Other', client='C', pm='PM')
+
+    def test_score_from_overdue_tasks_and_weather(self):
+        import json
+        from datetime import date, timedelta
+        from core.models import ProjectWeatherCache
+        from work.models import WorkItem
+        health = self.project.health
+        self.assertEqual((health.score, health.level), (100, 'good'))
+        for i in range(3):
+            WorkItem.objects.create(project=self.project, title=f'Late {i}', due_date=date.today() - timedelta(days=1))
+        health.refresh_from_db()
+        self.assertEqual((health.overdue_count, health.open_task_count), (3, 3))
+        self.assertEqual((health.score, health.level), (70, 'watch'))
+        forecast = {'daily': {'time': [date.today().isoformat()], 'precipitation_probability_max': [80]}}
+        ProjectWeatherCache.objects.create(project=self.project, forecast_json=json.dumps(forecast))
+        health.refresh_from_db()
+        self.assertEqual(health.weather_risk, 'HIGH')
+        self.assertEqual((health.score, health.level), (50, 'watch'))
+        WorkItem.objects.create(project=self.project, title='Late 4', due_date=date.today() - timedelta(days=2))
+        health.refresh_from_db()
+        self.assertEqual((health.score, health.level), (40, 'at_risk'))
+
+    def test_burn_ratio(self):
+        from projects.health import score_health
+        self.assertEqual(score_health(0, 0, 'CLEAR', Decimal('20'), Decimal('10')), (80, 'good'))
+        self.assertEqual(score_health(0, 0, 'CLEAR', Decimal('15'), Decimal('10')), (90, 'good'))
+        self.assertEqual(score_health(0, 0, 'CLEAR', Decimal('15'), Decimal('0')), (100, 'good'))
+
+    def test_list_sort_filter_and_dashboard(self):
+        from datetime import date, timedelta
+        from work.models import WorkItem
+        WorkItem.objects.create(project=self.other, title='Late', due_date=date.today() - timedelta(days=1))
+        WorkItem.objects.create(project=self.other, title='Later', due_date=date.today() - timedelta(days=3))
+        WorkItem.objects.create(project=self.other, title='Latest', due_date=date.today() - timedelta(days=5))
+        self.client.login(username='manager', password='pass')
+        r = self.client.get(reverse('project_list'), {'sort': 'health', 'order': 'asc'})
+        self.assertEqual([p.pk for p in r.context['projects']], [self.other.pk, self.project.pk])
+        r = self.client.get(reverse('project_list'), {'health': 'watch'})
+        self.assertEqual([p.pk for p in r.context['projects']], [self.other.pk])
+        r = self.client.get(reverse('dashboard'))
+        self.assertEqual([h.project_id for h in r.context['unhealthy_projects']], [self.other.pk])
+
+    def test_refresh_command(self):
+        from django.core.management import call_command
+        from projects.models import ProjectHealth
+        ProjectHealth.objects.all().delete()
+        call_command('refresh_project_health', stdout=StringIO())
+        self.assertEqual(ProjectHealth.objects.count(), 2)
+
+
+class PortfolioTimelineTest(TestCase):
+    """Spans come from one grouped query and are cached per week until tasks or projects change."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.manager = User.objects.create_user(username='manager', password='pass')
+        self.manager.profile.role = Profile.MANAGER
+        self.manager.profile.save()
+
+    def _populate(self, n):
+        from datetime import date, timedelta
+        from work.models import WorkItem
+        today = date.today()
+        for i in range(n):
+            project = Project.objects.create(project_number=f'TL-{i:03d}', name=f'Timeline {i}', client='C', pm='P')
+            WorkItem.objects.create(project=project, title='Update', due_date=today + timedelta(days=7))
+            WorkItem.objects.create(project=project, title='Late', due_date=today - timedelta(days=2),
+                                    work_type=WorkItem.WORK_TYPE_CLAIM)
+            WorkItem.objects.create(project=project, title='Old', due_date=today - timedelta(weeks=30),
+                                    status=WorkItem.STATUS_DONE)
+
+    def test_one_query_for_any_portfolio_size(self):
+        from datetime import date, timedelta
+        from projects.timeline import build_timeline, week_start
+        start = week_start(date.today())
+        self._populate(3)
+        with self.assertNumQueries(1):
+            data = build_timeline(start)
+        project = data['projects'][0]
+        self.assertEqual(len(data['projects']), 3)
+        self.assertEqual((project['tasks'], project['open'], project['overdue']), (2, 2, 1))
+        self.assertEqual([s['work_type'] for s in project['spans']], ['claim_analysis', 'schedule_update'])
+        self.assertEqual(project['end'], (date.today() + timedelta(days=7)).isoformat())
+
+    def test_cached_per_week_and_invalidated(self):
+        from datetime import date
+        from work.models import WorkItem
+        self._populate(2)
+        self.client.login(username='manager', password='pass')
+        url = reverse('portfolio_timeline_data')
+        self.assertEqual(len(self.client.get(url).json()['projects']), 2)
+        with self.assertNumQueries(3):  # session, user and profile only
+            self.client.get(url)
+        project = Project.objects.create(project_number='TL-NEW', name='New', client='C', pm='P')
+        WorkItem.objects.create(project=project, title='Fresh', due_date=date.today())
+        self.assertEqual(len(self.client.get(url).json()['projects']), 3)
+        r = self.client.get(reverse('portfolio_timeline'))
+        self.assertContains(r, 'Portfolio Timeline')
@@ -0,0 +1,103 @@
+"""
+Portfolio timeline: per-project, per-work-type task spans for a Gantt-style view across all projects.
+One grouped query over WorkItem builds every span (first created -> last due, task/open/overdue and
+milestone counts); project rows are rolled up from those in Python. The result is cached per week and
+keyed on the 'work_items' and 'projects' data versions, so task or project writes rebuild it.
+"""
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Q
+
+from core.data_version import get_version
+from work.models import WorkItem
+
+WEEKS_BEFORE = 4
+WEEKS_AFTER = 12
+CACHE_SECONDS = 60 * 60
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def window(start):
+    """(first day, last day) shown for the week starting at start."""
+    return start - timedelta(weeks=WEEKS_BEFORE), start + timedelta(weeks=WEEKS_AFTER, days=-1)
+
+
+def build_timeline(start, today=None):
+    """Timeline payload for the window around the week starting at start."""
+    today = today or date.today()
+    first, last = window(start)
+    open_statuses = (WorkItem.STATUS_OPEN, WorkItem.STATUS_IN_PROGRESS)
+    work_type_labels = dict(WorkItem.WORK_TYPE_CHOICES)
+    # Open tasks always count; finished ones only if they were due inside the window
+    rows = (
+        WorkItem.objects.filter(project__isnull=False, project__deleted_at__isnull=True)
+        .filter(Q(status__in=open_statuses) | Q(due_date__gte=first, due_date__lte=last))
+        .values('project_id', 'project__project_number', 'project__name', 'project__status', 'work_type')
+        .annotate(
+            created=Min('created_at'),
+            first_due=Min('due_date'),
+            last_due=Max('due_date'),
+            tasks=Count('id'),
+            open=Count('id', filter=Q(status__in=open_statuses)),
+            overdue=Count('id', filter=Q(status__in=open_statuses, due_date__lt=today)),
+            milestones=Count('id', filter=Q(meeting_at__date__gte=first, meeting_at__date__lte=last)),
+        )
+        .order_by('project__project_number', 'work_type')
+    )
+    projects = {}
+    for row in rows:
+        span_start = min(d for d in (row['created'].date(), row['first_due']) if d)
+        span_end = row['last_due'] or span_start
+        span = {
+            'work_type': row['work_type'],
+            'label': work_type_labels.get(row['work_type'], row['work_type']),
+            'start': span_start.isoformat(),
+            'end': max(span_start, span_end).isoformat(),
+            'tasks': row['tasks'],
+            'open': row['open'],
+            'overdue': row['overdue'],
+            'milestones': row['milestones'],
+        }
+        project = projects.get(row['project_id'])
+        if project is None:
+            project = projects[row['project_id']] = {
+                'id': row['project_id'],
+                'project_number': row['project__project_number'],
+                'name': row['project__name'],
+                'status': row['project__status'],
+                'start': span['start'],
+                'end': span['end'],
+                'tasks': 0, 'open': 0, 'overdue': 0, 'milestones': 0,
+                'spans': [],
+            }
+        project['start'] = min(project['start'], span['start'])
+        project['end'] = max(project['end'], span['end'])
+        for key in ('tasks', 'open', 'overdue', 'milestones'):
+            project[key] += span[key]
+        project['spans'].append(span)
+    return {
+        'week_start': start.isoformat(),
+        'window_start': first.isoformat(),
+        'window_end': last.isoformat(),
+        'today': today.isoformat(),
+        'projects': list(projects.values()),
+    }
+
+
+def portfolio_timeline(start=None):
+    """Cached build_timeline for the week containing start (default: this week)."""
+    today = date.today()
+    start = week_start(start or today)
+    key = (
+        f'portfolio_timeline:{start.isoformat()}:{today.isoformat()}:'
+        f'{get_version("work_items")}:{get_version("projects")}'
+    )
+    data = cache.get(key)
+    if data is None:
+        data = build_timeline(start, today)
+        cache.set(key, data, CACHE_SECONDS)
+    return data
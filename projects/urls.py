@@ -3,6 +3,10 @@ from . import views
 
 urlpatterns = [
     path('', views.ProjectListView.as_view(), name='project_list'),
+    path('lookup/', views.ProjectLookupView.as_view(), name='project_lookup'),
+    path('timeline/', views.PortfolioTimelineView.as_view(), name='portfolio_timeline'),
+    path('timeline/data/', views.PortfolioTimelineDataView.as_view(), name='portfolio_timeline_data'),
+    path('import/', views.ProjectImportView.as_view(), name='project_import'),
     path('create/', views.ProjectCreateView.as_view(), name='project_create'),
     path('<int:pk>/', views.ProjectDetailView.as_view(), name='project_detail'),
     path('<int:pk>/edit/', views.ProjectUpdateView.as_view(), name='project_edit'),
@@ -1,14 +1,32 @@
 from datetime import date, timedelta
-from django.db.models import Sum, Q
+from django.db.models import Case, Sum, When
+from django.http import JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.contrib import messages
+from django.views import View
 from django.views.generic import ListView, CreateView, DetailView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 
-from core.mixins import ManagerRequiredMixin
+from core.mixins import ManagerRequiredMixin, SchedulerOrManagerMixin
+from core.models import BackgroundJob
 from time_tracking.models import TimeEntry
-from .models import Project
-from .forms import ProjectForm
+from time_tracking.approvals import pending_week_count
+from .analytics import project_analytics
+from .models import Project, ProjectHealth
+from .search import ranked_project_ids
+from .forms import ProjectForm, ProjectImportForm
+from .importer import import_projects
+from .jobs import DELETE_PROJECT, queue_project_deletion
+from .timeline import portfolio_timeline, week_start as timeline_week_start
+
+SORT_FIELDS = {
+    'project_number': 'project_number',
+    'name': 'name',
+    'total_hours': 'total_hours',
+    'health': 'health__score',
+}
+SEARCH_LIMIT = 200
+LOOKUP_LIMIT = 20
 
 
 class ProjectListView(ManagerRequiredMixin, ListView):
@@ -26,16 +44,23 @@ class ProjectListView(ManagerRequiredMixin, ListView):
         return 10
 
     def get_queryset(self):
-        qs = Project.objects.annotate(
-            total_hours=Sum('time_entries__hours')
-        ).order_by('name')
+        # total_hours / hours_this_week are maintained by time entry signals, so no aggregate join here
+        sort = self.request.GET.get('sort', 'name')
+        order_by = SORT_FIELDS.get(sort, 'name')
+        if self.request.GET.get('order') == 'desc':
+            order_by = f'-{order_by}'
+        qs = Project.objects.select_related('project_manager', 'health').order_by(order_by, 'name')
         if self.request.GET.get('status'):
             qs = qs.filter(status=self.request.GET.get('status'))
-        if self.request.GET.get('q', '').strip():
-            q = self.request.GET.get('q', '').strip()
-            qs = qs.filter(
-                Q(project_number__icontains=q) | Q(name__icontains=q) | Q(client__icontains=q) | Q(pm__icontains=q)
-            )
+        if self.request.GET.get('health'):
+            qs = qs.filter(health__level=self.request.GET.get('health'))
+        q = self.request.GET.get('q', '').strip()
+        if q:
+            ids = ranked_project_ids(q, limit=SEARCH_LIMIT)
+            qs = qs.filter(pk__in=ids)
+            if 'sort' not in self.request.GET:
+                # Best fuzzy match first unless the user picked a column
+                qs = qs.order_by(Case(*[When(pk=pk, then=rank) for rank, pk in enumerate(ids)], default=len(ids)))
         return qs
 
     def get_context_data(self, **kwargs):
@@ -47,10 +72,23 @@ class ProjectListView(ManagerRequiredMixin, ListView):
             date__gte=start,
             date__lte=end,
         ).aggregate(t=Sum('hours'))['t'] or 0
-        ctx['pending_approvals'] = 0  # placeholder
+        ctx['pending_approvals'] = pending_week_count()
+        ctx['deletion_jobs'] = list(
+            BackgroundJob.objects.filter(kind=DELETE_PROJECT, status__in=BackgroundJob.ACTIVE_STATUSES)
+        )
         q = self.request.GET.copy()
         q.pop('page', None)
         ctx['pagination_query'] = q.urlencode()
+        sort = self.request.GET.get('sort', 'name')
+        order = self.request.GET.get('order', 'asc')
+        sort_links = {}
+        for key in SORT_FIELDS:
+            lq = q.copy()
+            lq['sort'] = key
+            lq['order'] = 'desc' if key == sort and order == 'asc' else 'asc'
+            sort_links[key] = {'url': '?' + lq.urlencode(), 'is_active': key == sort, 'order': order}
+        ctx['sort_links'] = sort_links
+        ctx['health_levels'] = ProjectHealth.LEVEL_CHOICES
         return ctx
 
 
@@ -59,6 +97,12 @@ class ProjectDetailView(ManagerRequiredMixin, DetailView):
     context_object_name = 'project'
     template_name = 'projects/project_detail.html'
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx['analytics'] = project_analytics(self.object)
+        ctx['today'] = date.today()
+        return ctx
+
 
 class ProjectCreateView(ManagerRequiredMixin, CreateView):
     model = Project
@@ -84,5 +128,71 @@ class ProjectDeleteView(ManagerRequiredMixin, DeleteView):
     success_url = reverse_lazy('project_list')
 
     def form_valid(self, form):
-        messages.success(self.request, 'Project deleted.')
-        return super().form_valid(form)
+        # Children are removed in batches by the delete_project job; the project is hidden right away
+        queue_project_deletion(self.object, user=self.request.user)
+        messages.success(self.request, 'Project deleted. Its tasks and time entries are being removed in the background.')
+        return redirect(self.get_success_url())
+
+
+class ProjectImportView(ManagerRequiredMixin, View):
+    """Upload a CSV master list; creates/updates projects keyed on project_number and shows the counts."""
+    template_name = 'projects/project_import.html'
+
+    def get(self, request):
+        return render(request, self.template_name, {'form': ProjectImportForm()})
+
+    def post(self, request):
+        form = ProjectImportForm(request.POST, request.FILES)
+        result = None
+        if form.is_valid():
+            try:
+                text = form.cleaned_data['csv_file'].read().decode('utf-8-sig')
+            except UnicodeDecodeError:
+                form.add_error('csv_file', 'File must be UTF-8 encoded CSV.')
+            else:
+                result = import_projects(text.splitlines(), dry_run=form.cleaned_data['dry_run'])
+                result['dry_run'] = form.cleaned_data['dry_run']
+        return render(request, self.template_name, {'form': form, 'result': result})
+
+
+class ProjectLookupView(SchedulerOrManagerMixin, View):
+    """JSON picker options ranked by fuzzy match: GET q= (number, name, client or PM)."""
+
+    def get(self, request):
+        q = (request.GET.get('q') or '').strip()
+        if q:
+            ids = ranked_project_ids(q, limit=LOOKUP_LIMIT)
+            by_id = {p['pk']: p for p in Project.objects.filter(pk__in=ids).values('pk', 'project_number', 'name')}
+            rows = [by_id[pk] for pk in ids if pk in by_id]
+        else:
+            rows = list(Project.objects.order_by('project_number').values('pk', 'project_number', 'name')[:LOOKUP_LIMIT])
+        results = [{'id': r['pk'], 'text': f"{r['project_number']} — {r['name']}"} for r in rows]
+        return JsonResponse({'results': results})
+
+
+class PortfolioTimelineView(ManagerRequiredMixin, View):
+    """Gantt-style view of task spans across all projects; rows are drawn client-side from the data endpoint."""
+    template_name = 'projects/portfolio_timeline.html'
+
+    def get(self, request):
+        start = _parse_week(request.GET.get('week'))
+        return render(request, self.template_name, {
+            'week_start': start,
+            'prev_week': start - timedelta(weeks=1),
+            'next_week': start + timedelta(weeks=1),
+        })
+
+
+class PortfolioTimelineDataView(ManagerRequiredMixin, View):
+    """JSON for the portfolio timeline: GET week=YYYY-MM-DD (any day of the week; default this week)."""
+
+    def get(self, request):
+        return JsonResponse(portfolio_timeline(_parse_week(request.GET.get('week'))))
+
+
+def _parse_week(value):
+    try:
+        day = date.fromisoformat(value) if value else date.today()
+    except ValueError:
+        day = date.today()
+    return timeline_week_start(day)
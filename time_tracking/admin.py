@@ -1,11 +1,11 @@
 from django.contrib import admin
-from .models import TimeEntry
+from .models import TimeEntry, TimesheetLock
 
 
 @admin.register(TimeEntry)
 class TimeEntryAdmin(admin.ModelAdmin):
-    list_display = ('user', 'project', 'work_item', 'date', 'hours', 'description_short')
-    list_filter = ('date', 'user')
+    list_display = ('user', 'project', 'work_item', 'date', 'hours', 'status', 'description_short')
+    list_filter = ('status', 'date', 'user')
     search_fields = ('description',)
 
     @admin.display(description='Description')
@@ -13,3 +13,9 @@ class TimeEntryAdmin(admin.ModelAdmin):
         if not obj.description:
             return ''
         return obj.description[:50] + '...' if len(obj.description) > 50 else obj.description
+
+
+@admin.register(TimesheetLock)
+class TimesheetLockAdmin(admin.ModelAdmin):
+    list_display = ('user', 'week_start', 'total_hours', 'overtime_hours', 'locked_by', 'locked_at')
+    list_filter = ('week_start', 'user')
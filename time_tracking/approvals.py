@@ -0,0 +1,121 @@
+"""
+Approval workflow for time entries: pending -> approved -> locked, one user-week at a time.
+Approve and lock are each a single UPDATE over the user-week; locking also freezes the week's totals.
+From a manager's own queue (manager=) approval only covers entries on projects that manager runs, and a
+week with hours on anyone else's projects can't be locked.
+"""
+import json
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce, TruncWeek
+from django.utils import timezone
+
+from .models import TimeEntry, TimesheetLock
+
+
+def week_summary(entries):
+    """Group entries by (project, task type) -> hours. Rows are sorted by project number then task type."""
+    groups = defaultdict(lambda: {'hours': 0, 'project': None, 'task_type': ''})
+    for e in entries:
+        key = (e.project_id, e.work_item.get_display_work_type() if e.work_item else '—')
+        if groups[key]['project'] is None:
+            groups[key]['project'] = e.project
+            groups[key]['task_type'] = key[1]
+        groups[key]['hours'] += float(e.hours)
+    summary = [{'project': v['project'], 'task_type': v['task_type'], 'hours': v['hours']} for v in groups.values()]
+    summary.sort(key=lambda x: (x['project'].project_number if x['project'] else '', x['task_type']))
+    return summary
+
+
+def frozen_summary(lock):
+    """Summary rows stored on a TimesheetLock, in the same shape as week_summary()."""
+    return json.loads(lock.summary_json) if lock.summary_json else []
+
+
+def _week_entries(user_id, week_start):
+    week_start = TimesheetLock.week_start_for(week_start)
+    return TimeEntry.objects.filter(user_id=user_id, date__gte=week_start, date__lte=week_start + timedelta(days=6))
+
+
+def approve_week(user_id, week_start, approver, manager=None):
+    """
+    Approve all pending entries in the user-week (with manager=, only those on projects that user manages).
+    Returns the number of entries approved.
+    """
+    now = timezone.now()
+    entries = _week_entries(user_id, week_start).filter(status=TimeEntry.STATUS_PENDING)
+    if manager is not None:
+        entries = entries.filter(project__project_manager=manager)
+    return entries.update(
+        status=TimeEntry.STATUS_APPROVED,
+        approved_by=approver,
+        approved_at=now,
+        updated_at=now,
+    )
+
+
+def lock_week(user_id, week_start, locked_by, manager=None):
+    """
+    Lock the user-week: every entry becomes LOCKED (approving any still pending) and its totals are frozen.
+    Returns the TimesheetLock (existing one if the week was already locked). A lock covers the whole week,
+    so with manager= it raises ValidationError if the week has hours on projects that user doesn't manage.
+    """
+    week_start = TimesheetLock.week_start_for(week_start)
+    now = timezone.now()
+    with transaction.atomic():
+        lock = TimesheetLock.objects.select_for_update().filter(user_id=user_id, week_start=week_start).first()
+        if lock:
+            return lock
+        entries = _week_entries(user_id, week_start)
+        if manager is not None and entries.exclude(project__project_manager=manager).exists():
+            raise ValidationError('This week has hours on projects you do not manage.')
+        entries.exclude(status=TimeEntry.STATUS_LOCKED).update(
+            status=TimeEntry.STATUS_LOCKED,
+            approved_by=Coalesce(F('approved_by'), Value(locked_by.pk, output_field=IntegerField())),
+            approved_at=Coalesce(F('approved_at'), Value(now, output_field=DateTimeField())),
+            updated_at=now,
+        )
+        totals = entries.aggregate(t=Sum('hours'), ot=Sum('overtime_hours'))
+        summary = week_summary(entries.select_related('project', 'work_item'))
+        rows = [
+            {
+                'project': {'pk': r['project'].pk, 'project_number': r['project'].project_number, 'name': r['project'].name} if r['project'] else None,
+                'task_type': r['task_type'],
+                'hours': r['hours'],
+            }
+            for r in summary
+        ]
+        return TimesheetLock.objects.create(
+            user_id=user_id,
+            week_start=week_start,
+            total_hours=totals['t'] or Decimal('0'),
+            overtime_hours=totals['ot'] or Decimal('0'),
+            summary_json=json.dumps(rows),
+            locked_by=locked_by,
+        )
+
+
+def pending_weeks(manager=None):
+    """
+    Pending user-weeks with hours and entry counts, oldest first.
+    With manager=, only entries on projects that user manages.
+    """
+    qs = TimeEntry.objects.filter(status=TimeEntry.STATUS_PENDING)
+    if manager is not None:
+        qs = qs.filter(project__project_manager=manager)
+    return (
+        qs.annotate(week_start=TruncWeek('date'))
+        .values('user_id', 'user__username', 'user__first_name', 'user__last_name', 'week_start')
+        .annotate(hours=Sum('hours'), entries=Count('id'))
+        .order_by('week_start', 'user__username')
+    )
+
+
+def pending_week_count(manager=None):
+    """Number of user-weeks with at least one pending entry."""
+    return pending_weeks(manager).count()
@@ -1,8 +1,28 @@
+from decimal import Decimal
 from django import forms
+from django.urls import reverse_lazy
+from projects.models import Project
 from work.models import WorkItem
 from .models import TimeEntry
 
 
+class WorkItemAutocompleteWidget(forms.Select):
+    """Select that renders only the chosen task; other options are fetched from the autocomplete endpoint."""
+
+    def __init__(self, attrs=None):
+        attrs = {'data-autocomplete-url': reverse_lazy('work_item_autocomplete'), **(attrs or {})}
+        super().__init__(attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [v for v in value if str(v).isdigit()]
+        options = [self.create_option(name, '', '---------', not selected, 0)]
+        items = WorkItem.objects.select_related('project').filter(pk__in=selected)
+        for index, item in enumerate(items, start=1):
+            label = f"{item.project.project_number} — {item.title}" if item.project else item.title
+            options.append(self.create_option(name, item.pk, label, True, index))
+        return [(None, options, 0)]
+
+
 class TimeEntryForm(forms.ModelForm):
     class Meta:
         model = TimeEntry
@@ -11,7 +31,9 @@ class TimeEntryForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['work_item'].required = False
-        self.fields['work_item'].queryset = WorkItem.objects.select_related('project').all()
+        # Validates only the submitted id; options come from the autocomplete endpoint
+        self.fields['work_item'].queryset = WorkItem.objects.all()
+        self.fields['work_item'].widget = WorkItemAutocompleteWidget()
         self.fields['project'].required = False
         self.fields['work_code'].required = False
         self.fields['date'].widget = forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
@@ -23,4 +45,63 @@ class TimeEntryForm(forms.ModelForm):
         value = self.cleaned_data.get('hours')
         if value is not None and value < 0:
             raise forms.ValidationError('Hours cannot be negative.')
-        return value
\ No newline at end of file
+        return value
+
+class TimesheetGridForm(forms.Form):
+    """Project × day hours grid for one week. Cells are named h_<project_id>_<day index>; blank rows are new_<n>_*."""
+    NEW_ROWS = 3
+
+    def __init__(self, *args, projects=(), days=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.projects = list(projects)
+        self.days = list(days)
+        for p in self.projects:
+            for i in range(len(self.days)):
+                self.fields[f'h_{p.pk}_{i}'] = self._hours_field()
+        for n in range(self.NEW_ROWS):
+            self.fields[f'new_{n}_project'] = forms.ModelChoiceField(
+                queryset=Project.objects.filter(status=Project.STATUS_ACTIVE).order_by('project_number'),
+                required=False,
+                widget=forms.Select(attrs={'class': 'form-control'}),
+            )
+            self.fields[f'new_{n}_project'].label_from_instance = lambda obj: f"{obj.project_number} — {obj.name}"
+            for i in range(len(self.days)):
+                self.fields[f'new_{n}_{i}'] = self._hours_field()
+
+    @staticmethod
+    def _hours_field():
+        return forms.DecimalField(
+            required=False,
+            min_value=Decimal('0'),
+            max_value=Decimal('24'),
+            max_digits=6,
+            decimal_places=2,
+            widget=forms.NumberInput(attrs={'min': '0', 'max': '24', 'step': '0.25', 'class': 'form-control grid-cell'}),
+        )
+
+    def clean(self):
+        data = super().clean()
+        seen = {p.pk for p in self.projects}
+        for n in range(self.NEW_ROWS):
+            project = data.get(f'new_{n}_project')
+            if project is None:
+                continue
+            if project.pk in seen:
+                self.add_error(f'new_{n}_project', 'This project already has a row in the grid.')
+            seen.add(project.pk)
+        return data
+
+    def cells(self):
+        """Return {(project_id, date): Decimal hours} for every grid cell; blank cells count as 0."""
+        data = self.cleaned_data
+        result = {}
+        for p in self.projects:
+            for i, day in enumerate(self.days):
+                result[(p.pk, day)] = data.get(f'h_{p.pk}_{i}') or Decimal('0')
+        for n in range(self.NEW_ROWS):
+            project = data.get(f'new_{n}_project')
+            if project is None:
+                continue
+            for i, day in enumerate(self.days):
+                result[(project.pk, day)] = data.get(f'new_{n}_{i}') or Decimal('0')
+        return result
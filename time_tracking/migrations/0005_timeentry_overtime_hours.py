@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:11
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking', '0004_add_is_overtime_to_timeentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeentry',
+            name='overtime_hours',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=6),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:13
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('time_tracking', '0005_timeentry_overtime_hours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimesheetLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField()),
+                ('total_hours', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=8)),
+                ('overtime_hours', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=8)),
+                ('summary_json', models.TextField(blank=True)),
+                ('locked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'time_tracking_timesheetlock',
+                'ordering': ['-week_start'],
+            },
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='approved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='approved_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='approved_time_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('locked', 'Locked')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='timeentry',
+            index=models.Index(fields=['status', 'user', 'date'], name='time_entry_status_user_date'),
+        ),
+        migrations.AddField(
+            model_name='timesheetlock',
+            name='locked_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='timesheetlock',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timesheet_locks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='timesheetlock',
+            constraint=models.UniqueConstraint(fields=('user', 'week_start'), name='timesheet_lock_user_week'),
+        ),
+    ]
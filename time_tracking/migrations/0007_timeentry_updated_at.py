@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('time_tracking', '0006_timeentry_approval_and_timesheetlock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
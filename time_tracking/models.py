@@ -1,8 +1,40 @@
+from datetime import date, timedelta
 from decimal import Decimal
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
 
+LOCKED_ENTRY_MESSAGE = 'This time entry is locked and cannot be changed.'
+LOCKED_WEEK_MESSAGE = 'This week is locked. Time can no longer be added or changed.'
+
+
+class TimeEntryQuerySet(models.QuerySet):
+    """bulk_create / bulk_update skip TimeEntry.save(), so they refuse locked entries and weeks here."""
+
+    def _check_unlocked(self, objs):
+        if any(obj.status == TimeEntry.STATUS_LOCKED for obj in objs):
+            raise ValidationError(LOCKED_ENTRY_MESSAGE)
+        weeks = {(obj.user_id, TimesheetLock.week_start_for(obj.date)) for obj in objs}
+        if not weeks:
+            return
+        locks = TimesheetLock.objects.filter(
+            user_id__in={user_id for user_id, _week in weeks},
+            week_start__gte=min(week for _user, week in weeks),
+            week_start__lte=max(week for _user, week in weeks),
+        ).values_list('user_id', 'week_start')
+        if weeks.intersection(locks):
+            raise ValidationError(LOCKED_WEEK_MESSAGE)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self._check_unlocked(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        self._check_unlocked(objs)
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
 
 class TimeEntry(models.Model):
     WORK_CODE_SCHEDULE_UPDATE = 'schedule_update'
@@ -13,6 +45,14 @@ class TimeEntry(models.Model):
         (WORK_CODE_BASELINE_UPDATE, 'Baseline update'),
         (WORK_CODE_SCHEDULE_ANALYSIS, 'Schedule analysis'),
     ]
+    STATUS_PENDING = 'pending'
+    STATUS_APPROVED = 'approved'
+    STATUS_LOCKED = 'locked'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_APPROVED, 'Approved'),
+        (STATUS_LOCKED, 'Locked'),
+    ]
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -37,12 +77,34 @@ class TimeEntry(models.Model):
     date = models.DateField()
     hours = models.DecimalField(max_digits=6, decimal_places=2)
     is_overtime = models.BooleanField(default=False)
+    # Portion of hours past the daily/weekly thresholds; maintained by time_tracking.overtime
+    overtime_hours = models.DecimalField(max_digits=6, decimal_places=2, default=Decimal('0'))
     description = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    approved_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='approved_time_entries',
+    )
+    approved_at = models.DateTimeField(null=True, blank=True)
+    # Incremental analytics export key; .update()/bulk_update() callers must set it themselves
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = TimeEntryQuerySet.as_manager()
+
+    # Changing any of these voids an approval: the entry goes back to pending
+    APPROVAL_FIELDS = ('hours', 'project_id', 'date')
 
     class Meta:
         db_table = 'time_tracking_timeentry'
         ordering = ['-date', '-id']
         verbose_name_plural = 'Time entries'
+        indexes = [
+            # Approval queue scans pending rows; approve/lock filter one user-week
+            models.Index(fields=['status', 'user', 'date'], name='time_entry_status_user_date'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {(self.project.name if self.project else 'No project')} - {self.date}: {self.hours}h"
@@ -54,4 +116,84 @@ class TimeEntry(models.Model):
                 {'work_item': 'Work item must belong to the selected project.'}
             )
         if self.hours is not None and self.hours < 0:
-            raise ValidationError({'hours': 'Hours cannot be negative.'})
\ No newline at end of file
+            raise ValidationError({'hours': 'Hours cannot be negative.'})
+        if self.pk and TimeEntry.objects.filter(pk=self.pk, status=self.STATUS_LOCKED).exists():
+            raise ValidationError(LOCKED_ENTRY_MESSAGE)
+        if self.user_id and self.date and TimesheetLock.is_locked(self.user_id, self.date):
+            raise ValidationError({'date': LOCKED_WEEK_MESSAGE})
+
+    def reset_approval(self):
+        self.status = self.STATUS_PENDING
+        self.approved_by = None
+        self.approved_at = None
+
+    def approval_voided_by(self, stored):
+        """True if this approved entry's hours, project or date differ from the stored row (a values() dict)."""
+        if stored is None or stored['status'] != self.STATUS_APPROVED:
+            return False
+        current = (Decimal(str(self.hours)), self.project_id, str(self.date))
+        return current != (Decimal(str(stored['hours'])), stored['project_id'], str(stored['date']))
+
+    def save(self, *args, **kwargs):
+        """
+        Refuses locked entries and locked weeks (form validation is not the only way in), and sends an
+        edited approved entry back to pending. The stored row is kept on _previous so the signal handlers
+        can move hours off the week, work item and project the entry used to be logged against.
+        """
+        stored = None
+        if self.pk:
+            stored = TimeEntry.objects.filter(pk=self.pk).values(
+                'user_id', 'date', 'hours', 'work_item_id', 'project_id', 'status'
+            ).first()
+        if stored and stored['status'] == self.STATUS_LOCKED:
+            raise ValidationError(LOCKED_ENTRY_MESSAGE)
+        if TimesheetLock.is_locked(self.user_id, self.date):
+            raise ValidationError(LOCKED_WEEK_MESSAGE)
+        if self.approval_voided_by(stored):
+            self.reset_approval()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'status', 'approved_by', 'approved_at'}
+        self._previous = stored
+        super().save(*args, **kwargs)
+
+
+class TimesheetLock(models.Model):
+    """A closed user-week. Its entries are locked and its totals frozen for reporting."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timesheet_locks',
+    )
+    week_start = models.DateField()
+    total_hours = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0'))
+    overtime_hours = models.DecimalField(max_digits=8, decimal_places=2, default=Decimal('0'))
+    summary_json = models.TextField(blank=True)  # frozen rows for TimesheetSummaryView
+    locked_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    locked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'time_tracking_timesheetlock'
+        ordering = ['-week_start']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'week_start'], name='timesheet_lock_user_week'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} week of {self.week_start} (locked)"
+
+    @staticmethod
+    def week_start_for(day):
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        return day - timedelta(days=day.weekday())
+
+    @classmethod
+    def is_locked(cls, user_id, day):
+        return cls.objects.filter(user_id=user_id, week_start=cls.week_start_for(day)).exists()
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Overtime classification: hours past the daily or weekly threshold (per user) are overtime.
+Hours past the daily threshold are overtime first; only the remaining straight-time hours count toward
+the weekly threshold, so no hour is counted twice. Daily running totals come from a window function and
+the weekly straight-time total is carried across the rows of each user-week, so a whole period is
+classified in one query.
+Thresholds: settings.TIME_OVERTIME_DAILY_HOURS (default 8) and TIME_OVERTIME_WEEKLY_HOURS (default 40).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, Sum, Window
+from django.utils import timezone
+
+from .models import TimeEntry
+
+ZERO = Decimal('0')
+
+
+def get_thresholds():
+    """Return (daily, weekly) overtime thresholds in hours as Decimals."""
+    daily = Decimal(str(getattr(settings, 'TIME_OVERTIME_DAILY_HOURS', 8)))
+    weekly = Decimal(str(getattr(settings, 'TIME_OVERTIME_WEEKLY_HOURS', 40)))
+    return daily, weekly
+
+
+def split_overtime(hours, day_running, week_straight, daily, weekly):
+    """
+    (overtime, straight) for one entry. day_running is the day's total including this entry;
+    week_straight is the week's straight-time hours before it.
+    """
+    day_ot = min(hours, max(ZERO, day_running - daily))
+    straight = hours - day_ot
+    week_ot = min(straight, max(ZERO, week_straight + straight - weekly))
+    return day_ot + week_ot, straight - week_ot
+
+
+def _week_bounds(start, end):
+    return start - timedelta(days=start.weekday()), end + timedelta(days=6 - end.weekday())
+
+
+def classify_overtime(start, end, user_ids=None):
+    """
+    Recompute overtime_hours for all entries in the whole weeks covering start..end.
+    Entries are ordered by (date, id) inside each user-week; only rows whose split changed are written,
+    and locked entries are never rewritten.
+    Returns the number of entries updated.
+    """
+    start, end = _week_bounds(start, end)
+    daily, weekly = get_thresholds()
+    qs = TimeEntry.objects.filter(date__gte=start, date__lte=end)
+    if user_ids is not None:
+        qs = qs.filter(user_id__in=list(user_ids))
+    rows = qs.annotate(
+        day_running=Window(
+            Sum('hours'),
+            partition_by=[F('user_id'), F('date')],
+            order_by=F('id').asc(),
+        ),
+    ).only('id', 'user_id', 'date', 'hours', 'overtime_hours', 'status').order_by('user_id', 'date', 'id')
+    changed = []
+    now = timezone.now()
+    week, week_straight = None, ZERO
+    for e in rows:
+        key = (e.user_id, e.date - timedelta(days=e.date.weekday()))
+        if key != week:
+            week, week_straight = key, ZERO
+        ot, straight = split_overtime(e.hours, Decimal(e.day_running), week_straight, daily, weekly)
+        week_straight += straight
+        if ot != e.overtime_hours and e.status != TimeEntry.STATUS_LOCKED:
+            e.overtime_hours = ot
+            e.updated_at = now
+            changed.append(e)
+    if changed:
+        TimeEntry.objects.bulk_update(changed, ['overtime_hours', 'updated_at'], batch_size=500)
+    return len(changed)
+
+
+def recompute_user_week(user_id, day):
+    """Reclassify the single user-week containing day (date or ISO string)."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return classify_overtime(day, day, user_ids=[user_id])
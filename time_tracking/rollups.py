@@ -0,0 +1,178 @@
+"""
+Denormalized time totals kept on related rows:
+WorkItem.logged_hours / last_logged_at and Project.total_hours / hours_this_week (+ hours_week_start).
+Signals apply deltas with F() expressions so concurrent saves never lose an update; every write also
+stamps updated_at (which .update() and bulk_update() skip) so the analytics export picks the row up.
+repair_rollups() recomputes everything from TimeEntry when the counters drift (bulk writes, raw SQL).
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.data_version import bump_version
+from projects.analytics import invalidate as invalidate_project_analytics
+from projects.health import refresh as refresh_project_health
+from projects.models import Project
+from work.models import WorkItem
+from .models import TimeEntry
+from .overtime import recompute_user_week
+
+ZERO = Decimal('0')
+
+
+def _current_week():
+    today = date.today()
+    start = today - timedelta(days=today.weekday())
+    return start, start + timedelta(days=6)
+
+
+def _as_date(day):
+    return date.fromisoformat(day) if isinstance(day, str) else day
+
+
+def _hours_sum(entries):
+    """Scalar subquery: Sum(hours) of the correlated entries, 0 when there are none."""
+    total = Subquery(entries.order_by().values('project').annotate(t=Sum('hours')).values('t'))
+    return Coalesce(total, Value(ZERO), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def add_work_item_hours(work_item_id, delta, logged=True):
+    """Add delta hours to the work item's counter; logged=True also stamps last_logged_at."""
+    if not work_item_id or (not delta and not logged):
+        return
+    values = {'logged_hours': F('logged_hours') + delta, 'updated_at': timezone.now()}
+    if logged:
+        values['last_logged_at'] = timezone.now()
+    WorkItem.all_objects.filter(pk=work_item_id).update(**values)
+
+
+def add_project_hours(project_id, delta, day):
+    """
+    Add delta hours to the project's total; entries dated in the current week also move hours_this_week.
+    The first change in a new week restarts hours_this_week from that week's entries.
+    """
+    if not project_id or not delta:
+        return
+    values = {'total_hours': F('total_hours') + delta, 'updated_at': timezone.now()}
+    week_start, week_end = _current_week()
+    if week_start <= _as_date(day) <= week_end:
+        week_entries = TimeEntry.objects.filter(project=OuterRef('pk'), date__gte=week_start, date__lte=week_end)
+        values['hours_this_week'] = Case(
+            When(hours_week_start=week_start, then=F('hours_this_week') + delta),
+            default=_hours_sum(week_entries),
+        )
+        values['hours_week_start'] = week_start
+    Project.objects.filter(pk=project_id).update(**values)
+
+
+def apply_entry_change(previous, instance):
+    """
+    Move hours between work item and project counters for a saved entry.
+    previous is the stored {'work_item_id', 'project_id', 'date', 'hours'} before the save (None on create).
+    """
+    hours = Decimal(str(instance.hours))
+    if previous is None:
+        add_work_item_hours(instance.work_item_id, hours)
+        add_project_hours(instance.project_id, hours, instance.date)
+        return
+    if previous['work_item_id'] != instance.work_item_id:
+        add_work_item_hours(previous['work_item_id'], -previous['hours'], logged=False)
+        add_work_item_hours(instance.work_item_id, hours)
+    else:
+        add_work_item_hours(instance.work_item_id, hours - previous['hours'])
+    if (previous['project_id'], str(previous['date'])) != (instance.project_id, str(instance.date)):
+        add_project_hours(previous['project_id'], -previous['hours'], previous['date'])
+        add_project_hours(instance.project_id, hours, instance.date)
+    else:
+        add_project_hours(instance.project_id, hours - previous['hours'], instance.date)
+
+
+def remove_entry(instance):
+    """Take a deleted entry's hours off its work item and project."""
+    add_work_item_hours(instance.work_item_id, -instance.hours, logged=False)
+    add_project_hours(instance.project_id, -instance.hours, instance.date)
+
+
+def recompute_project_hours(project_ids=None):
+    """
+    Set project totals from TimeEntry (all projects, or just project_ids).
+    Used after bulk writes, which skip signals. Returns the number of projects changed.
+    """
+    week_start, week_end = _current_week()
+    entries = TimeEntry.objects.filter(project=OuterRef('pk'))
+    qs = Project.objects.all()
+    if project_ids is not None:
+        qs = qs.filter(pk__in=list(project_ids))
+    rows = qs.annotate(
+        actual_total=_hours_sum(entries),
+        actual_week=_hours_sum(entries.filter(date__gte=week_start, date__lte=week_end)),
+    ).only('id', 'total_hours', 'hours_this_week', 'hours_week_start')
+    changed = []
+    now = timezone.now()
+    for project in rows:
+        if (project.total_hours, project.hours_this_week, project.hours_week_start) != (
+            project.actual_total, project.actual_week, week_start
+        ):
+            project.total_hours = project.actual_total
+            project.hours_this_week = project.actual_week
+            project.hours_week_start = week_start
+            project.updated_at = now
+            changed.append(project)
+    if changed:
+        Project.objects.bulk_update(
+            changed, ['total_hours', 'hours_this_week', 'hours_week_start', 'updated_at'], batch_size=500
+        )
+    return len(changed)
+
+
+def repair_work_item_hours():
+    """
+    Recompute logged_hours for every work item from TimeEntry (and fill a missing last_logged_at).
+    Returns the number of rows fixed.
+    """
+    entries = TimeEntry.objects.filter(work_item=OuterRef('pk')).order_by().values('work_item')
+    total = Subquery(entries.annotate(t=Sum('hours')).values('t'))
+    rows = WorkItem.all_objects.annotate(
+        actual=Coalesce(total, Value(ZERO), output_field=DecimalField(max_digits=8, decimal_places=2)),
+        last_entry=Subquery(entries.annotate(d=Max('date')).values('d')),
+    ).only('id', 'logged_hours', 'last_logged_at')
+    changed = []
+    now = timezone.now()
+    for item in rows:
+        last = item.last_logged_at
+        if last is None and item.last_entry:
+            # Entries carry no timestamp; the latest entry date is the best available stand-in
+            last = timezone.make_aware(datetime.combine(item.last_entry, time.min))
+        if item.logged_hours != item.actual or last != item.last_logged_at:
+            item.logged_hours = item.actual
+            item.last_logged_at = last
+            item.updated_at = now
+            changed.append(item)
+    if changed:
+        WorkItem.all_objects.bulk_update(changed, ['logged_hours', 'last_logged_at', 'updated_at'], batch_size=500)
+    return len(changed)
+
+
+def entries_changed(weeks=(), project_ids=(), recompute_totals=False):
+    """
+    Follow-up work for any TimeEntry write, shared by the signal handlers (one row, counters already
+    moved by deltas) and bulk writers (which skip signals; pass recompute_totals=True to recompute the
+    projects' hour totals from TimeEntry). weeks is (user_id, day) pairs whose user-weeks are reclassified
+    for overtime; project_ids get their analytics invalidated and health refreshed.
+    """
+    for user_id, day in dict.fromkeys(weeks):
+        recompute_user_week(user_id, day)
+    project_ids = {pk for pk in project_ids if pk}
+    if recompute_totals and project_ids:
+        recompute_project_hours(project_ids)
+    invalidate_project_analytics(*project_ids)
+    refresh_project_health(*project_ids)
+    bump_version('time_entries')
+
+
+def repair_rollups():
+    """Recompute every denormalized total. Returns {'work_items': fixed, 'projects': fixed}."""
+    return {'work_items': repair_work_item_hours(), 'projects': recompute_project_hours()}
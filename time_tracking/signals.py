@@ -0,0 +1,30 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.bulk import signals_muted
+from .models import TimeEntry
+from .rollups import apply_entry_change, entries_changed, remove_entry
+
+
+@receiver(post_save, sender=TimeEntry)
+def update_rollups_on_save(sender, instance, raw=False, **kwargs):
+    """
+    TimeEntry.save() stashes the stored row on _previous, so an edit that moves an entry also
+    reclassifies the week it left and moves its hours off the old work item / project.
+    """
+    if raw or signals_muted():
+        return
+    previous = getattr(instance, '_previous', None)
+    apply_entry_change(previous, instance)
+    weeks = [(instance.user_id, instance.date)]
+    if previous:
+        weeks.append((previous['user_id'], previous['date']))
+    entries_changed(weeks, [instance.project_id, previous['project_id'] if previous else None])
+
+
+@receiver(post_delete, sender=TimeEntry)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    if signals_muted():
+        return
+    remove_entry(instance)
+    entries_changed([(instance.user_id, instance.date)], [instance.project_id])
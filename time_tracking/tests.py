@@ -6,7 +6,7 @@ from django.contrib.auth import get_user_model
 from core.models import Profile
 from projects.models import Project
 from work.models import WorkItem
-from time_tracking.models import TimeEntry
+from time_tracking.models import TimeEntry, TimesheetLock
 
 User = get_user_model()
 
@@ -194,3 +194,367 @@ class WeekNavigationTest(TestCase):
         request.user = self.user
         response = TimeEntryListView.as_view()(request)
         self.assertEqual(response.status_code, 200)
+
+
+class TimesheetGridTest(TestCase):
+    """Week grid saves every cell in one POST by diffing against existing entries."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='sched', password='pass')
+        self.user.profile.role = Profile.SCHEDULER
+        self.user.profile.save()
+        self.project = Project.objects.create(
+            project_number='PRJ-G1', name='Grid', client='C', pm='PM', status=Project.STATUS_ACTIVE
+        )
+        self.other_project = Project.objects.create(
+            project_number='PRJ-G2', name='Grid 2', client='C', pm='PM', status=Project.STATUS_ACTIVE
+        )
+        self.url = reverse('timesheet_grid') + '?week_start=2025-02-10'
+
+    def test_grid_renders_existing_rows(self):
+        TimeEntry.objects.create(user=self.user, project=self.project, date='2025-02-11', hours=Decimal('3'))
+        self.client.login(username='sched', password='pass')
+        r = self.client.get(self.url)
+        self.assertEqual(r.status_code, 200)
+        self.assertContains(r, 'PRJ-G1')
+        self.assertContains(r, f'name="h_{self.project.pk}_1"')
+
+    def test_save_creates_updates_and_deletes(self):
+        from datetime import date
+        keep = TimeEntry.objects.create(user=self.user, project=self.project, date='2025-02-10', hours=Decimal('2'))
+        TimeEntry.objects.create(user=self.user, project=self.project, date='2025-02-11', hours=Decimal('4'))
+        task_entry = TimeEntry.objects.create(
+            user=self.user, project=self.project, date='2025-02-11', hours=Decimal('1'),
+            work_code=TimeEntry.WORK_CODE_SCHEDULE_UPDATE,
+        )
+        self.client.login(username='sched', password='pass')
+        data = {f'h_{self.project.pk}_0': '5', f'h_{self.project.pk}_1': '', 'new_0_project': self.other_project.pk, 'new_0_2': '7.5'}
+        r = self.client.post(self.url, data)
+        self.assertEqual(r.status_code, 302)
+        keep.refresh_from_db()
+        self.assertEqual(keep.hours, Decimal('5'))
+        self.assertFalse(TimeEntry.objects.filter(date='2025-02-11', work_code='').exists())
+        self.assertTrue(TimeEntry.objects.filter(pk=task_entry.pk).exists())
+        created = TimeEntry.objects.get(project=self.other_project)
+        self.assertEqual(created.date, date(2025, 2, 12))
+        self.assertEqual(created.hours, Decimal('7.5'))
+        self.project.refresh_from_db()
+        self.other_project.refresh_from_db()
+        self.assertEqual(self.project.total_hours, Decimal('6'))
+        self.assertEqual(self.other_project.total_hours, Decimal('7.5'))
+
+    def test_save_is_noop_when_unchanged(self):
+        from time_tracking.views import save_week_grid
+        from datetime import date
+        TimeEntry.objects.create(user=self.user, project=self.project, date='2025-02-10', hours=Decimal('2'))
+        result = save_week_grid(self.user, date(2025, 2, 10), {(self.project.pk, date(2025, 2, 10)): Decimal('2')})
+        self.assertEqual(result, (0, 0, 0))
+
+    def test_grid_edit_is_in_next_incremental_export(self):
+        import tempfile
+        from datetime import date
+        from core.analytics_export import FORMAT_NPZ, export_snapshot, load_npz, read_manifest
+        from time_tracking.views import save_week_grid
+        entry = TimeEntry.objects.create(user=self.user, project=self.project, date='2025-02-10', hours=Decimal('2'))
+        with tempfile.TemporaryDirectory() as out:
+            export_snapshot(out, fmt=FORMAT_NPZ, tables=['time_entries'])
+            save_week_grid(self.user, date(2025, 2, 10), {(self.project.pk, date(2025, 2, 10)): Decimal('6')})
+            self.assertEqual(export_snapshot(out, fmt=FORMAT_NPZ, tables=['time_entries']), {'time_entries': 1})
+            last = load_npz(f"{out}/{read_manifest(out)['time_entries']['parts'][-1]}")
+        self.assertEqual((list(last['id']), list(last['hours'])), ([entry.pk], [6.0]))
+
+    def test_duplicate_new_row_rejected(self):
+        TimeEntry.objects.create(user=self.user, project=self.project, date='2025-02-10', hours=Decimal('2'))
+        self.client.login(username='sched', password='pass')
+        r = self.client.post(self.url, {f'h_{self.project.pk}_0': '2', 'new_0_project': self.project.pk, 'new_0_1': '1'})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(TimeEntry.objects.filter(user=self.user).count(), 1)
+
+
+class OvertimeClassificationTest(TestCase):
+    """Hours past the daily/weekly thresholds are split into overtime_hours automatically."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ot', password='p')
+        self.project = Project.objects.create(
+            project_number='PRJ-OT', name='OT', client='C', pm='PM', status=Project.STATUS_ACTIVE
+        )
+
+    def _entry(self, day, hours):
+        return TimeEntry.objects.create(user=self.user, project=self.project, date=day, hours=Decimal(hours))
+
+    def test_daily_threshold(self):
+        first = self._entry('2025-02-10', '6')
+        second = self._entry('2025-02-10', '4')
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.overtime_hours, Decimal('0'))
+        self.assertEqual(second.overtime_hours, Decimal('2'))
+
+    def test_weekly_threshold(self):
+        entries = [self._entry(f'2025-02-{10 + i}', '7') for i in range(6)]
+        for e in entries:
+            e.refresh_from_db()
+        self.assertEqual([e.overtime_hours for e in entries[:5]], [Decimal('0')] * 5)
+        self.assertEqual(entries[5].overtime_hours, Decimal('2'))
+
+    def test_daily_overtime_not_counted_again_weekly(self):
+        monday = self._entry('2025-02-10', '12')
+        rest = [self._entry(f'2025-02-{11 + i}', '8') for i in range(4)]
+        monday.refresh_from_db()
+        for e in rest:
+            e.refresh_from_db()
+        # 44h total, 4h over the daily limit on Monday; straight time is exactly 40h, so no weekly OT
+        self.assertEqual(monday.overtime_hours, Decimal('4'))
+        self.assertEqual([e.overtime_hours for e in rest], [Decimal('0')] * 4)
+        saturday = self._entry('2025-02-15', '3')
+        saturday.refresh_from_db()
+        self.assertEqual(saturday.overtime_hours, Decimal('3'))
+
+    def test_delete_and_move_reclassify_affected_weeks(self):
+        first = self._entry('2025-02-10', '6')
+        second = self._entry('2025-02-10', '4')
+        first.delete()
+        second.refresh_from_db()
+        self.assertEqual(second.overtime_hours, Decimal('0'))
+        third = self._entry('2025-02-11', '9')
+        third.refresh_from_db()
+        self.assertEqual(third.overtime_hours, Decimal('1'))
+        third.date = '2025-02-17'
+        third.hours = Decimal('5')
+        third.save()
+        third.refresh_from_db()
+        self.assertEqual(third.overtime_hours, Decimal('0'))
+
+    def test_thresholds_from_settings(self):
+        from django.test import override_settings
+        with override_settings(TIME_OVERTIME_DAILY_HOURS=4):
+            e = self._entry('2025-02-10', '5')
+        e.refresh_from_db()
+        self.assertEqual(e.overtime_hours, Decimal('1'))
+
+
+class WorkItemLoggedHoursTest(TestCase):
+    """WorkItem.logged_hours follows time entries through create, edit, reassignment and delete."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='lh', password='p')
+        self.project = Project.objects.create(
+            project_number='PRJ-LH', name='LH', client='C', pm='PM', status=Project.STATUS_ACTIVE
+        )
+        self.task = WorkItem.objects.create(project=self.project, title='A', assigned_to=self.user)
+        self.other_task = WorkItem.objects.create(project=self.project, title='B', assigned_to=self.user)
+
+    def _hours(self, item):
+        item.refresh_from_db()
+        return item.logged_hours
+
+    def test_counter_follows_entries(self):
+        e = TimeEntry.objects.create(user=self.user, project=self.project, work_item=self.task, date='2025-02-10', hours=Decimal('3'))
+        TimeEntry.objects.create(user=self.user, project=self.project, work_item=self.task, date='2025-02-11', hours=Decimal('2'))
+        self.assertEqual(self._hours(self.task), Decimal('5'))
+        self.assertIsNotNone(self.task.last_logged_at)
+        e.hours = Decimal('4')
+        e.save()
+        self.assertEqual(self._hours(self.task), Decimal('6'))
+        e.work_item = self.other_task
+        e.save()
+        self.assertEqual(self._hours(self.task), Decimal('2'))
+        self.assertEqual(self._hours(self.other_task), Decimal('4'))
+        e.delete()
+        self.assertEqual(self._hours(self.other_task), Decimal('0'))
+
+    def test_repair_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+        TimeEntry.objects.create(user=self.user, project=self.project, work_item=self.task, date='2025-02-10', hours=Decimal('3'))
+        WorkItem.all_objects.filter(pk=self.task.pk).update(logged_hours=Decimal('99'), last_logged_at=None)
+        call_command('repair_time_rollups', stdout=StringIO())
+        self.assertEqual(self._hours(self.task), Decimal('3'))
+        self.assertIsNotNone(self.task.last_logged_at)
+
+    def test_my_work_sorts_by_logged_hours(self):
+        self.user.profile.role = Profile.SCHEDULER
+        self.user.profile.save()
+        TimeEntry.objects.create(user=self.user, project=self.project, work_item=self.other_task, date='2025-02-10', hours=Decimal('3'))
+        self.client.login(username='lh', password='p')
+        response = self.client.get(reverse('my_work'), {'status': 'all', 'sort': 'logged_hours', 'order': 'desc'})
+        self.assertEqual(response.status_code, 200)
+        titles = [item.title for item in response.context['work_items']]
+        self.assertEqual(titles[:2], ['B', 'A'])
+
+
+class TimeApprovalTest(TestCase):
+    """Approve/lock a user-week in bulk; locked weeks are immutable and serve frozen totals."""
+
+    def setUp(self):
+        self.client = Client()
+        self.manager = User.objects.create_user(username='manager', password='pass')
+        self.manager.profile.role = Profile.MANAGER
+        self.manager.profile.save()
+        self.scheduler = User.objects.create_user(username='sched', password='pass')
+        self.scheduler.profile.role = Profile.SCHEDULER
+        self.scheduler.profile.save()
+        self.project = Project.objects.create(
+            project_number='PRJ-AP', name='Approve', client='C', pm='PM', status=Project.STATUS_ACTIVE,
+            project_manager=self.manager,
+        )
+        self.e1 = TimeEntry.objects.create(user=self.scheduler, project=self.project, date='2025-02-10', hours=Decimal('3'))
+        self.e2 = TimeEntry.objects.create(user=self.scheduler, project=self.project, date='2025-02-12', hours=Decimal('2'))
+
+    def test_pending_queue_and_count(self):
+        from time_tracking.approvals import pending_week_count, pending_weeks
+        weeks = list(pending_weeks(self.manager))
+        self.assertEqual(len(weeks), 1)
+        self.assertEqual(weeks[0]['hours'], Decimal('5'))
+        self.assertEqual(pending_week_count(), 1)
+
+    def test_approve_week_is_single_update(self):
+        from datetime import date
+        from time_tracking.approvals import approve_week
+        with self.assertNumQueries(1):
+            count = approve_week(self.scheduler.pk, date(2025, 2, 10), self.manager)
+        self.assertEqual(count, 2)
+        self.e1.refresh_from_db()
+        self.assertEqual(self.e1.status, TimeEntry.STATUS_APPROVED)
+        self.assertEqual(self.e1.approved_by, self.manager)
+
+    def test_lock_via_queue_freezes_week(self):
+        self.client.login(username='manager', password='pass')
+        r = self.client.post(reverse('time_approval_queue'), {'action': 'lock', 'weeks': [f'{self.scheduler.pk}:2025-02-10']})
+        self.assertEqual(r.status_code, 302)
+        self.e1.refresh_from_db()
+        self.assertEqual(self.e1.status, TimeEntry.STATUS_LOCKED)
+        self.assertIsNotNone(self.e1.approved_at)
+        r = self.client.get(reverse('timesheet_summary'), {'week_start': '2025-02-10', 'user': self.scheduler.pk})
+        self.assertContains(r, 'Totals are frozen')
+        self.assertEqual(r.context['total_hours'], Decimal('5'))
+
+    def test_locked_week_rejects_changes(self):
+        from datetime import date
+        from time_tracking.approvals import lock_week
+        lock_week(self.scheduler.pk, date(2025, 2, 10), self.manager)
+        self.client.login(username='sched', password='pass')
+        r = self.client.post(reverse('time_entry_list'), {'project': self.project.pk, 'date': '2025-02-11', 'hours': '1'})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(TimeEntry.objects.filter(user=self.scheduler).count(), 2)
+        r = self.client.post(reverse('time_entry_delete', kwargs={'pk': self.e1.pk}))
+        self.assertEqual(r.status_code, 404)
+        self.assertTrue(TimeEntry.objects.filter(pk=self.e1.pk).exists())
+
+    def test_scoped_queue_only_acts_on_own_projects(self):
+        from datetime import date
+        other_manager = User.objects.create_user(username='manager2', password='pass')
+        other_manager.profile.role = Profile.MANAGER
+        other_manager.profile.save()
+        other_project = Project.objects.create(
+            project_number='PRJ-AP2', name='Other', client='C', pm='PM', status=Project.STATUS_ACTIVE,
+            project_manager=other_manager,
+        )
+        theirs = TimeEntry.objects.create(user=self.scheduler, project=other_project, date='2025-02-11', hours=Decimal('4'))
+        week = f'{self.scheduler.pk}:2025-02-10'
+        self.client.login(username='manager', password='pass')
+        url = reverse('time_approval_queue') + '?mine=1'
+        self.client.post(url, {'action': 'approve', 'weeks': [week]})
+        self.e1.refresh_from_db()
+        theirs.refresh_from_db()
+        self.assertEqual((self.e1.status, theirs.status), (TimeEntry.STATUS_APPROVED, TimeEntry.STATUS_PENDING))
+        r = self.client.post(url, {'action': 'lock', 'weeks': [week]}, follow=True)
+        self.assertContains(r, 'not locked')
+        self.assertFalse(TimesheetLock.is_locked(self.scheduler.pk, date(2025, 2, 10)))
+        # The other manager's own queue covers their entry; the unscoped queue still locks the whole week
+        self.client.login(username='manager2', password='pass')
+        self.client.post(url, {'action': 'approve', 'weeks': [week]})
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.approved_by, other_manager)
+        self.client.post(reverse('time_approval_queue'), {'action': 'lock', 'weeks': [week]})
+        self.assertTrue(TimesheetLock.is_locked(self.scheduler.pk, date(2025, 2, 10)))
+
+    def test_edit_voids_approval(self):
+        from datetime import date
+        from time_tracking.approvals import approve_week
+        from time_tracking.views import save_week_grid
+        approve_week(self.scheduler.pk, date(2025, 2, 10), self.manager)
+        self.client.login(username='sched', password='pass')
+        r = self.client.post(reverse('time_entry_edit', kwargs={'pk': self.e1.pk}),
+                             {'project': self.project.pk, 'date': '2025-02-10', 'hours': '4'})
+        self.assertEqual(r.status_code, 302)
+        self.e1.refresh_from_db()
+        self.assertEqual((self.e1.status, self.e1.approved_by, self.e1.approved_at), (TimeEntry.STATUS_PENDING, None, None))
+        save_week_grid(self.scheduler, date(2025, 2, 10), {(self.project.pk, date(2025, 2, 12)): Decimal('5')})
+        self.e2.refresh_from_db()
+        self.assertEqual((self.e2.hours, self.e2.status, self.e2.approved_by), (Decimal('5'), TimeEntry.STATUS_PENDING, None))
+        # Saving without a change keeps the approval
+        approve_week(self.scheduler.pk, date(2025, 2, 10), self.manager)
+        self.e1.refresh_from_db()
+        self.e1.save()
+        self.assertEqual(self.e1.status, TimeEntry.STATUS_APPROVED)
+
+    def test_locked_week_rejects_orm_and_bulk_writes(self):
+        from datetime import date
+        from django.core.exceptions import ValidationError
+        from time_tracking.approvals import lock_week
+        from time_tracking.views import save_week_grid
+        lock_week(self.scheduler.pk, date(2025, 2, 10), self.manager)
+        self.e1.refresh_from_db()
+        self.e1.hours = Decimal('8')
+        with self.assertRaises(ValidationError):
+            self.e1.save()
+        with self.assertRaises(ValidationError):
+            TimeEntry.objects.create(user=self.scheduler, project=self.project, date='2025-02-11', hours=Decimal('1'))
+        with self.assertRaises(ValidationError):
+            TimeEntry.objects.bulk_create([TimeEntry(user=self.scheduler, project=self.project, date='2025-02-11', hours=1)])
+        with self.assertRaises(ValidationError):
+            save_week_grid(self.scheduler, date(2025, 2, 10), {(self.project.pk, date(2025, 2, 11)): Decimal('1')})
+        self.assertEqual(TimeEntry.objects.filter(user=self.scheduler).count(), 2)
+        self.assertEqual(TimeEntry.objects.get(pk=self.e1.pk).hours, Decimal('3'))
+        # Other weeks are unaffected
+        TimeEntry.objects.bulk_create([TimeEntry(user=self.scheduler, project=self.project, date='2025-02-17', hours=1)])
+
+
+class UtilizationReportTest(TestCase):
+    """Utilization heatmap combines logged hours and open task load per user-week."""
+
+    def setUp(self):
+        self.manager = User.objects.create_user(username='manager', password='pass')
+        self.manager.profile.role = Profile.MANAGER
+        self.manager.profile.save()
+        self.project = Project.objects.create(
+            project_number='PRJ-UT', name='Util', client='C', pm='PM', status=Project.STATUS_ACTIVE
+        )
+
+    def test_matrices_from_aggregates(self):
+        from datetime import date
+        from time_tracking.utilization import build_matrices
+        weeks = [date(2025, 2, 3), date(2025, 2, 10)]
+        TimeEntry.objects.create(user=self.manager, project=self.project, date='2025-02-11', hours=Decimal('6'))
+        TimeEntry.objects.create(user=self.manager, project=self.project, date='2025-02-12', hours=Decimal('4'))
+        WorkItem.objects.create(project=self.project, title='T', assigned_to=self.manager, due_date='2025-02-05')
+        with self.assertNumQueries(2):
+            logged, load = build_matrices([self.manager.pk], weeks)
+        self.assertEqual(logged.tolist(), [[0.0, 10.0]])
+        self.assertEqual(load.tolist(), [[1.0, 0.0]])
+
+    def test_report_renders_50_users_by_52_weeks(self):
+        from datetime import date, timedelta
+        from time_tracking.views import UtilizationReportView
+        from django.test import RequestFactory
+        from core.models import Profile as P
+        users = User.objects.bulk_create([User(username=f'user{i:02d}') for i in range(50)])
+        P.objects.bulk_create([P(user=u, role=P.SCHEDULER) for u in users])
+        start = date(2025, 1, 6)
+        TimeEntry.objects.bulk_create([
+            TimeEntry(user=u, project=self.project, date=start + timedelta(weeks=w), hours=Decimal('30'))
+            for u in users for w in range(52)
+        ])
+        request = RequestFactory().get(reverse('utilization_report'), {'start': '2025-01-06', 'weeks': '52'})
+        request.user = self.manager
+        # Users, hours and open tasks: three aggregate queries however many users x weeks
+        with self.assertNumQueries(3):
+            r = UtilizationReportView.as_view()(request)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.content.count(b'util-2'), 50 * 52 + 1)
+        # Second render is served from the data-version cache
+        with self.assertNumQueries(1):
+            UtilizationReportView.as_view()(request)
@@ -3,6 +3,9 @@ from . import views
 
 urlpatterns = [
     path('', views.TimeEntryListView.as_view(), name='time_entry_list'),
+    path('week/', views.TimesheetGridView.as_view(), name='timesheet_grid'),
+    path('approvals/', views.TimeApprovalQueueView.as_view(), name='time_approval_queue'),
+    path('utilization/', views.UtilizationReportView.as_view(), name='utilization_report'),
     path('summary/', views.TimesheetSummaryView.as_view(), name='timesheet_summary'),
     path('export-csv/', views.TimeEntryCSVExportView.as_view(), name='time_entry_export_csv'),
     path('<int:pk>/edit/', views.TimeEntryUpdateView.as_view(), name='time_entry_edit'),
@@ -0,0 +1,118 @@
+"""
+Utilization and capacity: users × weeks matrices built from two aggregate queries.
+logged = hours from TimeEntry; load = open WorkItems due that week × TIME_UTILIZATION_TASK_HOURS.
+Results (including the rendered heatmap rows) are cached by the time entry / work item data versions.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncWeek
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from core.data_version import get_version
+from work.models import WorkItem
+from .models import TimeEntry
+
+# Utilization ratio bucket edges -> heatmap classes util-0 .. util-5
+UTILIZATION_BINS = np.array([0.25, 0.5, 0.8, 1.0, 1.2])
+CACHE_SECONDS = 10 * 60
+
+
+def get_weekly_capacity():
+    return float(getattr(settings, 'TIME_OVERTIME_WEEKLY_HOURS', 40))
+
+
+def get_task_hours():
+    return float(getattr(settings, 'TIME_UTILIZATION_TASK_HOURS', 4))
+
+
+def build_matrices(user_ids, week_starts):
+    """
+    Return (logged, load) float arrays of shape (len(user_ids), len(week_starts)).
+    load is the count of open/in-progress tasks assigned to the user and due that week.
+    """
+    user_index = {uid: i for i, uid in enumerate(user_ids)}
+    week_index = {w: j for j, w in enumerate(week_starts)}
+    first, last = week_starts[0], week_starts[-1] + timedelta(days=6)
+    logged = np.zeros((len(user_ids), len(week_starts)))
+    load = np.zeros((len(user_ids), len(week_starts)))
+
+    hours_rows = (
+        TimeEntry.objects.filter(user_id__in=user_ids, date__gte=first, date__lte=last)
+        .annotate(week=TruncWeek('date'))
+        .values_list('user_id', 'week')
+        .annotate(total=Sum('hours'))
+        .order_by()
+    )
+    for user_id, week, total in hours_rows:
+        logged[user_index[user_id], week_index[week]] = float(total or 0)
+
+    task_rows = (
+        WorkItem.objects.filter(
+            assigned_to_id__in=user_ids,
+            status__in=(WorkItem.STATUS_OPEN, WorkItem.STATUS_IN_PROGRESS),
+            due_date__gte=first,
+            due_date__lte=last,
+        )
+        .annotate(week=TruncWeek('due_date'))
+        .values_list('assigned_to_id', 'week')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for user_id, week, n in task_rows:
+        load[user_index[user_id], week_index[week]] = n
+    return logged, load
+
+
+def _heatmap_rows(users, logged, load, utilization, buckets):
+    """Pre-render each user's cells so the template does one output per row (fast at 50 × 52)."""
+    rows = []
+    for i, user in enumerate(users):
+        cells = mark_safe(''.join(
+            format_html(
+                '<td class="num util-{}" title="{} h logged, {} open task(s)">{}</td>',
+                buckets[i, j], f'{logged[i, j]:g}', int(load[i, j]), f'{utilization[i, j]:.0%}',
+            )
+            for j in range(logged.shape[1])
+        ))
+        rows.append({
+            'name': user.get_full_name() or user.username,
+            'cells_html': cells,
+            'total_logged': float(logged[i].sum()),
+            'open_tasks': int(load[i].sum()),
+        })
+    return rows
+
+
+def utilization_report(users, week_starts):
+    """
+    Heatmap data for users (list of User) over week_starts (list of Monday dates).
+    Utilization = (logged hours + open task load in hours) / weekly capacity.
+    """
+    user_ids = [u.pk for u in users]
+    key = 'utilization:{}:{}:{}:{}:{}'.format(
+        week_starts[0].isoformat(),
+        len(week_starts),
+        hash(tuple(user_ids)),
+        get_version('time_entries'),
+        get_version('work_items'),
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    logged, load = build_matrices(user_ids, week_starts)
+    utilization = (logged + load * get_task_hours()) / get_weekly_capacity()
+    buckets = np.digitize(utilization, UTILIZATION_BINS)
+    week_totals = logged.sum(axis=0)
+    report = {
+        'rows': _heatmap_rows(users, logged, load, utilization, buckets),
+        'week_totals': [float(x) for x in week_totals],
+        'overloaded_count': int((utilization > 1.0).any(axis=1).sum()),
+        'mean_utilization': float(utilization.mean()) if utilization.size else 0.0,
+    }
+    cache.set(key, report, CACHE_SECONDS)
+    return report
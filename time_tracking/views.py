@@ -1,18 +1,26 @@
 import csv
+from collections import defaultdict
 from datetime import date, timedelta
+from decimal import Decimal
 from io import StringIO
 from django.shortcuts import redirect, render
 from django.contrib import messages
 from django.views import View
 from django.views.generic import UpdateView, DeleteView
 from django.urls import reverse, reverse_lazy
+from django.db import transaction
 from django.db.models import Sum
 from django.http import HttpResponse
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.utils import timezone
 
-from core.mixins import SchedulerOrManagerMixin, user_is_manager
-from .models import TimeEntry
-from .forms import TimeEntryForm
+from core.mixins import ManagerRequiredMixin, SchedulerOrManagerMixin, user_is_manager
+from .models import TimeEntry, TimesheetLock
+from .approvals import approve_week, frozen_summary, lock_week, pending_weeks, week_summary
+from .forms import TimeEntryForm, TimesheetGridForm
+from .rollups import entries_changed
+from .utilization import get_task_hours, get_weekly_capacity, utilization_report
 
 User = get_user_model()
 
@@ -65,6 +73,7 @@ class TimeEntryListView(SchedulerOrManagerMixin, View):
         return render(request, 'time_tracking/time_entry_list.html', {
             'form': form,
             'entries': qs,
+            'is_locked': TimesheetLock.is_locked(target_user.pk, start),
             'week_start': start,
             'week_end': end,
             'prev_week': prev_week,
@@ -77,11 +86,9 @@ class TimeEntryListView(SchedulerOrManagerMixin, View):
         })
 
     def post(self, request):
-        form = TimeEntryForm(request.POST)
+        form = TimeEntryForm(request.POST, instance=TimeEntry(user=request.user))
         if form.is_valid():
-            entry = form.save(commit=False)
-            entry.user = request.user
-            entry.save()
+            entry = form.save()
             messages.success(request, 'Time entry added.')
             user_param = request.GET.get('user')
             if user_is_manager(request.user) and user_param:
@@ -106,6 +113,7 @@ class TimeEntryListView(SchedulerOrManagerMixin, View):
         return render(request, 'time_tracking/time_entry_list.html', {
             'form': form,
             'entries': qs,
+            'is_locked': TimesheetLock.is_locked(target_user.pk, start),
             'week_start': start,
             'week_end': end,
             'prev_week': start - timedelta(days=7),
@@ -118,11 +126,154 @@ class TimeEntryListView(SchedulerOrManagerMixin, View):
         })
 
 
+def _grid_entries(user, start, end):
+    """Entries the week grid owns: project hours with no task or work code attached."""
+    return TimeEntry.objects.filter(
+        user=user,
+        date__gte=start,
+        date__lte=end,
+        project__isnull=False,
+        work_item__isnull=True,
+        work_code='',
+    )
+
+
+def save_week_grid(user, start, cells):
+    """
+    Diff submitted grid cells against the user's grid entries for the week starting at start.
+    cells is {(project_id, date): hours}. Creates, updates and deletes run in one transaction.
+    Returns (created, updated, deleted) counts.
+    """
+    existing = defaultdict(list)
+    for e in _grid_entries(user, start, start + timedelta(days=6)).order_by('id'):
+        existing[(e.project_id, e.date)].append(e)
+    to_create, to_update, to_delete = [], [], []
+    for (project_id, day), hours in cells.items():
+        entries = existing.get((project_id, day), [])
+        if not entries:
+            if hours:
+                to_create.append(TimeEntry(user=user, project_id=project_id, date=day, hours=hours))
+            continue
+        if sum(e.hours for e in entries) == hours:
+            continue
+        if not hours:
+            to_delete.extend(e.pk for e in entries)
+            continue
+        # Collapse duplicates for the same cell onto the oldest entry; changed hours void an approval
+        first = entries[0]
+        first.hours = hours
+        if first.status == TimeEntry.STATUS_APPROVED:
+            first.reset_approval()
+        to_update.append(first)
+        to_delete.extend(e.pk for e in entries[1:])
+    with transaction.atomic():
+        if to_delete:
+            TimeEntry.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            now = timezone.now()
+            for e in to_update:
+                e.updated_at = now  # bulk_update skips auto_now
+            TimeEntry.objects.bulk_update(to_update, ['hours', 'status', 'approved_by', 'approved_at', 'updated_at'])
+        if to_create:
+            TimeEntry.objects.bulk_create(to_create)
+    # Bulk writes skip model signals; run the same follow-up the signal handlers do
+    entries_changed([(user.pk, start)], {project_id for project_id, _day in cells}, recompute_totals=True)
+    return len(to_create), len(to_update), len(to_delete)
+
+
+class TimesheetGridView(SchedulerOrManagerMixin, View):
+    """Project × day grid for one week; all cells are saved in a single POST."""
+    template_name = 'time_tracking/timesheet_grid.html'
+
+    def _week(self, request):
+        week_str = request.GET.get('week_start') or request.GET.get('week')
+        try:
+            ref = date.fromisoformat(week_str) if week_str else date.today()
+        except (ValueError, TypeError):
+            ref = date.today()
+        return week_range(ref)
+
+    def _grid_projects(self, user, start, end):
+        """Rows: projects with grid hours this week or last week (so last week's rows carry over)."""
+        from projects.models import Project
+        project_ids = _grid_entries(user, start - timedelta(days=7), end).values_list('project_id', flat=True).distinct()
+        return list(Project.objects.filter(pk__in=project_ids).order_by('project_number'))
+
+    def _form(self, request, user, start, end, data=None):
+        days = [start + timedelta(days=i) for i in range(7)]
+        projects = self._grid_projects(user, start, end)
+        initial = {}
+        for e in _grid_entries(user, start, end):
+            key = f'h_{e.project_id}_{(e.date - start).days}'
+            initial[key] = initial.get(key, Decimal('0')) + e.hours
+        return TimesheetGridForm(data, projects=projects, days=days, initial=initial)
+
+    def _render(self, request, form, target_user, start, end):
+        rows = []
+        for p in form.projects:
+            cells = [form[f'h_{p.pk}_{i}'] for i in range(len(form.days))]
+            total = sum((form.initial.get(f'h_{p.pk}_{i}') or 0) for i in range(len(form.days)))
+            rows.append({'project': p, 'cells': cells, 'total': total})
+        new_rows = [
+            {'project_field': form[f'new_{n}_project'], 'cells': [form[f'new_{n}_{i}'] for i in range(len(form.days))]}
+            for n in range(form.NEW_ROWS)
+        ]
+        day_totals = [
+            sum((form.initial.get(f'h_{p.pk}_{i}') or 0) for p in form.projects)
+            for i in range(len(form.days))
+        ]
+        other_hours = TimeEntry.objects.filter(user=target_user, date__gte=start, date__lte=end).exclude(
+            pk__in=_grid_entries(target_user, start, end).values('pk')
+        ).aggregate(t=Sum('hours'))['t'] or 0
+        is_manager = user_is_manager(request.user)
+        return render(request, self.template_name, {
+            'form': form,
+            'rows': rows,
+            'new_rows': new_rows,
+            'days': form.days,
+            'day_totals': day_totals,
+            'grid_total': sum(day_totals),
+            'other_hours': other_hours,
+            'is_locked': TimesheetLock.is_locked(target_user.pk, start),
+            'week_start': start,
+            'week_end': end,
+            'prev_week': start - timedelta(days=7),
+            'next_week': start + timedelta(days=7),
+            'today': date.today(),
+            'target_user': target_user,
+            'is_manager': is_manager,
+            'users': _timesheet_users_for_manager() if is_manager else [],
+        })
+
+    def get(self, request):
+        target_user = _timesheet_user(request)
+        start, end = self._week(request)
+        return self._render(request, self._form(request, target_user, start, end), target_user, start, end)
+
+    def post(self, request):
+        target_user = _timesheet_user(request)
+        start, end = self._week(request)
+        if TimesheetLock.is_locked(target_user.pk, start):
+            messages.error(request, 'This week is locked. Time can no longer be added or changed.')
+            return redirect(request.get_full_path())
+        form = self._form(request, target_user, start, end, data=request.POST)
+        if not form.is_valid():
+            return self._render(request, form, target_user, start, end)
+        created, updated, deleted = save_week_grid(target_user, start, form.cells())
+        messages.success(request, f'Timesheet saved: {created} added, {updated} updated, {deleted} removed.')
+        url = reverse('timesheet_grid') + '?week_start=' + start.isoformat()
+        if target_user != request.user:
+            url += '&user=' + str(target_user.pk)
+        return redirect(url)
+
+
 def _time_entry_queryset_for_request(request):
-    """Entries the current user may view/edit/delete: scheduler only own; manager may view allowed users."""
+    """Entries the current user may edit/delete: scheduler only own; manager may view allowed users. Locked entries are excluded."""
     if user_is_manager(request.user):
-        return TimeEntry.objects.filter(user__in=_timesheet_users_for_manager())
-    return TimeEntry.objects.filter(user=request.user)
+        qs = TimeEntry.objects.filter(user__in=_timesheet_users_for_manager())
+    else:
+        qs = TimeEntry.objects.filter(user=request.user)
+    return qs.exclude(status=TimeEntry.STATUS_LOCKED)
 
 
 class TimeEntryUpdateView(SchedulerOrManagerMixin, UpdateView):
@@ -201,30 +352,24 @@ class TimesheetSummaryView(SchedulerOrManagerMixin, View):
             ref = date.today()
         start, end = week_range(ref)
 
-        entries = TimeEntry.objects.filter(
-            user=target_user,
-            date__gte=start,
-            date__lte=end,
-        ).select_related('project', 'work_item', 'project__project_manager').order_by('date', 'project__project_number')
-
-        # Group by (week_start, project, task_type) -> hours
-        from collections import defaultdict
-        groups = defaultdict(lambda: {'hours': 0, 'project': None, 'task_type': ''})
-        for e in entries:
-            key = (e.project_id, e.work_item.get_display_work_type() if e.work_item else '—')
-            if groups[key]['project'] is None:
-                groups[key]['project'] = e.project
-                groups[key]['task_type'] = key[1]
-            groups[key]['hours'] += float(e.hours)
-
-        summary = [{'project': v['project'], 'task_type': v['task_type'], 'hours': v['hours']} for v in groups.values()]
-        summary.sort(key=lambda x: (x['project'].project_number if x['project'] else '', x['task_type']))
+        lock = TimesheetLock.objects.filter(user=target_user, week_start=start).first()
+        if lock:
+            # Closed week: serve the totals frozen at lock time
+            summary = frozen_summary(lock)
+        else:
+            entries = TimeEntry.objects.filter(
+                user=target_user,
+                date__gte=start,
+                date__lte=end,
+            ).select_related('project', 'work_item', 'project__project_manager').order_by('date', 'project__project_number')
+            summary = week_summary(entries)
 
         return render(request, 'time_tracking/timesheet_summary.html', {
             'week_start': start,
             'week_end': end,
             'summary': summary,
-            'total_hours': sum(s['hours'] for s in summary),
+            'lock': lock,
+            'total_hours': lock.total_hours if lock else sum(s['hours'] for s in summary),
             'target_user': target_user,
             'is_manager': user_is_manager(request.user),
             'users': _timesheet_users_for_manager() if user_is_manager(request.user) else [],
@@ -258,7 +403,7 @@ class TimeEntryCSVExportView(SchedulerOrManagerMixin, View):
         w = csv.writer(buf)
         w.writerow([
             'date', 'user', 'project_number', 'project_name', 'project_manager',
-            'task_id', 'task_name', 'task_type', 'hours', 'is_overtime', 'notes',
+            'task_id', 'task_name', 'task_type', 'hours', 'is_overtime', 'overtime_hours', 'notes',
         ])
         for e in entries:
             pm = e.project.project_manager if e.project else None
@@ -276,10 +421,96 @@ class TimeEntryCSVExportView(SchedulerOrManagerMixin, View):
                 task_name,
                 task_type,
                 e.hours,
-                'Yes' if e.is_overtime else '',
+                'Yes' if (e.is_overtime or e.overtime_hours) else '',
+                e.overtime_hours,
                 (e.description or ''),
             ])
 
         response = HttpResponse(buf.getvalue(), content_type='text/csv')
         response['Content-Disposition'] = f'attachment; filename="time_entries_{target_user.username}_{from_d}_{to_d}.csv"'
         return response
+
+
+class TimeApprovalQueueView(ManagerRequiredMixin, View):
+    """Pending user-weeks awaiting approval. POST approves or locks the selected weeks (one UPDATE each)."""
+    template_name = 'time_tracking/approval_queue.html'
+
+    def get(self, request):
+        mine = request.GET.get('mine') == '1'
+        weeks = list(pending_weeks(request.user if mine else None))
+        for w in weeks:
+            w['key'] = f"{w['user_id']}:{w['week_start'].isoformat()}"
+            w['name'] = ' '.join(filter(None, [w['user__first_name'], w['user__last_name']])) or w['user__username']
+        return render(request, self.template_name, {
+            'weeks': weeks,
+            'mine': mine,
+            'recent_locks': TimesheetLock.objects.select_related('user', 'locked_by')[:10],
+        })
+
+    def post(self, request):
+        action = request.POST.get('action')
+        if action not in ('approve', 'lock'):
+            messages.error(request, 'Invalid action.')
+            return redirect('time_approval_queue')
+        # From "My projects only" act only on what that queue showed
+        manager = request.user if request.GET.get('mine') == '1' else None
+        done, refused = 0, 0
+        for key in request.POST.getlist('weeks'):
+            user_id, _, week = key.partition(':')
+            try:
+                week_start = date.fromisoformat(week)
+                user_id = int(user_id)
+            except (ValueError, TypeError):
+                continue
+            if action == 'approve':
+                approve_week(user_id, week_start, request.user, manager=manager)
+            else:
+                try:
+                    lock_week(user_id, week_start, request.user, manager=manager)
+                except ValidationError:
+                    refused += 1
+                    continue
+            done += 1
+        verb = 'Approved' if action == 'approve' else 'Locked'
+        messages.success(request, f'{verb} {done} week{"" if done == 1 else "s"}.')
+        if refused:
+            messages.warning(
+                request,
+                f'{refused} week{"" if refused == 1 else "s"} not locked: they include hours on projects you do not manage.',
+            )
+        url = reverse('time_approval_queue')
+        if request.GET.get('mine') == '1':
+            url += '?mine=1'
+        return redirect(url)
+
+
+class UtilizationReportView(ManagerRequiredMixin, View):
+    """Users × weeks heatmap of logged hours plus open task load against weekly capacity."""
+    template_name = 'time_tracking/utilization_report.html'
+    DEFAULT_WEEKS = 16
+    MAX_WEEKS = 52
+
+    def get(self, request):
+        this_week, _ = week_range(date.today())
+        try:
+            start = week_range(date.fromisoformat(request.GET.get('start', '')))[0]
+        except (ValueError, TypeError):
+            start = this_week - timedelta(weeks=12)
+        weeks_param = request.GET.get('weeks', '')
+        n_weeks = int(weeks_param) if weeks_param.isdigit() else self.DEFAULT_WEEKS
+        n_weeks = max(1, min(n_weeks, self.MAX_WEEKS))
+        week_starts = [start + timedelta(weeks=i) for i in range(n_weeks)]
+        users = list(
+            User.objects.filter(is_active=True, profile__role__in=('manager', 'scheduler')).order_by('username')
+        )
+        report = utilization_report(users, week_starts) if users else {'rows': [], 'week_totals': [], 'overloaded_count': 0, 'mean_utilization': 0}
+        return render(request, self.template_name, {
+            'report': report,
+            'week_starts': week_starts,
+            'this_week': this_week,
+            'n_weeks': n_weeks,
+            'prev_start': start - timedelta(weeks=n_weeks),
+            'next_start': start + timedelta(weeks=n_weeks),
+            'capacity': get_weekly_capacity(),
+            'task_hours': get_task_hours(),
+        })
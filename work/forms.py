@@ -2,12 +2,28 @@ from datetime import date
 from decimal import Decimal
 from django import forms
 from django.contrib.auth import get_user_model
+from django.urls import reverse_lazy
 from projects.models import Project
 from .models import WorkItem
 
 User = get_user_model()
 
 
+class ProjectLookupWidget(forms.Select):
+    """Select that renders only the chosen project; the picker fetches ranked matches from project_lookup."""
+
+    def __init__(self, attrs=None):
+        attrs = {'data-lookup-url': reverse_lazy('project_lookup'), **(attrs or {})}
+        super().__init__(attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [v for v in value if str(v).isdigit()]
+        options = [self.create_option(name, '', '---------', not selected, 0)]
+        for index, project in enumerate(Project.objects.filter(pk__in=selected), start=1):
+            options.append(self.create_option(name, project.pk, f"{project.project_number} — {project.name}", True, index))
+        return [(None, options, 0)]
+
+
 class CompleteTaskTimeForm(forms.Form):
     """Date, hours, and notes when completing a task and logging time."""
     date_worked = forms.DateField(
@@ -56,6 +72,7 @@ class WorkItemForm(forms.ModelForm):
         self.fields['requested_by'].help_text = 'Optional.'
         self.fields['notes'].help_text = 'Optional.'
         self.fields['project'].label_from_instance = lambda obj: f"{obj.project_number} — {obj.name}"
+        self.fields['project'].widget = ProjectLookupWidget()
         self.fields['assigned_to'].queryset = User.objects.filter(username__in=['Mathias', 'scheduler1']).order_by('username')
         self.fields['due_date'].widget = forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
         self.fields['meeting_at'].required = False
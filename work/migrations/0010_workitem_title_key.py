@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:18
+
+from django.db import migrations, models
+
+
+def backfill_title_keys(apps, schema_editor):
+    # Python lower() to match WorkItem.save(); SQLite's LOWER() only folds ASCII
+    WorkItem = apps.get_model('work', 'WorkItem')
+    rows = list(WorkItem.objects.only('pk', 'title'))
+    for row in rows:
+        row.title_key = (row.title or '').lower()
+    WorkItem.objects.bulk_update(rows, ['title_key'], batch_size=500)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work', '0009_workitem_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workitem',
+            name='title_key',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.RunPython(backfill_title_keys, noop),
+        migrations.AddIndex(
+            model_name='workitem',
+            index=models.Index(fields=['project', 'title_key'], name='work_item_project_titlekey'),
+        ),
+        migrations.AddIndex(
+            model_name='workitem',
+            index=models.Index(fields=['title_key'], name='work_item_title_key'),
+        ),
+    ]
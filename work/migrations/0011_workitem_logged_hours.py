@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:17
+
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+
+def backfill_logged_hours(apps, schema_editor):
+    """Sum existing entries per work item; the latest entry date stands in for last_logged_at (entries carry no timestamp)."""
+    WorkItem = apps.get_model('work', 'WorkItem')
+    TimeEntry = apps.get_model('time_tracking', 'TimeEntry')
+    totals = (
+        TimeEntry.objects.filter(work_item__isnull=False)
+        .values_list('work_item_id')
+        .annotate(t=Sum('hours'), last=Max('date'))
+        .order_by()
+    )
+    for work_item_id, total, last in totals:
+        WorkItem.objects.filter(pk=work_item_id).update(
+            logged_hours=total,
+            last_logged_at=timezone.make_aware(datetime.combine(last, time.min)) if last else None,
+        )
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work', '0010_workitem_title_key'),
+        ('time_tracking', '0006_timeentry_approval_and_timesheetlock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workitem',
+            name='last_logged_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='workitem',
+            name='logged_hours',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.RunPython(backfill_logged_hours, noop),
+    ]
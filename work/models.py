@@ -52,6 +52,8 @@ class WorkItem(models.Model):
         blank=True,
     )
     title = models.CharField(max_length=300)
+    # Lower-cased title, set on save; autocomplete range-scans it so prefix lookups stay index-backed
+    title_key = models.CharField(max_length=300, blank=True, editable=False)
     work_type = models.CharField(max_length=50, choices=WORK_TYPE_CHOICES, default=WORK_TYPE_UPDATE)
     task_type_other = models.CharField(max_length=200, blank=True)
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default=PRIORITY_MEDIUM)
@@ -67,6 +69,9 @@ class WorkItem(models.Model):
     )
     requested_by = models.CharField(max_length=200, blank=True)
     notes = models.TextField(blank=True)
+    # Denormalized from TimeEntry by time_tracking signals; repair with `manage.py repair_time_rollups`
+    logged_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    last_logged_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     updated_by = models.ForeignKey(
@@ -98,10 +103,21 @@ class WorkItem(models.Model):
     class Meta:
         db_table = 'work_workitem'
         ordering = ['-due_date', 'priority']
+        indexes = [
+            models.Index(fields=['project', 'title_key'], name='work_item_project_titlekey'),
+            models.Index(fields=['title_key'], name='work_item_title_key'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.title_key = (self.title or '').lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'title' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'title_key'}
+        super().save(*args, **kwargs)
+
     def get_display_work_type(self):
         if self.work_type == self.WORK_TYPE_OTHER and self.task_type_other:
             return f'Other: {self.task_type_other}'
@@ -1,9 +1,13 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
 from core.audit import log_action
+from core.bulk import signals_muted
+from core.data_version import bump_version
 from core.models import AuditLog
-from .models import WorkItem
+from projects.analytics import invalidate as invalidate_project_analytics
+from projects.health import refresh as refresh_project_health
+from .models import UpdateRequest, WorkItem
 
 
 @receiver(post_save, sender=WorkItem)
@@ -13,3 +17,32 @@ def log_work_item_create(sender, instance, created, **kwargs):
         return
     user = getattr(instance, '_audit_user', None)
     log_action(user, 'workitem', instance.pk, instance.title, AuditLog.ACTION_CREATE)
+
+
+@receiver(pre_save, sender=WorkItem)
+def remember_previous_project(sender, instance, raw=False, **kwargs):
+    """Stash the stored project so moving a task also refreshes the project it left."""
+    instance._previous_project_id = None
+    if instance.pk and not raw:
+        instance._previous_project_id = (
+            WorkItem.all_objects.filter(pk=instance.pk).values_list('project_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=WorkItem)
+@receiver(post_delete, sender=WorkItem)
+def bump_work_item_version(sender, instance, **kwargs):
+    if signals_muted():
+        return
+    bump_version('work_items')
+    invalidate_project_analytics(instance.project_id, getattr(instance, '_previous_project_id', None))
+    refresh_project_health(instance.project_id, getattr(instance, '_previous_project_id', None))
+
+
+@receiver(post_save, sender=UpdateRequest)
+@receiver(post_delete, sender=UpdateRequest)
+def invalidate_project_on_update_request(sender, instance, **kwargs):
+    if signals_muted():
+        return
+    invalidate_project_analytics(instance.project_id)
+    refresh_project_health(instance.project_id)
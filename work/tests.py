@@ -205,3 +205,47 @@ class MyWorkViewTest(TestCase):
         create_logs = list(AuditLog.objects.filter(object_id=task.pk, action=AuditLog.ACTION_CREATE))
         self.assertEqual(len(create_logs), 1)
         self.assertEqual(create_logs[0].user_id, self.scheduler1.pk)
+
+
+class WorkItemAutocompleteTest(TestCase):
+    """Autocomplete returns project-scoped, title-prefix matches as JSON."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='sched', password='pass')
+        self.user.profile.role = Profile.SCHEDULER
+        self.user.profile.save()
+        self.project = Project.objects.create(
+            project_number='PRJ-AC1', name='P', client='C', pm='PM', status=Project.STATUS_ACTIVE
+        )
+        self.other = Project.objects.create(
+            project_number='PRJ-AC2', name='P2', client='C', pm='PM', status=Project.STATUS_ACTIVE
+        )
+        self.match = WorkItem.objects.create(project=self.project, title='Baseline review', work_type=WorkItem.WORK_TYPE_BASELINE)
+        WorkItem.objects.create(project=self.project, title='Update March', work_type=WorkItem.WORK_TYPE_UPDATE)
+        WorkItem.objects.create(project=self.other, title='Baseline other', work_type=WorkItem.WORK_TYPE_BASELINE)
+
+    def test_prefix_search_scoped_to_project(self):
+        self.client.login(username='sched', password='pass')
+        r = self.client.get(reverse('work_item_autocomplete'), {'q': 'base', 'project': self.project.pk})
+        self.assertEqual(r.status_code, 200)
+        results = r.json()['results']
+        self.assertEqual([x['id'] for x in results], [self.match.pk])
+        self.assertIn('PRJ-AC1', results[0]['text'])
+
+    def test_prefix_search_uses_title_key_index(self):
+        from work.views import _title_prefix
+        self.match.title = 'Écluse inspection'
+        self.match.save(update_fields=['title'])
+        self.assertEqual(WorkItem.objects.get(pk=self.match.pk).title_key, 'écluse inspection')
+        qs = WorkItem.objects.filter(project=self.project).filter(_title_prefix('ÉCL'))
+        self.assertEqual(list(qs), [self.match])
+        self.assertIn('work_item_project_titlekey', qs.explain())
+
+    def test_time_entry_form_renders_only_selected_task(self):
+        from time_tracking.forms import TimeEntryForm
+        form = TimeEntryForm(initial={'work_item': self.match.pk})
+        html = str(form['work_item'])
+        self.assertIn('Baseline review', html)
+        self.assertNotIn('Update March', html)
+        self.assertIn('data-autocomplete-url', html)
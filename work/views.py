@@ -9,7 +9,7 @@ from django.urls import reverse_lazy
 from core.mixins import SchedulerOrManagerMixin, ManagerRequiredMixin, user_is_manager
 from core.audit import log_action
 from core.models import AuditLog
-from time_tracking.models import TimeEntry
+from time_tracking.models import TimeEntry, TimesheetLock
 from projects.models import Project
 from .models import WorkItem, UpdateRequest
 from .forms import WorkItemForm, CompleteTaskTimeForm
@@ -29,6 +29,7 @@ SORT_FIELDS = {
     'meeting_at': 'meeting_at',
     'status': 'status',
     'work_type': 'work_type',
+    'logged_hours': 'logged_hours',
 }
 
 
@@ -183,6 +184,7 @@ class MyWorkListView(SchedulerOrManagerMixin, ListView):
             ('due_date', 'DUE DATE'),
             ('priority', 'PRIORITY'),
             ('status', 'STATUS'),
+            ('logged_hours', 'LOGGED'),
         ]
         sort_links = []
         for key, label in sort_columns:
@@ -287,8 +289,9 @@ class WorkItemUpdateView(SchedulerOrManagerMixin, UpdateView):
         new_status = form.cleaned_data.get('status')
         was_done = self._original_status == WorkItem.STATUS_DONE
         if was_done and new_status != WorkItem.STATUS_DONE:
-            deleted = self.object.time_entries.count()
-            self.object.time_entries.all().delete()
+            reopen_entries = self.object.time_entries.exclude(status=TimeEntry.STATUS_LOCKED)
+            deleted = reopen_entries.count()
+            reopen_entries.delete()
             if deleted:
                 messages.success(self.request, 'Task re-opened. Associated time entry removed.')
             else:
@@ -375,6 +378,8 @@ class WorkItemCompleteView(SchedulerOrManagerMixin, View):
     def post(self, request, pk):
         work_item = get_object_or_404(_work_item_queryset(request), pk=pk)
         form = CompleteTaskTimeForm(request.POST)
+        if form.is_valid() and TimesheetLock.is_locked(request.user.pk, form.cleaned_data['date_worked']):
+            form.add_error('date_worked', 'This week is locked. Pick a date in an open week.')
         if not form.is_valid():
             return render(request, 'work/workitem_complete_confirm.html', {'work_item': work_item, 'form': form})
         work_item.status = WorkItem.STATUS_DONE
@@ -526,6 +531,43 @@ def work_recommend(request):
     return JsonResponse({'answer': answer, 'recommendations': recommendations})
 
 
+AUTOCOMPLETE_LIMIT = 20
+
+
+def _title_prefix(q):
+    """
+    Case-insensitive title prefix as a range on the lower-cased title_key, so the (project, title_key)
+    index is used; istartswith compiles to LIKE on SQLite, which can't use it.
+    """
+    prefix = q.lower()
+    return Q(title_key__gte=prefix, title_key__lt=prefix + '\U0010ffff')
+
+
+class WorkItemAutocompleteView(SchedulerOrManagerMixin, View):
+    """JSON picker options: GET q= (title prefix or task id), optional project= to scope to one project."""
+
+    def get(self, request):
+        q = (request.GET.get('q') or '').strip()
+        project_id = request.GET.get('project') or ''
+        qs = WorkItem.objects.all()
+        if project_id.isdigit():
+            qs = qs.filter(project_id=int(project_id))
+        if q.isdigit():
+            qs = qs.filter(Q(pk=int(q)) | _title_prefix(q))
+        elif q:
+            qs = qs.filter(_title_prefix(q))
+        rows = qs.order_by('title_key', 'pk').values('pk', 'title', 'project_id', 'project__project_number')[:AUTOCOMPLETE_LIMIT]
+        results = [
+            {
+                'id': r['pk'],
+                'text': f"{r['project__project_number']} — {r['title']}" if r['project__project_number'] else r['title'],
+                'project': r['project_id'],
+            }
+            for r in rows
+        ]
+        return JsonResponse({'results': results})
+
+
 class WorkItemRestoreView(SchedulerOrManagerMixin, View):
     """Restore a soft-deleted task. Only within 30 days; permission same as delete."""
     def post(self, request, pk):